@@ -34,6 +34,7 @@ import numpy as np
 from pyannote.core.feature import SlidingWindowFeature
 from pyannote.core.scores import Scores
 from pyannote.core.annotation import Unknown
+from ..utils.crop import crop, crop_views
 
 
 class BaseClassification(object):
@@ -65,18 +66,24 @@ class BaseClassification(object):
 
     def _get_all_data(self, annotation_iterator, features_iterator):
 
-        data = np.vstack([
-            f.crop(r.get_timeline().coverage())  # use labeled regions only
+        # use labeled regions only
+        # (views of all files are copied only once, when concatenated)
+        data = np.concatenate([
+            view
             for r, f in six.moves.zip(annotation_iterator, features_iterator)
+            for view in crop_views(f, r.get_timeline().coverage())
         ])
 
         return data
 
     def _get_target_data(self, annotation_iterator, features_iterator, target):
 
-        data = np.vstack([
-            f.crop(r.label_coverage(target))  # use target regions only
+        # use target regions only
+        # (views of all files are copied only once, when concatenated)
+        data = np.concatenate([
+            view
             for r, f in six.moves.zip(annotation_iterator, features_iterator)
+            for view in crop_views(f, r.label_coverage(target))
         ])
 
         return data
@@ -130,7 +137,7 @@ class BaseClassification(object):
             targets_scores, features.sliding_window)
 
         for segment, track in segmentation.itertracks():
-            x = self._aggregate_track_scores(new_features.crop(segment))
+            x = self._aggregate_track_scores(crop(new_features, segment))
             for t, target in enumerate(self.targets):
                 scores[segment, track, target] = x[t]
 
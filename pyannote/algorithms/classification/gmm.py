@@ -29,15 +29,17 @@
 from __future__ import unicode_literals
 
 import numpy as np
-from ..stats.llr import logsumexp
 from ..stats.lbg import LBG
+from ..stats.em import GaussianMixture
+from ..stats.mixtures import adapt_mixtures, map_adapt_mixtures
 from ..stats.llr import LLRNaiveBayes, LLRIsotonicRegression, LLRPassthrough
-from pyannote.core import Timeline, Annotation, Scores
+from .gmm_base import BaseSKLearnGMMClassification, BaseGMMClassification
+from .gmm_base import BaseSKLearnGMMUBMClassification
+from .gmm_base import BaseGMMUBMClassification
 
-import sklearn
 from sklearn.base import BaseEstimator, ClassifierMixin
-from sklearn.mixture import GMM
-from ..utils.sklearn import SKLearnMixin, LabelConverter
+from ..utils.sklearn import LabelConverter
+from ..utils.store import FrameStore
 
 from joblib import Parallel, delayed
 
@@ -58,8 +60,13 @@ def fit_gmm_lbg(X, n_components=1, covariance_type='diag',
 def fit_gmm(X, n_components=1, covariance_type='diag',
             random_state=None, tol=1e-2, min_covar=1e-3,
             n_iter=10, n_init=1, params='wmc', init_params='wmc'):
+    """Train GMM with EM
 
-    gmm = GMM(
+    X can be an array (possibly memory-mapped) or a re-iterable sequence of
+    chunks of samples, as sufficient statistics are accumulated by chunks.
+    """
+
+    gmm = GaussianMixture(
         n_components=n_components,
         covariance_type=covariance_type,
         random_state=random_state,
@@ -75,24 +82,47 @@ def fit_gmm(X, n_components=1, covariance_type='diag',
 
 def adapt_ubm(ubm, X, adapt_params='m', adapt_iter=10):
 
-    # clone UBM (n_components, covariance type, etc...)
-    gmm = sklearn.clone(ubm)
+    # same n_components, covariance type, etc... as UBM
+    # adapting only some parameters
+    gmm = GaussianMixture(
+        n_components=ubm.n_components,
+        covariance_type=ubm.covariance_type,
+        random_state=ubm.random_state,
+        tol=ubm.tol,
+        min_covar=ubm.min_covar,
+        n_iter=adapt_iter,
+        n_init=1,
+        params=adapt_params,
+        init_params='')
 
     # initialize with UBM precomputed weights, means and covariance matrices
-    gmm.n_init = 1
-    gmm.init_params = ''
     gmm.weights_ = ubm.weights_
     gmm.means_ = ubm.means_
     gmm.covars_ = ubm.covars_
 
-    # adapt only some parameters
-    gmm.params = adapt_params
-    gmm.n_iter = adapt_iter
     gmm.fit(X)
 
     return gmm
 
 
+def _samples(X):
+    """Get (possibly memory-mapped) samples"""
+    if isinstance(X, FrameStore):
+        return X.X
+    return X
+
+
+def _class_samples(X, y, k, chunks=False):
+    """Get samples of class k
+
+    When X is a FrameStore, samples are read from disk: all at once, or
+    lazily by chunks (re-iterable) when `chunks` is True.
+    """
+    if isinstance(X, FrameStore):
+        return X.chunks(label=k) if chunks else X.subset(k)
+    return X[y == k]
+
+
 def fit_naive_bayes(X, y):
     return LLRNaiveBayes(equal_priors=True).fit(X, y)
 
@@ -105,7 +135,8 @@ def fit_passthrough(X, y):
     return LLRPassthrough().fit(X, y)
 
 
-class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
+class SKLearnGMMClassification(BaseEstimator, ClassifierMixin,
+                               BaseSKLearnGMMClassification):
     """
 
     Parameters
@@ -116,7 +147,7 @@ class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -156,12 +187,17 @@ class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
 
     equal_priors : bool, optional
         Defaults to False.
+
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
     """
 
     def __init__(self, n_jobs=1, n_components=1, covariance_type='diag',
                  random_state=None, tol=1e-2, min_covar=1e-3,
                  n_iter=10, n_init=1, params='wmc', init_params='wmc',
-                 calibration=None, lbg=False, equal_priors=False):
+                 calibration=None, lbg=False, equal_priors=False,
+                 scoring_dtype='float64'):
 
         super(SKLearnGMMClassification, self).__init__()
 
@@ -181,26 +217,35 @@ class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
         self.lbg = lbg
 
         self.equal_priors = equal_priors
+        self.scoring_dtype = scoring_dtype
 
     def _fit_priors(self, y):
 
         classes, counts = np.unique(y, return_counts=True)
-        priors = 1. * counts / np.sum(counts)
 
+        # number of samples per class are kept so that priors can be
+        # updated when classes are added or removed
         self.open_set_ = (classes[0] == -1)
         if self.open_set_:
             self.classes_ = classes[1:]
-            self.prior_ = priors[1:]
-            self.unknown_prior_ = priors[0]
+            self.counts_ = counts[1:]
+            self.unknown_count_ = counts[0]
 
         else:
             self.classes_ = classes
-            self.prior_ = priors
-            self.unknown_prior_ = 0.
+            self.counts_ = counts
+            self.unknown_count_ = 0
 
         K = len(self.classes_)
         assert np.all(self.classes_ == np.arange(K))
 
+        self._update_priors()
+
+    def _update_priors(self):
+        total = 1. * (np.sum(self.counts_) + self.unknown_count_)
+        self.prior_ = self.counts_ / total
+        self.unknown_prior_ = self.unknown_count_ / total
+
     def _fit_estimators(self, X, y):
 
         if self.lbg:
@@ -208,8 +253,9 @@ class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
         else:
             fit_func = fit_gmm
 
+        # EM reads class samples chunk by chunk, LBG needs all of them
         self.estimators_ = Parallel(n_jobs=self.n_jobs)(delayed(fit_func)(
-            X[y == k],
+            _class_samples(X, y, k, chunks=not self.lbg),
             n_components=self.n_components,
             covariance_type=self.covariance_type,
             random_state=self.random_state,
@@ -239,7 +285,7 @@ class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
 
         fit_calibration = self._get_fit_calibration()
 
-        scores = self._uncalibrated_scores(X)
+        scores = self._uncalibrated_scores(_samples(X))
 
         self.calibrations_ = Parallel(n_jobs=self.n_jobs)(
             delayed(fit_calibration)(
@@ -248,108 +294,30 @@ class SKLearnGMMClassification(BaseEstimator, ClassifierMixin):
             )
             for i, k in enumerate(self.classes_))
 
-    def fit(self, X, y):
+    def fit(self, X, y=None):
         """
         Parameters
         ----------
-        X :
-        y :
+        X : array-like, shape (N, D) or FrameStore
+            Training samples. When a FrameStore is provided, samples of each
+            class are read from disk only when needed.
+        y : array-like, shape (N, )
+            Training labels. Defaults to X.y when X is a FrameStore.
         """
 
+        if y is None and isinstance(X, FrameStore):
+            y = X.y
+
         self._fit_priors(y)
         self._fit_estimators(X, y)
+        self._stack()
         self._fit_calibrations(X, y)
 
         return self
 
-    # -- UNCALIBRATED SCORES --------------------------------------------------
-
-    def predict_log_likelihood(self, X):
-        return np.array([
-            estimator.score(X)
-            for estimator in self.estimators_
-        ]).T
-
-    def _uncalibrated_scores(self, X):
-        return self.predict_log_likelihood(X)
 
-    # -- (CALIBRATED) LOG-LIKELIHOOD RATIOS -----------------------------------
-
-    def predict_log_likelihood_ratio(self, X):
-
-        # log-likelihood ratio cannot be estimated from raw scores
-        # when no calibration was trained
-        if self.calibration is None:
-            raise NotImplementedError('Not supported without calibration')
-
-        scores = self._uncalibrated_scores(X)
-        for i, calibration in enumerate(self.calibrations_):
-            scores[:, i] = calibration.transform(scores[:, i])
-
-        return scores
-
-    # -- POSTERIOR PROBABILITIES ----------------------------------------------
-
-    def predict_log_proba(self, X):
-        """Posterior log-probability"""
-
-        ll_ratio = self.predict_log_likelihood_ratio(X)
-        prior = self.prior_
-
-        if self.open_set_:
-            # append "unknown" prior
-            prior = np.hstack([self.prior_, self.unknown_prior_])
-            # append "unknown" log-likelihood ratio (zeros)
-            zeros = np.zeros((ll_ratio.shape[0], 1))
-            ll_ratio = np.hstack([ll_ratio, zeros])
-
-        if self.equal_priors:
-            prior = np.ones(prior.shape) / len(prior)
-
-        posterior = ((np.log(prior) + ll_ratio).T -
-                     logsumexp(ll_ratio, b=prior, axis=1)).T
-
-        if self.open_set_:
-            # remove dimension of unknown prior
-            posterior = posterior[:, :-1]
-
-        return posterior
-
-    def predict_proba(self, X):
-        """Posterior probability"""
-
-        return np.exp(self.predict_log_proba(X))
-
-    # -------------------------------------------------------------------------
-
-    def predict(self, X):
-
-        # when no calibration was trained
-        # use raw log-likelihood to perform prediction
-        if self.calibration is None:
-            return np.argmax(self.predict_log_likelihood(X), axis=1)
-
-        # otherwise, calibrate them into actual posterior probability
-        # before taking the decision
-
-        n = X.shape[0]
-        y = -np.ones((X.shape[0],), dtype=float)
-
-        posterior = self.predict_proba(X)
-
-        unknown_posterior = 1. - np.sum(posterior, axis=1)
-
-        argmaxima = np.argmax(posterior, axis=1)
-
-        maxima = posterior[list(range(n)), argmaxima]
-        known = maxima > unknown_posterior
-
-        y[known] = argmaxima[known]
-
-        return y
-
-
-class SKLearnGMMUBMClassification(SKLearnGMMClassification):
+class SKLearnGMMUBMClassification(BaseSKLearnGMMUBMClassification,
+                                  SKLearnGMMClassification):
     """
     Parameters
     ----------
@@ -359,7 +327,7 @@ class SKLearnGMMUBMClassification(SKLearnGMMClassification):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -388,7 +356,7 @@ class SKLearnGMMUBMClassification(SKLearnGMMClassification):
         process.  Can contain any combination of 'w' for weights,
         'm' for means, and 'c' for covars.  Defaults to 'wmc'.
 
-    precomputed_ubm : GMM, optional
+    precomputed_ubm : GaussianMixture, optional
         When provided, class GMMs are adapted from this UBM.
 
     adapt_params : string, optional
@@ -399,6 +367,20 @@ class SKLearnGMMUBMClassification(SKLearnGMMClassification):
     adapt_iter : int, optional
         Number of EM iterations to perform during adaptation.
 
+    relevance_factor : float, optional
+        When provided, class models are obtained by closed-form MAP
+        adaptation (Reynolds et al., 2000) of UBM parameters `adapt_params`
+        with this relevance factor (typically 16.), in one single pass over
+        the training samples (`adapt_iter` is then ignored). Only supported
+        with 'diag' covariances. Defaults to EM adaptation.
+
+    top_components : int, optional
+        When provided, class models are only evaluated on the
+        `top_components` best UBM components of each sample (Gaussian
+        selection), which is much faster with large UBMs. Only supported
+        with 'diag' covariances and adapt_params='m'. Defaults to evaluating
+        all components.
+
     calibration : string, optional
         Controls how raw GMM scores are calibrated into log-likelihood ratios.
         Must be one of 'naive_bayes' (for Gaussian naive Bayes) or 'isotonic'
@@ -410,24 +392,32 @@ class SKLearnGMMUBMClassification(SKLearnGMMClassification):
 
     equal_priors : bool, optional
         Defaults to False.
+
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
     """
 
     def __init__(self, n_jobs=1, n_components=1, covariance_type='diag',
                  random_state=None, tol=1e-2, min_covar=1e-3,
                  n_iter=10, n_init=1, params='wmc', init_params='wmc',
                  precomputed_ubm=None, adapt_iter=10, adapt_params='m',
-                 calibration=None, lbg=False, equal_priors=False):
+                 calibration=None, lbg=False, equal_priors=False,
+                 scoring_dtype='float64', top_components=None,
+                 relevance_factor=None):
 
         super(SKLearnGMMUBMClassification, self).__init__(
             n_components=n_components, covariance_type=covariance_type,
             random_state=random_state, tol=tol, min_covar=min_covar,
             n_iter=n_iter, n_init=n_init, params=params,
             init_params=init_params, calibration=calibration, n_jobs=n_jobs,
-            lbg=lbg, equal_priors=equal_priors)
+            lbg=lbg, equal_priors=equal_priors, scoring_dtype=scoring_dtype)
 
         self.precomputed_ubm = precomputed_ubm
         self.adapt_iter = adapt_iter
         self.adapt_params = adapt_params
+        self.top_components = top_components
+        self.relevance_factor = relevance_factor
 
     def _fit_ubm_lbg(self, X, y=None):
 
@@ -445,7 +435,7 @@ class SKLearnGMMUBMClassification(SKLearnGMMClassification):
 
     def _fit_ubm(self, X, y=None):
 
-        self.ubm_ = GMM(
+        self.ubm_ = GaussianMixture(
             n_components=self.n_components,
             covariance_type=self.covariance_type,
             random_state=self.random_state,
@@ -462,48 +452,135 @@ class SKLearnGMMUBMClassification(SKLearnGMMClassification):
 
     def _fit_estimators(self, X, y):
 
+        if self.top_components is not None and self.adapt_params != 'm':
+            raise ValueError(
+                'Gaussian selection (top_components) is only supported when '
+                'adapting means (adapt_params=\'m\').')
+
+        if self.top_components is not None and \
+           self.covariance_type != 'diag':
+            raise ValueError(
+                'Gaussian selection (top_components) requires diagonal '
+                'covariances.')
+
         if self.precomputed_ubm is None:
             if self.lbg:
-                self.ubm_ = self._fit_ubm_lbg(X, y=y)
+                self.ubm_ = self._fit_ubm_lbg(_samples(X), y=y)
             else:
-                self.ubm_ = self._fit_ubm(X, y=y)
+                self.ubm_ = self._fit_ubm(_samples(X), y=y)
 
         else:
             self.ubm_ = self.precomputed_ubm
 
-        self.estimators_ = Parallel(n_jobs=self.n_jobs)(delayed(adapt_ubm)(
-            self.ubm_, X[y == k],
+        self.estimators_ = self._adapt(X, y, self.classes_)
+
+    def _adapt(self, X, y, classes):
+        """Adapt models of (contiguous) `classes` from the UBM"""
+
+        n_classes = len(classes)
+
+        # closed-form MAP adaptation, in one pass over X
+        if self.relevance_factor is not None:
+            return map_adapt_mixtures(
+                self.ubm_, _samples(X), y - classes[0], n_classes,
+                relevance_factor=self.relevance_factor,
+                params=self.adapt_params, n_jobs=self.n_jobs)
+
+        # all classes are adapted at once, in one pass over X per iteration
+        # (n_jobs threads share X and the UBM)
+        if self.ubm_.covariance_type == 'diag':
+            return adapt_mixtures(
+                self.ubm_, _samples(X), y - classes[0], n_classes,
+                params=self.adapt_params, n_iter=self.adapt_iter,
+                n_jobs=self.n_jobs)
+
+        return Parallel(n_jobs=self.n_jobs)(delayed(adapt_ubm)(
+            self.ubm_, _class_samples(X, y, k, chunks=True),
             adapt_params=self.adapt_params,
-            adapt_iter=self.adapt_iter) for k in self.classes_)
+            adapt_iter=self.adapt_iter) for k in classes)
 
-    # -- UNCALIBRATED SCORES --------------------------------------------------
+    # -- INCREMENTAL ENROLLMENT -----------------------------------------------
 
-    def _uncalibrated_scores(self, X):
-        # should return log-likelihood ratio for each each class
-        # log p(X|i) - log p(X|~i) instead of just log p(X|i)
-        # here it is approximated as log p(X|i) - log p(X|ω)
-        ll = np.array([estimator.score(X) for estimator in self.estimators_]).T
-        ll_ubm = self.ubm_.score(X)
-        ll_ratio = (ll.T - ll_ubm).T
-        return ll_ratio
+    def add_classes(self, X, y=None):
+        """Enroll new classes, keeping UBM and existing classes untouched
 
-    # overrides SKLearnGMMClassification.predict_log_likelihood_ratio
-    # as GMM/UBM raw scores are (kind of) log-likelhood ratio
-    def predict_log_likelihood_ratio(self, X):
+        Models of new classes are adapted from the existing UBM, and only
+        their calibration is trained (using samples of other classes as
+        negative examples). Calibration of existing classes is left as is:
+        call `fit` again when enrolled classes are expected to be confused
+        with existing ones.
 
-        scores = self._uncalibrated_scores(X)
+        Parameters
+        ----------
+        X : array-like, shape (N, D) or FrameStore
+            Samples.
+        y : array-like, shape (N, )
+            Labels. New classes must be labeled K, K + 1, ... where K is the
+            current number of classes. Samples of existing classes (and
+            unknown samples, labeled -1) are only used for calibration.
+            Defaults to X.y when X is a FrameStore.
+        """
 
-        if self.calibration is None:
-            return scores
+        if y is None and isinstance(X, FrameStore):
+            y = X.y
+        y = np.asarray(y)
+
+        n_classes = len(self.classes_)
+        classes, counts = np.unique(y[y >= n_classes], return_counts=True)
+        if not np.all(classes == n_classes + np.arange(len(classes))):
+            raise ValueError(
+                'New classes must be labeled {K}, {K}+1, ...'.format(
+                    K=n_classes))
+
+        if len(classes) == 0:
+            return self
+
+        estimators = self._adapt(X, y, classes)
+
+        if self.calibration is not None:
+            fit_calibration = self._get_fit_calibration()
+            ll = self._scorer(estimators).score(_samples(X))
+            scores = ll[:, :-1] - ll[:, -1:]
+            calibrations = Parallel(n_jobs=self.n_jobs)(
+                delayed(fit_calibration)(
+                    scores[:, i], np.array(y == k, dtype=int))
+                for i, k in enumerate(classes))
+        else:
+            calibrations = [fit_passthrough(None, None) for _ in classes]
+
+        self.estimators_ = list(self.estimators_) + list(estimators)
+        self.calibrations_ = list(self.calibrations_) + list(calibrations)
+        self.classes_ = np.arange(n_classes + len(classes))
+        self.counts_ = np.hstack([self.counts_, counts])
+        self._update_priors()
+        self._stack()
+
+        return self
+
+    def remove_classes(self, classes):
+        """Remove classes
+
+        Remaining classes are re-indexed (in the same order).
+
+        Parameters
+        ----------
+        classes : iterable
+            Indices of classes to remove.
+        """
 
-        # calibrate raw scores if calibration is available
-        for i, calibration in enumerate(self.calibrations_):
-            scores[:, i] = calibration.transform(scores[:, i])
+        keep = np.setdiff1d(self.classes_, list(classes))
 
-        return scores
+        self.estimators_ = [self.estimators_[k] for k in keep]
+        self.calibrations_ = [self.calibrations_[k] for k in keep]
+        self.classes_ = np.arange(len(keep))
+        self.counts_ = self.counts_[keep]
+        self._update_priors()
+        self._stack()
+
+        return self
 
 
-class GMMClassification(SKLearnMixin, object):
+class GMMClassification(BaseGMMClassification):
     """
 
     Parameters
@@ -514,7 +591,7 @@ class GMMClassification(SKLearnMixin, object):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -555,12 +632,22 @@ class GMMClassification(SKLearnMixin, object):
     equal_priors : bool, optional
         Defaults to False.
 
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
+
+    store_dir : str, optional
+        Directory where training frames are temporarily stored (and
+        memory-mapped) during training. Defaults to the system temporary
+        directory.
+
     """
 
     def __init__(self, n_jobs=1, n_components=1, covariance_type='diag',
                  random_state=None, tol=1e-2, min_covar=1e-3,
                  n_iter=10, n_init=1, params='wmc', init_params='wmc',
-                 calibration=None, lbg=False, equal_priors=False):
+                 calibration=None, lbg=False, equal_priors=False,
+                 scoring_dtype='float64', store_dir=None):
 
         self.n_components = n_components
         self.covariance_type = covariance_type
@@ -575,6 +662,8 @@ class GMMClassification(SKLearnMixin, object):
         self.n_jobs = n_jobs
         self.lbg = lbg
         self.equal_priors = equal_priors
+        self.scoring_dtype = scoring_dtype
+        self.store_dir = store_dir
 
     def fit(self, features_iter, annotation_iter):
 
@@ -592,83 +681,24 @@ class GMMClassification(SKLearnMixin, object):
             calibration=self.calibration,
             lbg=self.lbg,
             equal_priors=self.equal_priors,
+            scoring_dtype=self.scoring_dtype,
         )
 
-        annotation_iter = list(annotation_iter)
-        features_iter = list(features_iter)
+        # training frames are stored on disk and memory-mapped
+        with self.Xy_store(features_iter, annotation_iter,
+                           dir=self.store_dir) as store:
 
-        X, y = self.Xy_stack(features_iter, annotation_iter, unknown='unique')
+            # convert PyAnnote labels to SKLearn labels
+            self.label_converter_ = LabelConverter().fit(store.labels_)
+            store.relabel(self.label_converter_.transform(store.labels_))
 
-        # convert PyAnnote labels to SKLearn labels
-        self.label_converter_ = LabelConverter()
-        converted_y = self.label_converter_.fit_transform(y)
-
-        # fit GMM-UBM classifier
-        self.classifier_.fit(X, converted_y)
+            # fit GMM-UBM classifier
+            self.classifier_.fit(store)
 
         return self
 
-    def _as_scores(self, raw, features, segmentation):
-
-        if isinstance(segmentation, Timeline):
-            annotation = Annotation(uri=segmentation.uri)
-            for segment in segmentation:
-                annotation[segment] = '?'
-            segmentation = annotation
-
-        # convert to pyannote-style & aggregate over each segment
-        scores = Scores(uri=segmentation.uri, modality=segmentation.modality,
-                        annotation=segmentation,
-                        labels=list(self.label_converter_))
-
-        sliding_window = features.sliding_window
-
-        for segment, track in segmentation.itertracks():
-
-            # extract raw for all features in segment and aggregate
-            i_start, i_duration = sliding_window.segmentToRange(segment)
-            p = np.mean(raw[i_start:i_start + i_duration, :], axis=0)
-
-            for i, label in enumerate(self.label_converter_):
-                scores[segment, track, label] = p[i]
-
-        return scores
-
-    def score(self, features, segmentation):
-        X = self.X(features, unknown='keep')
-        raw = self.classifier_._uncalibrated_scores(X)
-        return self._as_scores(raw, features, segmentation)
-
-    def predict_log_likelihood(self, features, segmentation):
-        X = self.X(features, unknown='keep')
-        log_likelihood = self.classifier_.predict_log_likelihood(X)
-        return self._as_scores(log_likelihood, features, segmentation)
 
-    def predict_log_likelihood_ratio(self, features, segmentation):
-        X = self.X(features, unknown='keep')
-        llr = self.classifier_.predict_log_likelihood_ratio(X)
-        return self._as_scores(llr, features, segmentation)
-
-    def predict_proba(self, features, segmentation):
-        X = self.X(features, unknown='keep')
-        proba = self.classifier_.predict_proba(X)
-        return self._as_scores(proba, features, segmentation)
-
-    def predict(self, features, segmentation):
-
-        # when no calibration was trained
-        # use raw log-likelihood to perform prediction
-        if self.calibration is None:
-            scores = self.predict_log_likelihood(features, segmentation)
-            return scores.to_annotation(posterior=False)
-
-        # otherwise, calibrate them into actual posterior probability
-        # before taking the decision
-        scores = self.predict_proba(features, segmentation)
-        return scores.to_annotation(posterior=True)
-
-
-class GMMUBMClassification(GMMClassification):
+class GMMUBMClassification(BaseGMMUBMClassification, GMMClassification):
     """
     Parameters
     ----------
@@ -678,7 +708,7 @@ class GMMUBMClassification(GMMClassification):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -707,7 +737,7 @@ class GMMUBMClassification(GMMClassification):
         process.  Can contain any combination of 'w' for weights,
         'm' for means, and 'c' for covars.  Defaults to 'wmc'.
 
-    precomputed_ubm : GMM, optional
+    precomputed_ubm : GaussianMixture, optional
         When provided, class GMMs are adapted from this UBM.
 
     adapt_params : string, optional
@@ -718,6 +748,20 @@ class GMMUBMClassification(GMMClassification):
     adapt_iter : int, optional
         Number of EM iterations to perform during adaptation.
 
+    relevance_factor : float, optional
+        When provided, class models are obtained by closed-form MAP
+        adaptation (Reynolds et al., 2000) of UBM parameters `adapt_params`
+        with this relevance factor (typically 16.), in one single pass over
+        the training samples (`adapt_iter` is then ignored). Only supported
+        with 'diag' covariances. Defaults to EM adaptation.
+
+    top_components : int, optional
+        When provided, class models are only evaluated on the
+        `top_components` best UBM components of each sample (Gaussian
+        selection), which is much faster with large UBMs. Only supported
+        with 'diag' covariances and adapt_params='m'. Defaults to evaluating
+        all components.
+
     calibration : string, optional
         Controls how raw GMM scores are calibrated into log-likelihood ratios.
         Must be one of 'naive_bayes' (for Gaussian naive Bayes) or 'isotonic'
@@ -730,13 +774,24 @@ class GMMUBMClassification(GMMClassification):
     equal_priors : bool, optional
         Defaults to False.
 
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
+
+    store_dir : str, optional
+        Directory where training frames are temporarily stored (and
+        memory-mapped) during training. Defaults to the system temporary
+        directory.
+
     """
 
     def __init__(self, n_jobs=1, n_components=1, covariance_type='diag',
                  random_state=None, tol=1e-2, min_covar=1e-3,
                  n_iter=10, n_init=1, params='wmc', init_params='wmc',
                  precomputed_ubm=None, adapt_iter=10, adapt_params='m',
-                 calibration=None, lbg=False, equal_priors=False):
+                 calibration=None, lbg=False, equal_priors=False,
+                 scoring_dtype='float64', top_components=None,
+                 relevance_factor=None, store_dir=None):
 
         super(GMMUBMClassification, self).__init__(
             n_components=n_components,
@@ -751,11 +806,15 @@ class GMMUBMClassification(GMMClassification):
             calibration=calibration,
             n_jobs=n_jobs,
             lbg=lbg,
-            equal_priors=equal_priors)
+            equal_priors=equal_priors,
+            scoring_dtype=scoring_dtype,
+            store_dir=store_dir)
 
         self.precomputed_ubm = precomputed_ubm
         self.adapt_iter = adapt_iter
         self.adapt_params = adapt_params
+        self.top_components = top_components
+        self.relevance_factor = relevance_factor
 
     def fit(self, features_iter, annotation_iter):
 
@@ -776,23 +835,63 @@ class GMMUBMClassification(GMMClassification):
             calibration=self.calibration,
             lbg=self.lbg,
             equal_priors=self.equal_priors,
+            scoring_dtype=self.scoring_dtype,
+            top_components=self.top_components,
+            relevance_factor=self.relevance_factor,
         )
 
-        annotation_iter = list(annotation_iter)
-        features_iter = list(features_iter)
+        # training frames are stored on disk and memory-mapped
+        with self.Xy_store(features_iter, annotation_iter,
+                           dir=self.store_dir) as store:
 
-        X, y = self.Xy_stack(features_iter, annotation_iter, unknown='unique')
+            # convert PyAnnote labels to SKLearn labels
+            self.label_converter_ = LabelConverter().fit(store.labels_)
+            store.relabel(self.label_converter_.transform(store.labels_))
 
-        # convert PyAnnote labels to SKLearn labels
-        self.label_converter_ = LabelConverter()
-        converted_y = self.label_converter_.fit_transform(y)
+            # fit GMM-UBM classifier
+            self.classifier_.fit(store)
 
-        # fit GMM-UBM classifier
-        self.classifier_.fit(X, converted_y)
+        return self
+
+    def add_targets(self, features_iter, annotation_iter):
+        """Enroll new targets without retraining UBM and existing targets
+
+        Models of targets that are not known yet are adapted from the
+        existing UBM (and calibrated). Tracks of already known targets (and
+        unknown tracks) are only used as negative examples for calibration.
+        """
+
+        with self.Xy_store(features_iter, annotation_iter,
+                           dir=self.store_dir) as store:
+
+            # new labels are indexed after existing ones
+            self.label_converter_.extend(store.labels_)
+            store.relabel(self.label_converter_.transform(store.labels_))
+
+            self.classifier_.add_classes(store)
 
         return self
 
-    def predict(self, features, segmentation):
+    def remove_targets(self, labels):
+        """Remove targets
+
+        Parameters
+        ----------
+        labels : iterable
+            Labels of targets to remove.
+        """
+
+        labels = list(labels)
+        mapping = self.label_converter_.mapping()
+        self.classifier_.remove_classes([mapping[label] for label in labels])
+        self.label_converter_.remove(labels)
+
+        return self
+
+    def partial_fit(self, features_iter, annotation_iter):
+        """Same as `fit` at first call, same as `add_targets` afterwards"""
+
+        if not hasattr(self, 'classifier_'):
+            return self.fit(features_iter, annotation_iter)
 
-        scores = self.predict_proba(features, segmentation)
-        return scores.to_annotation(posterior=True)
+        return self.add_targets(features_iter, annotation_iter)
@@ -0,0 +1,458 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Prediction with trained GMM classifiers
+
+Classes in this module only implement prediction and do not depend on
+scikit-learn: they are the base classes of those in `.gmm` (which implement
+training) and are what `load` returns, so that models exported with `save` are
+loaded and applied without importing scikit-learn.
+"""
+
+from __future__ import unicode_literals
+
+import numpy as np
+from pyannote.core import Timeline, Annotation, Scores
+from ..stats.em import GaussianMixture
+from ..stats.mixtures import StackedMixtures, ShortlistedMixtures
+from ..stats.calibration import logsumexp, tabulate
+from ..stats.calibration import QuadraticLLR, TabulatedLLR
+from ..utils.sklearn import SKLearnMixin, LabelConverter
+
+NPZ_FORMAT = 1
+
+
+def _mixtures_to_arrays(mixtures, prefix=''):
+    """Concatenate mixtures parameters"""
+    return {
+        prefix + 'covariance_type': mixtures[0].covariance_type,
+        prefix + 'n_components': np.array(
+            [len(mixture.weights_) for mixture in mixtures], dtype=int),
+        prefix + 'weights': np.concatenate(
+            [mixture.weights_ for mixture in mixtures]),
+        prefix + 'means': np.concatenate(
+            [mixture.means_ for mixture in mixtures]),
+        prefix + 'covars': np.concatenate(
+            [mixture.covars_ for mixture in mixtures])}
+
+
+def _mixtures_from_arrays(arrays, prefix=''):
+    """Split concatenated mixtures parameters"""
+
+    covariance_type = str(arrays[prefix + 'covariance_type'])
+    n_components = arrays[prefix + 'n_components']
+    boundaries = np.hstack([[0], np.cumsum(n_components)])
+
+    mixtures = []
+    for k, start, end in zip(n_components, boundaries[:-1], boundaries[1:]):
+        mixture = GaussianMixture(n_components=int(k),
+                                  covariance_type=covariance_type)
+        mixture.weights_ = arrays[prefix + 'weights'][start:end]
+        mixture.means_ = arrays[prefix + 'means'][start:end]
+        mixture.covars_ = arrays[prefix + 'covars'][start:end]
+        mixtures.append(mixture)
+
+    return mixtures
+
+
+def _calibrations_to_arrays(calibrations):
+    """Store calibrations as polynomial coefficients or tables"""
+
+    calibrations = [tabulate(calibration) for calibration in calibrations]
+
+    coef = np.zeros((len(calibrations), 3))
+    size = np.zeros((len(calibrations), ), dtype=int)
+    x, y = [np.zeros((0, ))], [np.zeros((0, ))]
+    for i, calibration in enumerate(calibrations):
+        if isinstance(calibration, TabulatedLLR):
+            size[i] = len(calibration.x)
+            x.append(calibration.x)
+            y.append(calibration.y)
+        else:
+            coef[i] = calibration.coef
+
+    return {'calibration_coef': coef,
+            'calibration_size': size,
+            'calibration_x': np.concatenate(x),
+            'calibration_y': np.concatenate(y)}
+
+
+def _calibrations_from_arrays(arrays):
+
+    coef = arrays['calibration_coef']
+    size = arrays['calibration_size']
+    boundaries = np.hstack([[0], np.cumsum(size)])
+    x, y = arrays['calibration_x'], arrays['calibration_y']
+
+    calibrations = []
+    for i, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        if end > start:
+            calibrations.append(TabulatedLLR(x[start:end], y[start:end]))
+        else:
+            calibrations.append(QuadraticLLR(coef[i]))
+
+    return calibrations
+
+
+class BaseSKLearnGMMClassification(object):
+    """Prediction part of SKLearnGMMClassification"""
+
+    # -- EXPORT / IMPORT ------------------------------------------------------
+
+    def _to_arrays(self):
+
+        arrays = _mixtures_to_arrays(self.estimators_)
+        arrays.update(_calibrations_to_arrays(self.calibrations_))
+        arrays.update(
+            calibration=self.calibration or '',
+            equal_priors=self.equal_priors,
+            scoring_dtype=self.scoring_dtype,
+            open_set=self.open_set_,
+            counts=self.counts_,
+            unknown_count=self.unknown_count_,
+            prior=self.prior_,
+            unknown_prior=self.unknown_prior_)
+
+        return arrays
+
+    def _from_arrays(self, arrays):
+
+        self.estimators_ = _mixtures_from_arrays(arrays)
+        self.calibrations_ = _calibrations_from_arrays(arrays)
+        self.calibration = str(arrays['calibration']) or None
+        self.equal_priors = bool(arrays['equal_priors'])
+        self.scoring_dtype = str(arrays['scoring_dtype'])
+        self.open_set_ = bool(arrays['open_set'])
+        self.counts_ = arrays['counts']
+        self.unknown_count_ = int(arrays['unknown_count'])
+        self.prior_ = arrays['prior']
+        self.unknown_prior_ = float(arrays['unknown_prior'])
+        self.classes_ = np.arange(len(self.estimators_))
+
+        return self
+
+    # -- UNCALIBRATED SCORES --------------------------------------------------
+
+    def _scorer(self, estimators):
+        """Stack mixtures so that they are scored in one pass over X"""
+        return StackedMixtures(estimators, dtype=self.scoring_dtype)
+
+    def _stack(self):
+        self.stacked_ = self._scorer(self.estimators_)
+        return self.stacked_
+
+    def _stacked(self):
+        stacked = getattr(self, 'stacked_', None)
+        if stacked is None:
+            stacked = self._stack()
+        return stacked
+
+    def predict_log_likelihood(self, X):
+        log_likelihood = self._stacked().score(X)
+        return log_likelihood[:, :len(self.estimators_)]
+
+    def _uncalibrated_scores(self, X):
+        return self.predict_log_likelihood(X)
+
+    # -- (CALIBRATED) LOG-LIKELIHOOD RATIOS -----------------------------------
+
+    def predict_log_likelihood_ratio(self, X):
+
+        # log-likelihood ratio cannot be estimated from raw scores
+        # when no calibration was trained
+        if self.calibration is None:
+            raise NotImplementedError('Not supported without calibration')
+
+        scores = self._uncalibrated_scores(X)
+        for i, calibration in enumerate(self.calibrations_):
+            scores[:, i] = calibration.transform(scores[:, i])
+
+        return scores
+
+    # -- POSTERIOR PROBABILITIES ----------------------------------------------
+
+    def predict_log_proba(self, X):
+        """Posterior log-probability"""
+
+        ll_ratio = self.predict_log_likelihood_ratio(X)
+        prior = self.prior_
+
+        if self.open_set_:
+            # append "unknown" prior
+            prior = np.hstack([self.prior_, self.unknown_prior_])
+            # append "unknown" log-likelihood ratio (zeros)
+            zeros = np.zeros((ll_ratio.shape[0], 1))
+            ll_ratio = np.hstack([ll_ratio, zeros])
+
+        if self.equal_priors:
+            prior = np.ones(prior.shape) / len(prior)
+
+        posterior = ((np.log(prior) + ll_ratio).T -
+                     logsumexp(ll_ratio, b=prior, axis=1)).T
+
+        if self.open_set_:
+            # remove dimension of unknown prior
+            posterior = posterior[:, :-1]
+
+        return posterior
+
+    def predict_proba(self, X):
+        """Posterior probability"""
+
+        return np.exp(self.predict_log_proba(X))
+
+    # -------------------------------------------------------------------------
+
+    def predict(self, X):
+
+        # when no calibration was trained
+        # use raw log-likelihood to perform prediction
+        if self.calibration is None:
+            return np.argmax(self.predict_log_likelihood(X), axis=1)
+
+        # otherwise, calibrate them into actual posterior probability
+        # before taking the decision
+
+        n = X.shape[0]
+        y = -np.ones((X.shape[0],), dtype=float)
+
+        posterior = self.predict_proba(X)
+
+        unknown_posterior = 1. - np.sum(posterior, axis=1)
+
+        argmaxima = np.argmax(posterior, axis=1)
+
+        maxima = posterior[list(range(n)), argmaxima]
+        known = maxima > unknown_posterior
+
+        y[known] = argmaxima[known]
+
+        return y
+
+
+class BaseSKLearnGMMUBMClassification(BaseSKLearnGMMClassification):
+    """Prediction part of SKLearnGMMUBMClassification"""
+
+    # -- EXPORT / IMPORT ------------------------------------------------------
+
+    def _to_arrays(self):
+        arrays = super(BaseSKLearnGMMUBMClassification, self)._to_arrays()
+        arrays.update(_mixtures_to_arrays([self.ubm_], prefix='ubm_'))
+        arrays.update(top_components=self.top_components or 0)
+        return arrays
+
+    def _from_arrays(self, arrays):
+        super(BaseSKLearnGMMUBMClassification, self)._from_arrays(arrays)
+        self.ubm_, = _mixtures_from_arrays(arrays, prefix='ubm_')
+        self.top_components = int(arrays['top_components']) or None
+        return self
+
+    # -- UNCALIBRATED SCORES --------------------------------------------------
+
+    def _scorer(self, estimators):
+
+        # UBM is scored along with class models (as last mixture)
+        if self.top_components is None:
+            return StackedMixtures(list(estimators) + [self.ubm_],
+                                   dtype=self.scoring_dtype)
+
+        # class models are scored on top UBM components
+        return ShortlistedMixtures(
+            self.ubm_, estimators, n_best=self.top_components,
+            dtype=self.scoring_dtype)
+
+    def _uncalibrated_scores(self, X):
+        # should return log-likelihood ratio for each each class
+        # log p(X|i) - log p(X|~i) instead of just log p(X|i)
+        # here it is approximated as log p(X|i) - log p(X|ω)
+        ll = self._stacked().score(X)
+        ll_ratio = ll[:, :-1] - ll[:, -1:]
+        return ll_ratio
+
+    # overrides BaseSKLearnGMMClassification.predict_log_likelihood_ratio
+    # as GMM/UBM raw scores are (kind of) log-likelhood ratio
+    def predict_log_likelihood_ratio(self, X):
+
+        scores = self._uncalibrated_scores(X)
+
+        if self.calibration is None:
+            return scores
+
+        # calibrate raw scores if calibration is available
+        for i, calibration in enumerate(self.calibrations_):
+            scores[:, i] = calibration.transform(scores[:, i])
+
+        return scores
+
+
+class NPZMixin:
+    """Export (and import) trained models to (and from) numpy .npz files
+
+    Subclasses must define `_classifier` (the class of `classifier_` once
+    loaded) and have `classifier_` and `label_converter_` attributes once
+    trained.
+    """
+
+    def save(self, path):
+        """Export trained model
+
+        Mixtures, priors, calibrations (as tables), label mapping (and
+        transitions, for segmentation) are stored as plain numpy arrays
+        in one uncompressed .npz file.
+
+        Parameters
+        ----------
+        path : str or file
+            Path to .npz file.
+        """
+
+        labels = np.array(list(self.label_converter_))
+        if labels.dtype == object:
+            raise ValueError(
+                'Only models with string (or numeric) labels can be saved.')
+
+        arrays = self.classifier_._to_arrays()
+        arrays.update(format=NPZ_FORMAT, model=type(self)._npz_model,
+                      labels=labels)
+
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Import model exported with `save`
+
+        The returned model can only be used for prediction.
+
+        Parameters
+        ----------
+        path : str or file
+            Path to .npz file.
+        """
+
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+
+        if int(arrays['format']) != NPZ_FORMAT:
+            raise ValueError('Unsupported model format.')
+
+        kind = str(arrays['model'])
+        if kind != cls._npz_model:
+            TEMPLATE = 'Cannot load {kind} as {model}.'
+            raise ValueError(TEMPLATE.format(kind=kind, model=cls._npz_model))
+
+        # bypass __init__ as training hyper-parameters are not stored
+        model = cls.__new__(cls)
+        model.classifier_ = cls._classifier()._from_arrays(arrays)
+        model.classifier_._stack()
+        model.calibration = model.classifier_.calibration
+
+        labels = arrays['labels'].tolist()
+        label_converter = LabelConverter()
+        label_converter.open_set_ = model.classifier_.open_set_
+        if label_converter.open_set_:
+            label_converter.labels_ = np.array([None] + labels, dtype=object)
+        else:
+            label_converter.labels_ = np.array(labels)
+        model.label_converter_ = label_converter
+
+        return model
+
+
+class BaseGMMClassification(NPZMixin, SKLearnMixin, object):
+    """Prediction part of GMMClassification"""
+
+    _npz_model = 'GMMClassification'
+    _classifier = BaseSKLearnGMMClassification
+
+    def _as_scores(self, raw, features, segmentation):
+
+        if isinstance(segmentation, Timeline):
+            annotation = Annotation(uri=segmentation.uri)
+            for segment in segmentation:
+                annotation[segment] = '?'
+            segmentation = annotation
+
+        # convert to pyannote-style & aggregate over each segment
+        scores = Scores(uri=segmentation.uri, modality=segmentation.modality,
+                        annotation=segmentation,
+                        labels=list(self.label_converter_))
+
+        sliding_window = features.sliding_window
+
+        for segment, track in segmentation.itertracks():
+
+            # extract raw for all features in segment and aggregate
+            i_start, i_duration = sliding_window.segmentToRange(segment)
+            p = np.mean(raw[i_start:i_start + i_duration, :], axis=0)
+
+            for i, label in enumerate(self.label_converter_):
+                scores[segment, track, label] = p[i]
+
+        return scores
+
+    def score(self, features, segmentation):
+        X = self.X(features)
+        raw = self.classifier_._uncalibrated_scores(X)
+        return self._as_scores(raw, features, segmentation)
+
+    def predict_log_likelihood(self, features, segmentation):
+        X = self.X(features)
+        log_likelihood = self.classifier_.predict_log_likelihood(X)
+        return self._as_scores(log_likelihood, features, segmentation)
+
+    def predict_log_likelihood_ratio(self, features, segmentation):
+        X = self.X(features)
+        llr = self.classifier_.predict_log_likelihood_ratio(X)
+        return self._as_scores(llr, features, segmentation)
+
+    def predict_proba(self, features, segmentation):
+        X = self.X(features)
+        proba = self.classifier_.predict_proba(X)
+        return self._as_scores(proba, features, segmentation)
+
+    def predict(self, features, segmentation):
+
+        # when no calibration was trained
+        # use raw log-likelihood to perform prediction
+        if self.calibration is None:
+            scores = self.predict_log_likelihood(features, segmentation)
+            return scores.to_annotation(posterior=False)
+
+        # otherwise, calibrate them into actual posterior probability
+        # before taking the decision
+        scores = self.predict_proba(features, segmentation)
+        return scores.to_annotation(posterior=True)
+
+
+class BaseGMMUBMClassification(BaseGMMClassification):
+    """Prediction part of GMMUBMClassification"""
+
+    _npz_model = 'GMMUBMClassification'
+    _classifier = BaseSKLearnGMMUBMClassification
+
+    def predict(self, features, segmentation):
+
+        scores = self.predict_proba(features, segmentation)
+        return scores.to_annotation(posterior=True)
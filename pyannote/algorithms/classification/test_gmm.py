@@ -26,12 +26,22 @@
 # AUTHORS
 # Hervé BREDIN - http://herve.niderb.fr
 
+import io
+import copy
+import os
+import shutil
+import tempfile
+import numpy as np
+from pyannote.core import Annotation, Segment
+from pyannote.core import SlidingWindow, SlidingWindowFeature
 from .gmm import SKLearnGMMClassification, SKLearnGMMUBMClassification
+from .gmm import GMMClassification, GMMUBMClassification
+from ..utils.sklearn import LabelConverter
 
 
 class Test_GMMClassification:
 
-    def setup(self):
+    def setup_method(self):
 
         from sklearn.datasets import load_digits
         dataset = load_digits(n_class=10)
@@ -54,8 +64,294 @@ class Test_GMMClassification:
         gmm.fit(self.trnX, self.trny)
         assert gmm.score(self.tstX, self.tsty) > 0.85
 
+    def test_map_adaptation(self):
+
+        gmm = SKLearnGMMUBMClassification(
+            n_components=8, random_state=0, relevance_factor=16.,
+            adapt_params='wm', n_jobs=2)
+        gmm.fit(self.trnX, self.trny)
+        assert gmm.score(self.tstX, self.tsty) > 0.85
+
+        # MAP adaptation of a class only depends on its own samples,
+        # so enrolled classes are the same as with a full fit
+        known = self.trny < 5
+        incremental = SKLearnGMMUBMClassification(
+            n_components=8, random_state=0, relevance_factor=16.,
+            adapt_params='wm', n_jobs=2, precomputed_ubm=gmm.ubm_)
+        incremental.fit(self.trnX[known], self.trny[known])
+        incremental.add_classes(self.trnX, self.trny)
+        for expected, enrolled in zip(gmm.estimators_,
+                                      incremental.estimators_):
+            np.testing.assert_allclose(enrolled.weights_, expected.weights_)
+            np.testing.assert_allclose(enrolled.means_, expected.means_)
+        assert np.all(incremental.predict(self.tstX) ==
+                      gmm.predict(self.tstX))
+
     def test_isotonic(self):
         gmm = SKLearnGMMUBMClassification(n_components=8,
                                           calibration='isotonic')
         gmm.fit(self.trnX, self.trny)
         assert gmm.score(self.tstX, self.tsty) > 0.85
+
+    def test_add_classes(self):
+
+        gmm = SKLearnGMMUBMClassification(n_components=8, random_state=0)
+        gmm.fit(self.trnX, self.trny)
+
+        # enroll classes 5 to 9 from the same UBM
+        known = self.trny < 5
+        incremental = SKLearnGMMUBMClassification(
+            n_components=8, random_state=0, precomputed_ubm=gmm.ubm_)
+        incremental.fit(self.trnX[known], self.trny[known])
+        incremental.add_classes(self.trnX, self.trny)
+        assert list(incremental.classes_) == list(range(10))
+        assert incremental.score(self.tstX, self.tsty) == \
+            gmm.score(self.tstX, self.tsty)
+
+        # remove classes 0 to 4
+        incremental.remove_classes(range(5))
+        known = self.tsty >= 5
+        assert incremental.score(self.tstX[known], self.tsty[known] - 5) > 0.85
+
+    def test_save_load(self):
+
+        for model, classifier, calibration in [
+                (GMMClassification, SKLearnGMMClassification, None),
+                (GMMClassification, SKLearnGMMClassification, 'naive_bayes'),
+                (GMMUBMClassification, SKLearnGMMUBMClassification,
+                 'isotonic')]:
+
+            trained = model(calibration=calibration)
+            trained.classifier_ = classifier(
+                n_components=8, calibration=calibration)
+            trained.classifier_.fit(self.trnX, self.trny)
+            trained.label_converter_ = LabelConverter().fit(
+                ['digit{0}'.format(i) for i in range(10)])
+
+            f = io.BytesIO()
+            trained.save(f)
+            f.seek(0)
+            loaded = model.load(f)
+
+            assert list(loaded.label_converter_) == \
+                list(trained.label_converter_)
+
+            assert np.all(loaded.classifier_.predict(self.tstX) ==
+                          trained.classifier_.predict(self.tstX))
+
+            if calibration is not None:
+                np.testing.assert_allclose(
+                    loaded.classifier_.predict_proba(self.tstX),
+                    trained.classifier_.predict_proba(self.tstX),
+                    atol=1e-6)
+
+
+def get_data(n_turns=12, speakers=(0, 1, 2), dimension=5, seed=0):
+
+    # same speakers in all files
+    centers = 4 * np.random.RandomState(0).randn(10, dimension)
+
+    random_state = np.random.RandomState(seed)
+    sliding_window = SlidingWindow(duration=0.02, step=0.01, start=0.)
+
+    X = []
+    annotation = Annotation(uri='test')
+    t = 0
+    for i in range(n_turns):
+        speaker = speakers[i % len(speakers)]
+        n_samples = random_state.randint(100, 200)
+        X.append(centers[speaker] + random_state.randn(n_samples, dimension))
+        annotation[sliding_window.rangeToSegment(t, n_samples)] = \
+            'speaker{0}'.format(speaker)
+        t += n_samples
+
+    features = SlidingWindowFeature(np.vstack(X), sliding_window)
+    return features, annotation
+
+
+def test_fit_store():
+
+    store_dir = tempfile.mkdtemp()
+
+    try:
+
+        # (speakers are so far apart that adapting weights is needed
+        # for adapted models to differ from the UBM)
+        for model in [GMMClassification(n_components=2, store_dir=store_dir),
+                      GMMUBMClassification(n_components=4, adapt_params='wm',
+                                           store_dir=store_dir)]:
+
+            features_iter, annotation_iter = zip(
+                *[get_data(seed=seed) for seed in range(2)])
+            model.fit(features_iter, annotation_iter)
+
+            # temporary frame store is removed once trained
+            assert os.listdir(store_dir) == []
+
+            assert list(model.label_converter_) == \
+                ['speaker0', 'speaker1', 'speaker2']
+
+            # (frames of both files were used for training)
+            assert np.sum(model.classifier_.counts_) == \
+                sum(len(model.Xy(f, a)[0])
+                    for f, a in zip(features_iter, annotation_iter))
+
+            X, y = model.Xy(features_iter[0], annotation_iter[0])
+            y = model.label_converter_.transform(y)
+            assert np.mean(model.classifier_.predict(X) == y) > 0.9
+
+    finally:
+        shutil.rmtree(store_dir)
+
+
+def test_add_remove_targets():
+
+    model = GMMUBMClassification(n_components=4, adapt_params='wm')
+
+    # speaker1 is already known when speaker3 gets enrolled
+    first = get_data(speakers=(0, 1), seed=0)
+    second = get_data(speakers=(3, 1), seed=1)
+    third = get_data(speakers=(2, ), seed=2)
+
+    # first call to partial_fit trains the UBM...
+    model.partial_fit(*zip(first))
+    assert list(model.label_converter_) == ['speaker0', 'speaker1']
+
+    # ... next ones enroll new targets
+    model.add_targets(*zip(second))
+    model.partial_fit(*zip(third))
+    assert list(model.label_converter_) == \
+        ['speaker0', 'speaker1', 'speaker3', 'speaker2']
+
+    # priors are proportional to the number of frames of each target
+    # (frames of already known targets are not counted twice)
+    counts = {}
+    for features, annotation in [first, second, third]:
+        _, y = model.Xy(features, annotation)
+        for label in set(y):
+            counts.setdefault(label, y.count(label))
+    expected = np.array([counts[label] for label in model.label_converter_])
+    np.testing.assert_allclose(model.classifier_.prior_,
+                               expected / np.sum(expected))
+
+    X, y = model.Xy(*get_data(speakers=(0, 1, 2, 3), seed=3))
+    predicted = model.label_converter_.inverse_transform(
+        model.classifier_.predict(X))
+    assert np.mean(predicted == np.array(y)) > 0.9
+
+    model.remove_targets(['speaker1'])
+    assert list(model.label_converter_) == \
+        ['speaker0', 'speaker3', 'speaker2']
+    expected = np.array([counts[label] for label in model.label_converter_])
+    np.testing.assert_allclose(model.classifier_.prior_,
+                               expected / np.sum(expected))
+
+    X, y = model.Xy(*get_data(speakers=(0, 2, 3), seed=4))
+    predicted = model.label_converter_.inverse_transform(
+        model.classifier_.predict(X))
+    assert np.mean(predicted == np.array(y)) > 0.9
+
+    # removed (hence unknown) targets cannot be converted
+    try:
+        model.label_converter_.transform(['speaker1'])
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('KeyError not raised')
+
+
+def test_scoring_dtype():
+
+    features, annotation = get_data(seed=0)
+
+    for model in [GMMClassification(n_components=4, scoring_dtype='float32'),
+                  GMMUBMClassification(n_components=4, adapt_params='wm',
+                                       scoring_dtype='float32')]:
+
+        model.fit([features], [annotation])
+
+        # same mixtures, scored in double precision
+        reference = copy.deepcopy(model.classifier_)
+        reference.scoring_dtype = 'float64'
+        reference._stack()
+
+        X, _ = model.Xy(*get_data(seed=1))
+        log_likelihood = model.classifier_.predict_log_likelihood(X)
+        expected = reference.predict_log_likelihood(X)
+        np.testing.assert_allclose(log_likelihood, expected, atol=1e-3)
+        assert not np.array_equal(log_likelihood, expected)
+        assert np.all(model.classifier_.predict(X) == reference.predict(X))
+
+        # scoring precision is saved along with the model
+        f = io.BytesIO()
+        model.save(f)
+        f.seek(0)
+        loaded = model.load(f)
+        assert loaded.classifier_.scoring_dtype == 'float32'
+        np.testing.assert_array_equal(
+            loaded.classifier_.predict_log_likelihood(X), log_likelihood)
+
+
+def test_top_components():
+
+    features, annotation = get_data(seed=0)
+    X, y = GMMUBMClassification().Xy(*get_data(seed=1))
+
+    exhaustive = GMMUBMClassification(n_components=4, random_state=0)
+    exhaustive.fit([features], [annotation])
+    expected = exhaustive.classifier_.predict_log_likelihood(X)
+
+    # selecting all UBM components is exact
+    shortlisted = GMMUBMClassification(n_components=4, random_state=0,
+                                       top_components=4)
+    shortlisted.fit([features], [annotation])
+    np.testing.assert_allclose(
+        shortlisted.classifier_.predict_log_likelihood(X), expected)
+    assert np.all(shortlisted.classifier_.predict(X) ==
+                  exhaustive.classifier_.predict(X))
+
+    # Gaussian selection only applies to mean-only adaptation
+    # of diagonal covariances
+    for kwargs in [dict(adapt_params='wm'),
+                   dict(covariance_type='full')]:
+        gmm = SKLearnGMMUBMClassification(n_components=4, random_state=0,
+                                          top_components=2, **kwargs)
+        try:
+            gmm.fit(X, exhaustive.label_converter_.transform(y))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
+
+
+
+def test_map_add_targets():
+
+    first = get_data(speakers=(0, 1), seed=0)
+    second = get_data(speakers=(2, 1), seed=1)
+
+    model = GMMUBMClassification(n_components=4, random_state=0,
+                                 relevance_factor=16., adapt_params='wm')
+    model.fit(*zip(first, second))
+
+    # speaker2 enrolled afterwards from the same UBM
+    incremental = GMMUBMClassification(
+        n_components=4, relevance_factor=16., adapt_params='wm',
+        precomputed_ubm=model.classifier_.ubm_)
+    incremental.fit(*zip(first))
+    incremental.add_targets(*zip(second))
+    assert list(incremental.label_converter_) == \
+        list(model.label_converter_)
+
+    # speaker1 also appears in the second file, hence the full fit differs
+    # for speaker1 only
+    for label in ['speaker0', 'speaker2']:
+        k = model.label_converter_.mapping()[label]
+        np.testing.assert_allclose(
+            incremental.classifier_.estimators_[k].means_,
+            model.classifier_.estimators_[k].means_)
+
+    X, y = model.Xy(*get_data(speakers=(0, 1, 2), seed=2))
+    predicted = incremental.label_converter_.inverse_transform(
+        incremental.classifier_.predict(X))
+    assert np.mean(predicted == np.array(y)) > 0.9
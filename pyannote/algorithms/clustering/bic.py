@@ -30,6 +30,9 @@ from .hac import HierarchicalAgglomerativeClustering
 from .hac import HACModel
 from .hac.stop import SimilarityThreshold
 from pyannote.algorithms.stats.gaussian import Gaussian
+from pyannote.algorithms.stats.gaussian import GaussianStatistics
+from pyannote.algorithms.stats.gaussian import bayesianInformationCriterion
+from pyannote.algorithms.utils.crop import crop, crop_views
 import numpy as np
 import logging
 
@@ -43,23 +46,59 @@ class BICModel(HACModel):
 
     def compute_model(self, cluster, parent=None):
         timeline = parent.current_state.label_timeline(cluster)
-        data = parent.features.crop(timeline)
-        gaussian = Gaussian(covariance_type=self.covariance_type)
-        gaussian.fit(data)
-        return gaussian
+        # sum statistics of contiguous chunks of frames rather than copying
+        # all of them into one array
+        gaussian = GaussianStatistics.stack(
+            GaussianStatistics(covariance_type=self.covariance_type).fit(data)
+            for data in crop_views(parent.features, timeline)).sum()
+        # log-determinant is needed anyway and is then reused when stacking
+        return gaussian.precompute()
 
     def compute_merged_model(self, clusters, parent=None):
-        gaussian = self[clusters[0]]
-        for cluster in clusters[1:]:
-            other_gaussian = self[cluster]
-            gaussian = gaussian.merge(other_gaussian)
-        return gaussian
+        # merging sufficient statistics is a simple sum
+        gaussians = GaussianStatistics.stack(
+            self[cluster] for cluster in clusters)
+        return gaussians.sum()
 
     def compute_similarity(self, cluster1, cluster2, parent=None):
         gaussian1 = self[cluster1]
         gaussian2 = self[cluster2]
         delta_bic, _ = gaussian1.bic(gaussian2, penalty_coef=self.penalty_coef)
-        return -delta_bic
+        return -delta_bic.item()
+
+    def compute_similarities(self, cluster, clusters, parent=None):
+
+        # all merges at once
+        gaussians = GaussianStatistics.stack(self[c] for c in clusters)
+        delta_bic = bayesianInformationCriterion(
+            self[cluster], gaussians, penalty_coef=self.penalty_coef)
+
+        similarities = dict()
+        for other_cluster, similarity in zip(clusters, (-delta_bic).tolist()):
+            similarities[cluster, other_cluster] = similarity
+            similarities[other_cluster, cluster] = similarity
+
+        return similarities
+
+    def compute_similarity_matrix(self, parent=None):
+
+        clusters = parent.current_state.labels()
+        n_clusters = len(clusters)
+
+        gaussians = GaussianStatistics.stack(
+            self[cluster] for cluster in clusters)
+
+        similarity = np.empty((n_clusters, n_clusters))
+
+        # one batch of merges per row: cluster i vs. clusters i+1, i+2, ...
+        for i in range(n_clusters - 1):
+            delta_bic = bayesianInformationCriterion(
+                gaussians[i], gaussians[i + 1:],
+                penalty_coef=self.penalty_coef)
+            similarity[i, i + 1:] = -delta_bic
+            similarity[i + 1:, i] = -delta_bic
+
+        return similarity
 
 
 class BICClustering(HierarchicalAgglomerativeClustering):
@@ -69,10 +108,12 @@ class BICClustering(HierarchicalAgglomerativeClustering):
     ----------
     covariance_type : {'diag', 'full'}, optional
     penalty_coef : float, optional
+    backend : {'sorted', 'dense', 'heap'}, optional
+        See HierarchicalAgglomerativeClustering.
     """
 
     def __init__(self, covariance_type='diag', penalty_coef=3.5,
-                 logger=None, force=False):
+                 logger=None, force=False, backend='sorted'):
 
         self.covariance_type = covariance_type
         self.penalty_coef = penalty_coef
@@ -83,7 +124,7 @@ class BICClustering(HierarchicalAgglomerativeClustering):
 
         super(BICClustering, self).__init__(
             model, stopping_criterion=stopping_criterion,
-            logger=logger)
+            logger=logger, backend=backend)
 
 
 class LinearBICClustering(object):
@@ -123,7 +164,7 @@ class LinearBICClustering(object):
 
         for segment, track, label in starting_point.itertracks(label=True):
 
-            data = features.crop(segment)
+            data = crop(features, segment)
             gaussian = Gaussian(covariance_type=self.covariance_type)
             gaussian.fit(data)
 
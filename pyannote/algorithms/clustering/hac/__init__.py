@@ -35,3 +35,4 @@ from .hac import HierarchicalAgglomerativeClustering
 from .model import HACModel
 from .stop import HACStop
 from .constraint import HACConstraint
+from .similarity import HACSimilarity
@@ -31,6 +31,7 @@ from __future__ import unicode_literals
 """Constraints for hierarchical agglomerative clustering"""
 
 
+from itertools import combinations
 from xarray import DataArray
 import numpy as np
 from pyannote.core import Segment
@@ -66,6 +67,36 @@ class HACConstraint(object):
         """
         return True
 
+    def mergeable_matrix(self, clusters, parent=None):
+        """Checks whether clusters can be merged, for all pairs at once
+
+        Parameters
+        ----------
+        clusters : list
+            List of clusters.
+        parent : HierarchicalAgglomerativeClustering, optional
+
+        Returns
+        -------
+        mergeable : (n_clusters, n_clusters) boolean np.ndarray
+            mergeable[i, j] is True if clusters[i] and clusters[j] can be
+            merged, False otherwise.
+        """
+
+        n_clusters = len(clusters)
+        mergeable = np.ones((n_clusters, n_clusters), dtype=bool)
+
+        # no need to check pairs one by one when there is no constraint
+        if type(self).mergeable == HACConstraint.mergeable:
+            return mergeable
+
+        for i, j in combinations(range(n_clusters), 2):
+            mergeable[i, j] = self.mergeable([clusters[i], clusters[j]],
+                                             parent=parent)
+            mergeable[j, i] = mergeable[i, j]
+
+        return mergeable
+
     def update(self, merged_clusters, into, parent=None):
         """(Optionally) update constraints after merge
 
@@ -100,12 +131,24 @@ class EveryConstraint(_CompoundConstraint):
         return all(c.mergeable(clusters, parent=parent)
                    for c in self.constraints)
 
+    def mergeable_matrix(self, clusters, parent=None):
+        mergeable = np.ones((len(clusters), len(clusters)), dtype=bool)
+        for c in self.constraints:
+            mergeable &= c.mergeable_matrix(clusters, parent=parent)
+        return mergeable
+
 
 class AnyConstraint(_CompoundConstraint):
     def mergeable(self, clusters, parent=None):
         return any(c.mergeable(clusters, parent=parent)
                    for c in self.constraints)
 
+    def mergeable_matrix(self, clusters, parent=None):
+        mergeable = np.zeros((len(clusters), len(clusters)), dtype=bool)
+        for c in self.constraints:
+            mergeable |= c.mergeable_matrix(clusters, parent=parent)
+        return mergeable
+
 
 class DoNotCooccur(HACConstraint):
     """Do NOT merge co-occurring face tracks"""
@@ -132,6 +175,10 @@ class DoNotCooccur(HACConstraint):
         clusters = list(clusters)
         return self._cooccur.loc[clusters, clusters].sum().item() == 0.
 
+    def mergeable_matrix(self, clusters, parent=None):
+        clusters = list(clusters)
+        return self._cooccur.loc[clusters, clusters].values == 0.
+
     def update(self, merged_clusters, new_cluster, parent=None):
 
         # clusters that will be removed
@@ -190,3 +237,8 @@ class CloseInTime(HACConstraint):
         return connected_components(
             self._neighbours.loc[clusters, clusters],
             directed=False, return_labels=False) == 1
+
+    def mergeable_matrix(self, clusters, parent=None):
+        # two clusters are connected iff they are direct neighbours
+        clusters = list(clusters)
+        return self._neighbours.loc[clusters, clusters].values > 0
@@ -35,6 +35,7 @@ from .model import HACModel
 from .stop import HACStop
 from .constraint import HACConstraint
 from .history import HACHistory
+from .similarity import SIMILARITY_BACKENDS
 
 
 class HierarchicalAgglomerativeClustering(object):
@@ -49,13 +50,23 @@ class HierarchicalAgglomerativeClustering(object):
     constraint : HACConstraint, optional
         Constraint (not yet implemented)
     logger : optional
+    backend : {'sorted', 'dense', 'heap'}, optional
+        Data structure used to keep track of the most similar clusters.
+        'sorted' (default) relies on a value-sorted dictionary, 'dense' on a
+        dense float32 similarity matrix with per-row maxima (much lower memory
+        footprint for large number of clusters), and 'heap' on a binary heap
+        with lazy deletion.
     """
 
     def __init__(self, model, stopping_criterion=None, constraint=None,
-                 logger=None):
+                 logger=None, backend='sorted'):
 
         super(HierarchicalAgglomerativeClustering, self).__init__()
 
+        if backend not in SIMILARITY_BACKENDS:
+            raise ValueError("Invalid value for backend: %s" % backend)
+        self.backend = backend
+
         assert isinstance(model, HACModel)
         self.model = model
 
@@ -79,8 +90,23 @@ class HierarchicalAgglomerativeClustering(object):
     @property
     def current_state(self):
         """Current state"""
+
+        # current state is only materialized when someone actually needs it
+        # (and at most once per iteration) instead of after every merge
+        n = len(self._history)
+        if self._current_state_at != n:
+            mapping = self._history.mapping(n)
+            self._current_state = self._history.starting_point.rename_labels(
+                mapping=mapping, copy=True)
+            self._current_state_at = n
+
         return self._current_state
 
+    @property
+    def similarity_backend(self):
+        """Similarity queue class"""
+        return SIMILARITY_BACKENDS[self.backend]
+
     @property
     def features(self):
         """Features"""
@@ -104,6 +130,7 @@ class HierarchicalAgglomerativeClustering(object):
 
         # initialize current status at starting point
         self._current_state = starting_point.copy()
+        self._current_state_at = 0
 
         # store features
         self._features = features
@@ -157,11 +184,8 @@ class HierarchicalAgglomerativeClustering(object):
 
             into = clusters[0]
 
-            # == update annotation (rename merged clusters)
-            mapping = {cluster: into for cluster in clusters}
-            self._current_state = self._current_state.rename_labels(mapping=mapping, copy=True)
-
             # == update history (keep track of this iteration)
+            # (this also lazily updates current state)
             self._history.add_iteration(
                 clusters, similarity, into)
 
@@ -183,7 +207,7 @@ class HierarchicalAgglomerativeClustering(object):
                 self.logger.debug(msg)
                 break
 
-            yield self._current_state
+            yield self._history.last_iteration()
 
     def __call__(self, starting_point, features=None, callback=None):
         """
@@ -201,7 +225,7 @@ class HierarchicalAgglomerativeClustering(object):
 
         self._initialize(starting_point, features=features)
 
-        for i, current_state in enumerate(self._iterate()):
+        for i, iteration in enumerate(self._iterate()):
             if callback is None:
                 continue
             callback(i, self)
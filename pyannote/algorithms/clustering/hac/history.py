@@ -25,8 +25,8 @@
 
 from __future__ import unicode_literals
 
+import numpy as np
 from collections import namedtuple
-from networkx import DiGraph, connected_components, topological_sort
 
 class HACIteration(
     namedtuple('HACIteration',
@@ -69,6 +69,12 @@ class HACHistory(object):
         else:
             self.iterations = iterations
 
+        # dendrogram stored as parent pointers
+        # _merged[cluster1] = (n, cluster2) means cluster1 was merged into
+        # cluster2 and therefore no longer exists after n iterations
+        self._merged = {}
+        self._n_indexed = 0
+
     def __len__(self):
         return len(self.iterations)
 
@@ -143,34 +149,163 @@ class HACHistory(object):
         if n < 0:
             n = len(self) + 1 + n
 
-        # dendrogram stored as directed graph
-        # cluster1 --> cluster2 means cluster1 was merged into cluster2
-        g = DiGraph()
+        return self.starting_point.rename_labels(
+            mapping=self.mapping(n), copy=True)
+
+    def _index(self):
+        """Update parent pointers with iterations added since last call"""
+
+        for i, iteration in enumerate(self.iterations[self._n_indexed:],
+                                      start=self._n_indexed):
+            for cluster in iteration.merge:
+                if cluster == iteration.into:
+                    continue
+                self._merged[cluster] = (i + 1, iteration.into)
+
+        self._n_indexed = len(self.iterations)
+
+    def mapping(self, n):
+        """Get cluster mapping after `n` iterations
+
+        Parameters
+        ----------
+        n : int
+            Number of iterations
+
+        Returns
+        -------
+        mapping : dict
+            Maps every cluster merged during the first `n` iterations to the
+            cluster it belongs to after `n` iterations.
+
+        """
+
+        if n < 0:
+            n = len(self) + 1 + n
+
+        self._index()
 
         # i = 0 ==> starting point
         # i = 1 ==> after first iteration
         # i = 2 ==> aftr second iterations
         # ... etc ...
 
+        mapping = {}
+
+        for cluster in self._merged:
+
+            # follow parent pointers up to the cluster that still exists
+            # after n iterations (or up to an already resolved cluster)
+            path = []
+            current = cluster
+            while current not in mapping:
+                merged_at, into = self._merged.get(current, (None, None))
+                if merged_at is None or merged_at > n:
+                    break
+                path.append(current)
+                current = into
+
+            root = mapping.get(current, current)
+
+            # path compression
+            for current in path:
+                mapping[current] = root
+
+        return mapping
+
+    def n_iterations(self, threshold):
+        """Get number of iterations before similarity goes below threshold
+
+        Parameters
+        ----------
+        threshold : float or iterable
+            Similarity threshold(s).
+
+        Returns
+        -------
+        n : int or np.ndarray
+            Number of iterations preceding the first iteration whose
+            similarity is lower than `threshold`.
+        """
+
+        similarity = np.array([i.similarity for i in self.iterations])
+
+        # first iteration below threshold is also the first one whose
+        # running minimum similarity is below threshold
+        running_min = np.minimum.accumulate(similarity)
+        return np.searchsorted(-running_min, -np.array(threshold),
+                               side='right')
+
+    def sweep(self, thresholds):
+        """Get clustering status for many similarity thresholds at once
+
+        This is meant to be used after a complete run and returns the same
+        result as SimilarityThreshold(threshold=threshold, force=True) for
+        each threshold. Use -threshold for DistanceThreshold.
+
+        Parameters
+        ----------
+        thresholds : iterable
+            Similarity thresholds
+
+        Returns
+        -------
+        annotations : list
+            Clustering status for each threshold
+
+        """
+        return [self[n] for n in self.n_iterations(list(thresholds))]
+
+    def to_linkage(self, transform=None):
+        """Export history as a scipy-compatible linkage matrix
+
+        Original clusters are numbered following `starting_point.labels()`
+        order, and the cluster resulting from the ith iteration is numbered
+        n_clusters + i.
+
+        Parameters
+        ----------
+        transform : callable, optional
+            Converts similarities into distances. Defaults to -similarity.
+
+        Returns
+        -------
+        Z : (n_clusters - 1, 4) np.ndarray
+            See scipy.cluster.hierarchy.linkage
+        """
+
+        if transform is None:
+            transform = np.negative
+
+        clusters = self.starting_point.labels()
+        n_clusters = len(clusters)
+
+        if len(self) != n_clusters - 1:
+            msg = ("Cannot export an incomplete dendrogram "
+                   "(%d iterations for %d clusters).")
+            raise ValueError(msg % (len(self), n_clusters))
+
+        index = {cluster: i for i, cluster in enumerate(clusters)}
+        size = {cluster: 1 for cluster in clusters}
+
+        Z = np.empty((n_clusters - 1, 4), dtype=float)
+
         for i, iteration in enumerate(self.iterations):
-            if i+1 > n:
-                break
-            for cluster in iteration.merge:
-                if cluster == iteration.into:
-                    continue
-                g.add_edge(cluster, iteration.into)
 
-        # any cluster is mapped to the last cluster in its topologically
-        # ordered connected component
-        mapping = {}
-        for clusters in connected_components(g.to_undirected()):
-            klusters = list(reversed(list(
-                topological_sort(g.subgraph(clusters)))))
-            for cluster in klusters[1:]:
-                mapping[cluster] = klusters[0]
-
-        # actual mapping
-        return self.starting_point.rename_labels(mapping=mapping, copy=True)
+            if len(iteration.merge) != 2:
+                raise ValueError(
+                    "Linkage matrix only supports two-by-two merges.")
+
+            cluster1, cluster2 = iteration.merge
+            Z[i, 0] = min(index[cluster1], index[cluster2])
+            Z[i, 1] = max(index[cluster1], index[cluster2])
+            Z[i, 2] = transform(iteration.similarity)
+            Z[i, 3] = size[cluster1] + size[cluster2]
+
+            index[iteration.into] = n_clusters + i
+            size[iteration.into] = Z[i, 3]
+
+        return Z
 
     def __iter__(self):
         """"""
@@ -29,11 +29,13 @@
 
 from __future__ import unicode_literals
 
+import logging
 import itertools
 import numpy as np
 from pyannote.algorithms.clustering.hac.hac import HierarchicalAgglomerativeClustering
 from pyannote.algorithms.clustering.hac.model import HACModel
 from pyannote.algorithms.clustering.hac.stop import SimilarityThreshold
+from pyannote.algorithms.clustering.hac.history import HACHistory
 
 
 class _LinkageModel(HACModel):
@@ -126,3 +128,187 @@ class SingleLinkageClustering(HierarchicalAgglomerativeClustering):
         """
         return super(SingleLinkageClustering, self).__call__(
             starting_point, features=precomputed, callback=callback)
+
+
+class NearestNeighborChainClustering(object):
+    """Fast hierarchical agglomerative clustering for reducible linkages
+
+    Relies on the nearest-neighbor chain algorithm and Lance-Williams updates
+    of the similarity matrix, so that the complete dendrogram is obtained in
+    O(n^2) time and memory (instead of O(n^3) for the generic implementation).
+
+    Parameters
+    ----------
+    linkage : {'complete', 'average', 'single'}, optional
+        Defaults to 'average'.
+    threshold : float, optional
+        Stop merging when similarity goes below this threshold.
+        Defaults to 0.
+    force : bool, optional
+        Keep track of the complete dendrogram in `history` anyway.
+        Returned clustering is the same in both cases.
+        Defaults to False.
+    logger : optional
+    """
+
+    LINKAGES = ['complete', 'average', 'single']
+
+    def __init__(self, linkage='average', threshold=0.0, force=False,
+                 logger=None):
+
+        super(NearestNeighborChainClustering, self).__init__()
+
+        if linkage not in self.LINKAGES:
+            raise ValueError("Invalid value for linkage: %s" % linkage)
+        self.linkage = linkage
+
+        self.stopping_criterion = SimilarityThreshold(
+            threshold=threshold, force=force)
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+
+    @property
+    def history(self):
+        """History"""
+        return self._history
+
+    def _similarity_matrix(self, clusters, precomputed):
+        """Convert (cluster1, cluster2)-indexed similarity to a matrix"""
+
+        if isinstance(precomputed, np.ndarray):
+            return np.array(precomputed, dtype=float)
+
+        index = {cluster: i for i, cluster in enumerate(clusters)}
+        n_clusters = len(clusters)
+
+        # missing pairs cannot be merged
+        matrix = np.full((n_clusters, n_clusters), -np.inf)
+        for (cluster1, cluster2), similarity in precomputed.items():
+            if cluster1 in index and cluster2 in index:
+                matrix[index[cluster1], index[cluster2]] = similarity
+
+        return matrix
+
+    def _merges(self, matrix):
+        """Nearest-neighbor chain algorithm
+
+        Parameters
+        ----------
+        matrix : (n, n) np.ndarray
+            Symmetric similarity matrix. It is modified in place.
+
+        Returns
+        -------
+        merges : list
+            List of (i, j, similarity) tuples where j is merged into i,
+            in decreasing order of similarity.
+        """
+
+        n_clusters = len(matrix)
+        np.fill_diagonal(matrix, -np.inf)
+
+        size = np.ones((n_clusters, ), dtype=float)
+        active = np.ones((n_clusters, ), dtype=bool)
+
+        merges = []
+        chain = []
+
+        for _ in range(n_clusters - 1):
+
+            if not chain:
+                chain.append(np.flatnonzero(active)[0])
+
+            while True:
+
+                a = chain[-1]
+                similarity = np.where(active, matrix[a], -np.inf)
+                b = np.argmax(similarity)
+
+                # prefer previous cluster in chain in case of ties
+                if len(chain) > 1 and similarity[chain[-2]] == similarity[b]:
+                    b = chain[-2]
+
+                # when there is nothing left to merge with `a`,
+                # any other active cluster will do
+                if b == a or not active[b]:
+                    others = active & (np.arange(n_clusters) != a)
+                    b = np.flatnonzero(others)[0]
+
+                # reciprocal nearest neighbors
+                if len(chain) > 1 and b == chain[-2]:
+                    break
+
+                chain.append(b)
+
+            chain = chain[:-2]
+
+            i, j = min(a, b), max(a, b)
+            s = matrix[i, j]
+            merges.append((i, j, s))
+
+            # Lance-Williams update
+            if self.linkage == 'complete':
+                updated = np.minimum(matrix[i], matrix[j])
+            elif self.linkage == 'single':
+                updated = np.maximum(matrix[i], matrix[j])
+            elif self.linkage == 'average':
+                updated = (size[i] * matrix[i] + size[j] * matrix[j]) \
+                    / (size[i] + size[j])
+
+            # reducibility guarantees that merged cluster is not more similar
+            # to any other cluster (this only fixes rounding errors)
+            updated = np.minimum(updated, s)
+
+            matrix[i, :] = updated
+            matrix[:, i] = updated
+            matrix[i, i] = -np.inf
+
+            size[i] += size[j]
+            active[j] = False
+
+        # sort merges in decreasing order of similarity
+        # (stable sort keeps merges in dependency order in case of ties)
+        order = np.argsort([-s for _, _, s in merges], kind='mergesort')
+        return [merges[k] for k in order]
+
+    def __call__(self, starting_point, precomputed):
+        """
+
+        Parameters
+        ----------
+        starting_point : Annotation
+        precomputed : ValueSortedDict or np.ndarray
+            Precomputed cluster similarity matrix. When provided as an array,
+            rows and columns follow the order of `starting_point.labels()`.
+
+        Returns
+        -------
+        clustering : Annotation
+        """
+
+        # if starting point is empty, there is nothing to do.
+        if not starting_point:
+            return starting_point
+
+        clusters = starting_point.labels()
+        matrix = self._similarity_matrix(clusters, precomputed)
+
+        self._history = HACHistory(starting_point)
+        self.stopping_criterion.initialize(parent=self)
+
+        for i, j, similarity in self._merges(matrix):
+
+            # nothing left to merge
+            if similarity == -np.inf:
+                break
+
+            merge = (clusters[i], clusters[j])
+            self._history.add_iteration(merge, similarity, clusters[i])
+
+            if self.stopping_criterion.reached(parent=self):
+                break
+
+        return self.stopping_criterion.finalize(parent=self)
@@ -28,8 +28,7 @@ from __future__ import unicode_literals
 """Models for hierarchical agglomerative clustering"""
 
 import numpy as np
-from itertools import combinations, product
-from sortedcollections import ValueSortedDict
+from itertools import combinations
 
 
 class HACModel(object):
@@ -44,7 +43,7 @@ class HACModel(object):
     Attributes
     ----------
 
-    _similarity : ValueSortedDict
+    _similarity : HACSimilarity
     _models : dict
 
     """
@@ -90,42 +89,73 @@ class HACModel(object):
     # N vs. N similarity
 
     def compute_similarity_matrix(self, parent=None):
+        """Compute similarity between all pairs of clusters at once
+
+        Parameters
+        ----------
+        parent : HierarchicalAgglomerativeClustering, optional
+
+        Returns
+        -------
+        similarity : (n_clusters, n_clusters) np.ndarray or ValueSortedDict
+            Similarity matrix, whose rows and columns follow the order of
+            `parent.current_state.labels()`. Diagonal is ignored.
+            For backward compatibility, a ValueSortedDict indexed by
+            (cluster1, cluster2) tuples is also accepted.
+        """
         raise NotImplementedError('')
 
     def initialize(self, parent=None):
 
+        # list of clusters
+        clusters = parent.current_state.labels()
+
         # one model per cluster in current_state
         self._models = {}
-        for cluster in parent.current_state.labels():
+        for cluster in clusters:
             self._models[cluster] = self.compute_model(cluster, parent=parent)
 
-        # list of clusters
-        clusters = list(self._models)
+        self._similarity = parent.similarity_backend(clusters)
 
         try:
-            self._similarity = self.compute_similarity_matrix(parent=parent)
+            similarity = self.compute_similarity_matrix(parent=parent)
 
         except NotImplementedError as e:
 
-            n_clusters = len(clusters)
-
-            self._similarity = ValueSortedDict()
+            similarities = dict()
 
             for i, j in combinations(clusters, 2):
 
                 # compute similarity if (and only if) clusters are mergeable
                 if not parent.constraint.mergeable([i, j], parent=parent):
-                    self._similarity[i, j] = -np.inf
-                    self._similarity[j, i] = -np.inf
+                    similarities[i, j] = -np.inf
+                    similarities[j, i] = -np.inf
                     continue
 
                 similarity = self.compute_similarity(i, j, parent=parent)
-                self._similarity[i, j] = similarity
+                similarities[i, j] = similarity
 
                 if not self.is_symmetric:
                     similarity = self.compute_similarity(j, i, parent=parent)
 
-                self._similarity[j, i] = similarity
+                similarities[j, i] = similarity
+
+            self._similarity.update(similarities)
+            return
+
+        # all at once (when available)
+        if isinstance(similarity, np.ndarray):
+            # pairs that cannot be merged are given -inf similarity
+            mergeable = parent.constraint.mergeable_matrix(
+                clusters, parent=parent)
+            similarity = np.where(mergeable, similarity, -np.inf)
+            self._similarity.fill(clusters, similarity)
+
+        # backward compatibility with (cluster1, cluster2)-indexed similarity
+        else:
+            self._similarity.update({
+                (i, j): s for (i, j), s in similarity.items()
+                if i in self._models and j in self._models and i != j})
 
     # NOTE - for now this (get_candidates / block) combination assumes
     # that we merge clusters two-by-two...
@@ -138,7 +168,7 @@ class HACModel(object):
         similarity : float
 
         """
-        return self._similarity.peekitem(index=-1)
+        return self._similarity.peekitem()
 
     def block(self, clusters, parent=None):
         if len(clusters) > 2:
@@ -159,10 +189,7 @@ class HACModel(object):
         removed_clusters = list(set(merged_clusters) - set([into]))
         for cluster in removed_clusters:
             del self._models[cluster]
-
-        for i, j in product(removed_clusters, self._models):
-            self._similarity.pop((i, j), default=None)
-            self._similarity.pop((j, i), default=None)
+            self._similarity.remove(cluster)
 
         # compute new similarities
         # * all at once if model implements compute_similarities
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+from __future__ import unicode_literals
+
+"""Similarity queues for hierarchical agglomerative clustering
+
+A similarity queue stores the similarity of every (ordered) pair of clusters
+and keeps track of the most similar one.
+"""
+
+import heapq
+import itertools
+import numpy as np
+from sortedcollections import ValueSortedDict
+
+
+def _matrix_to_pairs(clusters, matrix):
+    """Convert similarity matrix to lists of pairs and similarities"""
+    n_clusters = len(clusters)
+    I, J = np.nonzero(~np.eye(n_clusters, dtype=bool))
+    pairs = [(clusters[i], clusters[j])
+             for i, j in zip(I.tolist(), J.tolist())]
+    return pairs, matrix[I, J].tolist()
+
+
+class HACSimilarity(object):
+    """Base class for similarity queues
+
+    Parameters
+    ----------
+    clusters : list
+        Initial list of clusters.
+    """
+
+    def __init__(self, clusters):
+        super(HACSimilarity, self).__init__()
+        self._clusters = set(clusters)
+
+    def fill(self, clusters, matrix):
+        """Set similarity of all pairs of clusters at once
+
+        Parameters
+        ----------
+        clusters : list
+            List of clusters.
+        matrix : (n_clusters, n_clusters) np.ndarray
+            Similarity matrix, whose rows and columns follow `clusters` order.
+            Diagonal is ignored.
+        """
+        pairs, similarities = _matrix_to_pairs(clusters, matrix)
+        self.update(dict(zip(pairs, similarities)))
+
+    def __setitem__(self, pair, similarity):
+        self.update({pair: similarity})
+
+    def update(self, similarities):
+        """Set similarity of several pairs of clusters
+
+        Parameters
+        ----------
+        similarities : dict
+            Similarity indexed by (cluster1, cluster2) tuples.
+        """
+        raise NotImplementedError('Missing method update')
+
+    def remove(self, cluster):
+        """Remove all pairs involving `cluster`"""
+        raise NotImplementedError('Missing method remove')
+
+    def peekitem(self):
+        """Get most similar pair of clusters
+
+        Returns
+        -------
+        pair : tuple
+            (cluster1, cluster2) tuple
+        similarity : float
+        """
+        raise NotImplementedError('Missing method peekitem')
+
+
+class SortedSimilarity(HACSimilarity):
+    """Similarity queue based on a ValueSortedDict"""
+
+    def __init__(self, clusters):
+        super(SortedSimilarity, self).__init__(clusters)
+        self._similarity = ValueSortedDict()
+
+    def fill(self, clusters, matrix):
+        # bulk-loading an empty ValueSortedDict only sorts once
+        pairs, similarities = _matrix_to_pairs(clusters, matrix)
+        self._similarity = ValueSortedDict(zip(pairs, similarities))
+
+    def update(self, similarities):
+        self._similarity.update(similarities)
+
+    def remove(self, cluster):
+        self._clusters.discard(cluster)
+        for other in self._clusters:
+            self._similarity.pop((cluster, other), default=None)
+            self._similarity.pop((other, cluster), default=None)
+
+    def peekitem(self):
+        return self._similarity.peekitem(index=-1)
+
+
+class DenseSimilarity(HACSimilarity):
+    """Similarity queue based on a dense similarity matrix
+
+    Keeps track of the most similar cluster of each cluster (i.e. the maximum
+    of each row of the similarity matrix) so that finding the most similar
+    pair is a matter of looking for the maximum among row maxima.
+
+    Parameters
+    ----------
+    clusters : list
+        Initial list of clusters.
+    dtype : np.dtype, optional
+        Defaults to np.float32.
+    """
+
+    def __init__(self, clusters, dtype=np.float32):
+        super(DenseSimilarity, self).__init__(clusters)
+
+        self._labels = list(clusters)
+        self._index = {cluster: i for i, cluster in enumerate(self._labels)}
+
+        n_clusters = len(self._labels)
+        self._matrix = np.full((n_clusters, n_clusters), -np.inf, dtype=dtype)
+        self._active = np.ones((n_clusters, ), dtype=bool)
+        self._argmax = np.zeros((n_clusters, ), dtype=int)
+        self._max = np.full((n_clusters, ), -np.inf, dtype=dtype)
+
+    def _reset_rows(self, rows):
+        """Recompute maxima of rows from scratch"""
+        if len(rows) == 0:
+            return
+        self._argmax[rows] = np.argmax(self._matrix[rows], axis=1)
+        self._max[rows] = self._matrix[rows, self._argmax[rows]]
+
+    def fill(self, clusters, matrix):
+        index = [self._index[cluster] for cluster in clusters]
+        self._matrix[np.ix_(index, index)] = matrix
+        np.fill_diagonal(self._matrix, -np.inf)
+        self._reset_rows(np.arange(len(self._labels)))
+
+    def update(self, similarities):
+
+        if not similarities:
+            return
+
+        pairs, values = zip(*similarities.items())
+        I = np.array([self._index[i] for i, _ in pairs])
+        J = np.array([self._index[j] for _, j in pairs])
+        values = np.array(values, dtype=self._matrix.dtype)
+
+        self._matrix[I, J] = values
+
+        # rows whose maximum was lowered need to be recomputed from scratch
+        lowered = (self._argmax[I] == J) & (values < self._max[I])
+        self._reset_rows(np.unique(I[lowered]))
+
+        # other rows only need to be compared with their best new value
+        order = np.lexsort((values, I))
+        I, J, values = I[order], J[order], values[order]
+        last = np.hstack([I[1:] != I[:-1], [True]])
+        I, J, values = I[last], J[last], values[last]
+        better = values > self._max[I]
+        self._max[I[better]] = values[better]
+        self._argmax[I[better]] = J[better]
+
+    def remove(self, cluster):
+
+        self._clusters.discard(cluster)
+
+        i = self._index[cluster]
+        self._active[i] = False
+        self._matrix[i, :] = -np.inf
+        self._matrix[:, i] = -np.inf
+        self._max[i] = -np.inf
+
+        # rows whose maximum was `cluster` need to be recomputed
+        self._reset_rows(np.flatnonzero(self._argmax == i))
+
+    def peekitem(self):
+
+        i = np.argmax(self._max)
+        similarity = self._max[i]
+
+        # nothing left to merge: return any pair of remaining clusters
+        if similarity == -np.inf:
+            i, j = np.flatnonzero(self._active)[:2]
+        else:
+            j = self._argmax[i]
+
+        pair = (self._labels[i], self._labels[j])
+        return pair, float(similarity)
+
+
+class HeapSimilarity(HACSimilarity):
+    """Similarity queue based on a binary heap with lazy deletion
+
+    Updated or removed pairs are not removed from the heap right away:
+    outdated entries are simply skipped when they reach the top of the heap.
+    """
+
+    def __init__(self, clusters):
+        super(HeapSimilarity, self).__init__(clusters)
+        # (similarity, entry) indexed by (cluster1, cluster2) tuples
+        self._similarity = {}
+        # (-similarity, entry, (cluster1, cluster2)) heap
+        self._heap = []
+        self._entries = itertools.count()
+
+    def _compact(self):
+        """Get rid of outdated heap entries"""
+        self._heap = [(-similarity, entry, pair)
+                      for pair, (similarity, entry)
+                      in self._similarity.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, similarities):
+
+        for pair, similarity in similarities.items():
+            entry = next(self._entries)
+            self._similarity[pair] = (similarity, entry)
+            heapq.heappush(self._heap, (-similarity, entry, pair))
+
+        if len(self._heap) > 2 * len(self._similarity) + 1024:
+            self._compact()
+
+    def fill(self, clusters, matrix):
+        pairs, similarities = _matrix_to_pairs(clusters, matrix)
+        self._similarity = {
+            pair: (similarity, next(self._entries))
+            for pair, similarity in zip(pairs, similarities)}
+        self._compact()
+
+    def remove(self, cluster):
+        self._clusters.discard(cluster)
+        for other in self._clusters:
+            self._similarity.pop((cluster, other), None)
+            self._similarity.pop((other, cluster), None)
+
+    def peekitem(self):
+        while True:
+            _, entry, pair = self._heap[0]
+            similarity, current = self._similarity.get(pair, (None, None))
+            if entry == current:
+                return pair, similarity
+            heapq.heappop(self._heap)
+
+
+SIMILARITY_BACKENDS = {
+    'sorted': SortedSimilarity,
+    'dense': DenseSimilarity,
+    'heap': HeapSimilarity,
+}
@@ -101,6 +101,11 @@ class SimilarityThreshold(HACStop):
         self.threshold = threshold
         self.force = force
 
+    def initialize(self, parent=None):
+        # forget when threshold was reached during a previous run
+        if hasattr(self, '_reached_at'):
+            del self._reached_at
+
     def reached(self, parent=None):
 
         last_iteration = parent.history.last_iteration()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+from pyannote.core import Annotation, Segment
+from .history import HACHistory
+
+
+def get_history():
+
+    annotation = Annotation(uri='test')
+    for i, label in enumerate('ABCDEF'):
+        annotation[Segment(i, i + 1)] = label
+
+    history = HACHistory(annotation)
+    history.add_iteration(('B', 'C'), 0.9, 'B')
+    history.add_iteration(('E', 'D'), 0.8, 'E')
+    history.add_iteration(('A', 'B'), 0.7, 'A')
+    history.add_iteration(('E', 'A'), 0.6, 'E')
+    history.add_iteration(('F', 'E'), 0.5, 'F')
+
+    return history
+
+
+def test_mapping():
+
+    history = get_history()
+    assert history.mapping(0) == {}
+    assert history.mapping(2) == {'C': 'B', 'D': 'E'}
+    assert history.mapping(4) == {'A': 'E', 'B': 'E', 'C': 'E', 'D': 'E'}
+    assert history.mapping(-1) == {c: 'F' for c in 'ABCDE'}
+
+
+def test_getitem():
+
+    history = get_history()
+    for n, expected in enumerate(history):
+        assert history[n] == expected
+        # snapshots are independent copies
+        history[n][Segment(0, 1)] = 'Z'
+        assert history[n] == expected
+        assert history[n - len(history) - 1] == expected
+
+
+def test_sweep():
+
+    history = get_history()
+    thresholds = [1.0, 0.85, 0.75, 0.65, 0.55, 0.45]
+    for n, annotation in enumerate(history.sweep(thresholds)):
+        assert annotation == history[n]
+
+
+def test_to_linkage():
+
+    history = get_history()
+    Z = history.to_linkage()
+    # A B C D E F ==> 0 1 2 3 4 5
+    # B + C ==> 6 | D + E ==> 7 | A + 6 ==> 8 | 7 + 8 ==> 9 | 5 + 9 ==> 10
+    assert Z[:, :2].tolist() == [[1, 2], [3, 4], [0, 6], [7, 8], [5, 9]]
+    assert Z[:, 2].tolist() == [-0.9, -0.8, -0.7, -0.6, -0.5]
+    assert Z[:, 3].tolist() == [2, 2, 3, 5, 6]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from sortedcollections import ValueSortedDict
+from pyannote.core import Annotation, Segment
+from .linkage import CompleteLinkageClustering
+from .linkage import AverageLinkageClustering
+from .linkage import SingleLinkageClustering
+from .linkage import NearestNeighborChainClustering
+
+
+def get_data(n_clusters=30, seed=0):
+
+    random_state = np.random.RandomState(seed)
+
+    annotation = Annotation(uri='test')
+    for i in range(n_clusters):
+        annotation[Segment(i, i + 1)] = 'cluster%02d' % i
+
+    embedding = random_state.randn(n_clusters, 3)
+    distance = np.sqrt(np.sum(
+        (embedding[:, np.newaxis] - embedding[np.newaxis]) ** 2, axis=-1))
+
+    precomputed = ValueSortedDict()
+    clusters = annotation.labels()
+    for i, cluster1 in enumerate(clusters):
+        for j, cluster2 in enumerate(clusters):
+            if i != j:
+                precomputed[cluster1, cluster2] = -distance[i, j]
+
+    return annotation, precomputed
+
+
+def partition(annotation):
+    clusters = {}
+    for segment, _, label in annotation.itertracks(label=True):
+        clusters.setdefault(label, set()).add(segment)
+    return sorted(sorted(cluster) for cluster in clusters.values())
+
+
+def check_nn_chain(linkage, clustering, force):
+
+    annotation, precomputed = get_data()
+
+    expected = clustering(threshold=-1.5, force=force)
+    nn_chain = NearestNeighborChainClustering(
+        linkage=linkage, threshold=-1.5, force=force)
+
+    assert partition(expected(annotation, precomputed)) == \
+        partition(nn_chain(annotation, precomputed))
+
+    assert np.allclose(
+        [iteration.similarity for iteration in expected.history.iterations],
+        [iteration.similarity for iteration in nn_chain.history.iterations])
+
+
+def test_complete():
+    check_nn_chain('complete', CompleteLinkageClustering, False)
+    check_nn_chain('complete', CompleteLinkageClustering, True)
+
+
+def test_average():
+    check_nn_chain('average', AverageLinkageClustering, False)
+    check_nn_chain('average', AverageLinkageClustering, True)
+
+
+def test_single():
+    check_nn_chain('single', SingleLinkageClustering, False)
+    check_nn_chain('single', SingleLinkageClustering, True)
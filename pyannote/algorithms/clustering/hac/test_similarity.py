@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from .similarity import SortedSimilarity, DenseSimilarity, HeapSimilarity
+
+
+def check_backend(backend):
+
+    random_state = np.random.RandomState(0)
+
+    clusters = list(range(20))
+    matrix = random_state.randn(20, 20)
+    matrix = matrix + matrix.T
+
+    reference = SortedSimilarity(clusters)
+    reference.fill(clusters, matrix)
+
+    similarity = backend(clusters)
+    similarity.fill(clusters, matrix)
+
+    while len(clusters) > 2:
+
+        (i, j), value = reference.peekitem()
+        _, other_value = similarity.peekitem()
+        assert np.isclose(value, other_value)
+
+        # block most similar pair every once in a while
+        if random_state.rand() < 0.2:
+            reference[i, j] = reference[j, i] = -np.inf
+            similarity[i, j] = similarity[j, i] = -np.inf
+            continue
+
+        # merge j into i
+        clusters.remove(j)
+        reference.remove(j)
+        similarity.remove(j)
+
+        updated = {}
+        for k in clusters:
+            if k == i:
+                continue
+            updated[i, k] = updated[k, i] = random_state.randn()
+        reference.update(updated)
+        similarity.update(updated)
+
+
+def test_dense():
+    check_backend(DenseSimilarity)
+
+
+def test_heap():
+    check_backend(HeapSimilarity)
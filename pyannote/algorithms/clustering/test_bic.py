@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from pyannote.core import Annotation, Segment
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+from pyannote.algorithms.stats.gaussian import Gaussian
+from pyannote.algorithms.utils.crop import crop_views
+from .bic import BICClustering
+
+
+def get_data(n_turns=20, n_speakers=3, dimension=5, seed=0):
+
+    random_state = np.random.RandomState(seed)
+    sliding_window = SlidingWindow(duration=0.02, step=0.01, start=0.)
+    centers = 3 * random_state.randn(n_speakers, dimension)
+
+    X = []
+    annotation = Annotation(uri='test')
+    t = 0.
+    for i in range(n_turns):
+        speaker = random_state.randint(n_speakers)
+        n_samples = random_state.randint(100, 200)
+        X.append(centers[speaker] + random_state.randn(n_samples, dimension))
+        annotation[Segment(t, t + 0.01 * n_samples)] = 'turn%02d' % i
+        t += 0.01 * n_samples
+
+    features = SlidingWindowFeature(np.vstack(X), sliding_window)
+    return features, annotation
+
+
+class TestBICModel:
+
+    def check_similarity_matrix(self, covariance_type):
+
+        features, annotation = get_data()
+        clustering = BICClustering(covariance_type=covariance_type)
+        clustering._initialize(annotation, features=features)
+        model = clustering.model
+
+        clusters = annotation.labels()
+        matrix = model.compute_similarity_matrix(parent=clustering)
+        for i, cluster1 in enumerate(clusters):
+            for j, cluster2 in enumerate(clusters):
+                if i == j:
+                    continue
+                similarity = model.compute_similarity(
+                    cluster1, cluster2, parent=clustering)
+                assert np.isclose(matrix[i, j], similarity)
+
+    def test_similarity_matrix_diag(self):
+        self.check_similarity_matrix('diag')
+
+    def test_similarity_matrix_full(self):
+        self.check_similarity_matrix('full')
+
+    def check_similarities(self, covariance_type):
+
+        features, annotation = get_data()
+        clustering = BICClustering(covariance_type=covariance_type)
+        clustering._initialize(annotation, features=features)
+        model = clustering.model
+
+        cluster, clusters = annotation.labels()[0], annotation.labels()[1:]
+        similarities = model.compute_similarities(
+            cluster, clusters, parent=clustering)
+        for other_cluster in clusters:
+            similarity = model.compute_similarity(
+                cluster, other_cluster, parent=clustering)
+            assert np.isclose(similarities[cluster, other_cluster], similarity)
+            assert np.isclose(similarities[other_cluster, cluster], similarity)
+
+    def test_similarities_diag(self):
+        self.check_similarities('diag')
+
+    def test_similarities_full(self):
+        self.check_similarities('full')
+
+    def check_delta_bic(self, covariance_type):
+
+        features, annotation = get_data()
+        clustering = BICClustering(covariance_type=covariance_type)
+        clustering._initialize(annotation, features=features)
+        model = clustering.model
+
+        def data(cluster):
+            timeline = annotation.label_timeline(cluster)
+            return np.vstack(crop_views(features, timeline))
+
+        def log_det(X):
+            covar = np.cov(X, rowvar=False, bias=True)
+            if covariance_type == 'diag':
+                return np.sum(np.log(np.diag(covar)))
+            return np.linalg.slogdet(covar)[1]
+
+        clusters = annotation.labels()[:4]
+        for i, cluster1 in enumerate(clusters):
+            for cluster2 in clusters[i + 1:]:
+
+                X1, X2 = data(cluster1), data(cluster2)
+
+                # one Gaussian fitted on the frames of each cluster
+                g1 = Gaussian(covariance_type=covariance_type).fit(X1)
+                g2 = Gaussian(covariance_type=covariance_type).fit(X2)
+                delta_bic, _ = g1.bic(g2, penalty_coef=model.penalty_coef)
+
+                similarity = model.compute_similarity(
+                    cluster1, cluster2, parent=clustering)
+                assert np.isclose(similarity, -delta_bic)
+
+                # textbook definition
+                n1, n2, d = len(X1), len(X2), X1.shape[1]
+                n = n1 + n2
+                n_parameters = 2 * d if covariance_type == 'diag' \
+                    else d + d * (d + 1) / 2
+                expected = n * log_det(np.vstack([X1, X2])) \
+                    - n1 * log_det(X1) - n2 * log_det(X2) \
+                    - model.penalty_coef * n_parameters * np.log(n)
+                assert np.isclose(similarity, -expected)
+
+    def test_delta_bic_diag(self):
+        self.check_delta_bic('diag')
+
+    def test_delta_bic_full(self):
+        self.check_delta_bic('full')
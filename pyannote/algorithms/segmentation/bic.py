@@ -28,13 +28,47 @@
 
 from __future__ import unicode_literals
 
-from ..stats.gaussian import RollingGaussian, bayesianInformationCriterion
+import time
+import warnings
+from collections import deque
+from multiprocessing import Pool
+
+from ..stats.gaussian import CumulativeGaussianStatistics
+from ..stats.gaussian import bayesianInformationCriterion
+from ..utils.crop import crop
 import numpy as np
 from pyannote.core.util import pairwise
 from pyannote.core import Timeline, Segment
 
 
 class SKLearnBICSegmentation(object):
+    """BIC segmentation of an array of samples
+
+    Parameters
+    ----------
+    penalty_coef : float, optional
+        Set value of penalty coefficient 𝝀. Defaults to 1.
+    covariance_type : {'full', 'diag'}, optional
+        Set type of covariance matrix. Defaults to 'full'. See memory usage
+        below.
+    min_samples : int, optional
+        Minimum number of samples per segment. Defaults to 100.
+    precision : int, optional
+        Step (in samples) between candidate boundaries. Defaults to 10.
+
+    Memory usage
+    ------------
+    Prefix sums of the statistics of the current analysis window are kept
+    in memory (see CumulativeGaussianStatistics), so that all candidate
+    boundaries are scored at once. This costs O(n x d²) floats for 'full'
+    covariance and O(n x d) for 'diag', where n is the length of the current
+    window and d the dimension -- rather than O(d²) for a rolling Gaussian.
+    As the window keeps growing until a change point is found, n can reach
+    the length of the longest segment (with buffers up to twice as large):
+    for 'full' covariance, a one hour segment at 100 frames per second takes
+    about 1.2GB with d=20 and 10GB with d=60. Use 'diag' covariance (or
+    shorter segments) when this is too much.
+    """
 
     def __init__(self, penalty_coef=1., covariance_type='full',
                  min_samples=100, precision=10):
@@ -44,43 +78,76 @@ class SKLearnBICSegmentation(object):
         self.min_samples = min_samples
         self.precision = precision
 
-    def split(self, X, start, end, g1, g2, g):
+    def split(self, X, start, end, g1=None, g2=None, g=None,
+              cumulative=None):
+        """Look for the best change point in X[start:end]
 
-        g.fit(X, start=start, end=end)
+        Parameters
+        ----------
+        X : (n_samples, dimension) np.ndarray
+        start, end : int
+        g1, g2, g : RollingGaussian, optional
+            Deprecated and ignored (statistics of all candidate windows are
+            now obtained from `cumulative`). Only kept so that calls using
+            the former `split(X, start, end, g1, g2, g)` signature still work.
+        cumulative : CumulativeGaussianStatistics, optional
+            Cumulative statistics of X[start:] (at least up to `end`).
+            Computed from X[start:end] when not provided.
+
+        Returns
+        -------
+        boundary : int or None
+            Best change point, or None when ΔBIC is never positive.
+        """
+
+        if g1 is not None or g2 is not None or g is not None:
+            warnings.warn(
+                '`g1`, `g2` and `g` arguments of `split` are deprecated '
+                'and ignored.', DeprecationWarning, stacklevel=2)
+
+        if cumulative is None:
+            cumulative = CumulativeGaussianStatistics(
+                covariance_type=self.covariance_type).fit(X[start:end])
 
-        boundaries = list(range(start + self.min_samples,
-                           end - self.min_samples,
-                           self.precision))
+        boundaries = np.arange(self.min_samples,
+                               end - start - self.min_samples,
+                               self.precision)
 
-        bic = np.empty((len(boundaries),))
-        for i, boundary in enumerate(boundaries):
-            g1.fit(X, start=start, end=boundary)
-            g2.fit(X, start=boundary, end=end)
-            bic[i] = bayesianInformationCriterion(
-                g1, g2, g=g, penalty_coef=self.penalty_coef)
+        # ΔBIC of all candidate boundaries at once
+        g = cumulative.window(0, end - start)
+        g1 = cumulative.window(0, boundaries)
+        g2 = cumulative.window(boundaries, end - start)
+        bic = bayesianInformationCriterion(
+            g1, g2, g=g, penalty_coef=self.penalty_coef)
 
         I = np.argmax(bic)
         BIC = bic[I]
-        return boundaries[I] if BIC > 0 else None
+        return start + int(boundaries[I]) if BIC > 0 else None
 
     def apply(self, X):
 
         N = len(X)
 
-        # one gaussian for the whole data
-        g = RollingGaussian(covariance_type=self.covariance_type).fit(X)
-
-        # two gaussians (left & right)
-        g1 = RollingGaussian(covariance_type=self.covariance_type)
-        g2 = RollingGaussian(covariance_type=self.covariance_type)
-
         start = 0
         end = 3 * self.min_samples
 
+        # cumulative statistics of X[start:], computed lazily
+        cumulative = None
+
         boundaries = [0, ]
         while end < N:
 
-            boundary = self.split(X, start, end, g1, g2, g)
+            if cumulative is None:
+                cumulative = CumulativeGaussianStatistics(
+                    covariance_type=self.covariance_type).fit(X[start:end])
+
+            # when the window grows, reuse statistics computed so far
+            # (buffers grow geometrically so the overall cost of growing
+            # the window remains linear in its final size)
+            elif start + len(cumulative) < end:
+                cumulative.extend(X[start + len(cumulative):end])
+
+            boundary = self.split(X, start, end, cumulative=cumulative)
             if boundary is None:
                 end = end + self.min_samples
                 continue
@@ -88,6 +155,7 @@ class SKLearnBICSegmentation(object):
             boundaries.append(boundary)
             start = boundary
             end = start + 3 * self.min_samples
+            cumulative = None
 
         return boundaries + [N - 1]
 
@@ -99,7 +167,9 @@ class BICSegmentation(SKLearnBICSegmentation):
     penalty_coef : float, optional
         Set value of penalty coefficient 𝝀. Defaults to 1.
     covariance_type : {'full', 'diag'}, optional
-        Set type of covariance matrix. Defaults to 'full'.
+        Set type of covariance matrix. Defaults to 'full'. 'full' covariance
+        keeps O(d²) floats per frame of the current analysis window in
+        memory (see SKLearnBICSegmentation).
     min_duration : int, optional
         Mininum segment duration. Defaults to 1s.
     """
@@ -112,6 +182,22 @@ class BICSegmentation(SKLearnBICSegmentation):
         self.min_duration = min_duration
         self.precision = precision
 
+    def _segmenter(self, sliding_window):
+        min_samples = sliding_window.durationToSamples(self.min_duration)
+        precision = sliding_window.durationToSamples(self.precision)
+        return SKLearnBICSegmentation(
+            penalty_coef=self.penalty_coef,
+            covariance_type=self.covariance_type,
+            min_samples=min_samples,
+            precision=precision)
+
+    @staticmethod
+    def _segments(boundaries, sliding_window, long_segment):
+        for t, T in pairwise(boundaries):
+            segment = sliding_window.rangeToSegment(t, T - t)
+            yield Segment(long_segment.start + segment.start,
+                          long_segment.start + segment.end)
+
     def apply(self, features, segmentation=None):
         """
         Parameters
@@ -124,25 +210,285 @@ class BICSegmentation(SKLearnBICSegmentation):
             segmentation = Timeline(segments=[features.getExtent()])
 
         sliding_window = features.sliding_window
-        min_samples = sliding_window.durationToSamples(self.min_duration)
-        precision = sliding_window.durationToSamples(self.precision)
-
-        segmenter = SKLearnBICSegmentation(
-            penalty_coef=self.penalty_coef,
-            covariance_type=self.covariance_type,
-            min_samples=min_samples,
-            precision=precision)
+        segmenter = self._segmenter(sliding_window)
 
         result = Timeline()
 
         for long_segment in segmentation:
 
-            X = features.crop(long_segment)
+            X = crop(features, long_segment)
             boundaries = segmenter.apply(X)
-            for t, T in pairwise(boundaries):
-                segment = sliding_window.rangeToSegment(t, T - t)
-                shifted_segment = Segment(long_segment.start + segment.start,
-                                          long_segment.start + segment.end)
-                result.add(shifted_segment)
+            for segment in self._segments(boundaries, sliding_window,
+                                          long_segment):
+                result.add(segment)
 
         return result
+
+    def apply_batch(self, batch, n_jobs=1, max_pending=None):
+        """Apply segmentation to many recordings
+
+        Long segments of all recordings are distributed among a pool of
+        worker processes. Results are yielded as soon as they are available,
+        in the same order as `batch`.
+
+        Parameters
+        ----------
+        batch : iterable
+            Iterable of (features, segmentation) tuples, where segmentation
+            may be None (see `apply`).
+        n_jobs : int, optional
+            Number of worker processes. Defaults to 1 (no multiprocessing).
+        max_pending : int, optional
+            Maximum number of long segments sent to the workers at any time,
+            bounding the number of cropped features kept in memory.
+            Defaults to 4 x n_jobs.
+
+        Yields
+        ------
+        result : Timeline
+            Segmentation of the current recording.
+        duration : float
+            Processing time (in seconds) spent on the current recording,
+            summed over all of its long segments.
+
+        Usage
+        -----
+        >>> batch = ((features[uri], None) for uri in uris)
+        >>> for uri, (result, duration) in zip(uris,
+        ...         segmentation.apply_batch(batch, n_jobs=8)):
+        ...     print('{uri} processed in {duration:.1f}s'.format(
+        ...         uri=uri, duration=duration))
+        """
+
+        if n_jobs < 2:
+            for features, segmentation in batch:
+                _t = time.time()
+                result = self.apply(features, segmentation=segmentation)
+                yield result, time.time() - _t
+            return
+
+        if max_pending is None:
+            max_pending = 4 * n_jobs
+
+        # recordings whose results have not been yielded yet
+        # each one is a (sliding_window, jobs) tuple where jobs is the list
+        # of (long_segment, async_result) of its long segments
+        recordings = deque()
+
+        # submitted jobs not known to be finished yet
+        pending = deque()
+
+        pool = Pool(processes=n_jobs)
+
+        try:
+
+            for features, segmentation in batch:
+
+                if segmentation is None:
+                    segmentation = Timeline(
+                        segments=[features.getExtent()])
+
+                sliding_window = features.sliding_window
+                segmenter = self._segmenter(sliding_window)
+
+                jobs = []
+                recordings.append((sliding_window, jobs))
+
+                for long_segment in segmentation:
+
+                    # wait for oldest jobs to bound memory usage
+                    while len(pending) >= max_pending:
+                        pending.popleft().wait()
+
+                    X = crop(features, long_segment)
+                    job = pool.apply_async(_apply_segmenter, (segmenter, X))
+                    jobs.append((long_segment, job))
+                    pending.append(job)
+
+                # yield (in order) results of already processed recordings
+                # -- all but the last one which may not be complete yet
+                while len(recordings) > 1 and \
+                        all(job.ready() for _, job in recordings[0][1]):
+                    yield self._collect(*recordings.popleft())
+
+            while recordings:
+                yield self._collect(*recordings.popleft())
+
+            pool.close()
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _collect(self, sliding_window, jobs):
+        """Gather results of all long segments of one recording"""
+
+        result = Timeline()
+        duration = 0.
+
+        for long_segment, job in jobs:
+            boundaries, elapsed = job.get()
+            duration += elapsed
+            for segment in self._segments(boundaries, sliding_window,
+                                          long_segment):
+                result.add(segment)
+
+        return result, duration
+
+
+def _apply_segmenter(segmenter, X):
+    """Worker-side segmentation of one long segment"""
+    _t = time.time()
+    boundaries = segmenter.apply(X)
+    return boundaries, time.time() - _t
+
+
+class OnlineBICSegmentation(object):
+    """Online BIC segmentation of a stream of feature frames
+
+    Feature frames are provided in chunks (e.g. from a generator or a live
+    stream) and segments are emitted as soon as their boundaries are final.
+    Only cumulative statistics of the current analysis window are kept in
+    memory, and feature frames themselves are never stored.
+
+    Results are the same as BICSegmentation applied to the concatenation of
+    all chunks.
+
+    Parameters
+    ----------
+    sliding_window : SlidingWindow
+        Sliding window of incoming feature frames.
+    penalty_coef : float, optional
+        Set value of penalty coefficient 𝝀. Defaults to 1.
+    covariance_type : {'full', 'diag'}, optional
+        Set type of covariance matrix. Defaults to 'full'. 'full' covariance
+        keeps O(d²) floats per frame of the current analysis window in
+        memory (see SKLearnBICSegmentation).
+    min_duration : float, optional
+        Mininum segment duration. Defaults to 1s.
+    precision : float, optional
+        Step between candidate boundaries. Defaults to 0.1s.
+
+    Usage
+    -----
+    >>> segmentation = OnlineBICSegmentation(sliding_window)
+    >>> for chunk in stream:
+    ...     for segment in segmentation.update(chunk):
+    ...         print(segment)
+    >>> for segment in segmentation.finalize():
+    ...     print(segment)
+    """
+
+    def __init__(self, sliding_window, penalty_coef=1.,
+                 covariance_type='full', min_duration=1., precision=0.1):
+        super(OnlineBICSegmentation, self).__init__()
+        self.sliding_window = sliding_window
+        self.penalty_coef = penalty_coef
+        self.covariance_type = covariance_type
+        self.min_duration = min_duration
+        self.precision = precision
+
+        self.segmenter_ = SKLearnBICSegmentation(
+            penalty_coef=self.penalty_coef,
+            covariance_type=self.covariance_type,
+            min_samples=sliding_window.durationToSamples(self.min_duration),
+            precision=sliding_window.durationToSamples(self.precision))
+
+        self.reset()
+
+    def reset(self):
+        """Prepare for a new stream"""
+
+        # total number of frames received so far
+        self.n_samples_ = 0
+
+        # last confirmed boundary (i.e. start of current analysis window)
+        self.start_ = 0
+
+        # end of current analysis window
+        self.end_ = 3 * self.segmenter_.min_samples
+
+        # cumulative statistics of frames received since last boundary
+        self.cumulative_ = None
+
+    def _segment(self, start, end):
+        return self.sliding_window.rangeToSegment(start, end - start)
+
+    def update(self, X):
+        """Process a new chunk of feature frames
+
+        Parameters
+        ----------
+        X : (n_samples, dimension) array-like
+            Next feature frames.
+
+        Returns
+        -------
+        segments : list of Segment
+            Newly confirmed segments (possibly none).
+        """
+
+        X = np.asarray(X)
+
+        if self.cumulative_ is None:
+            self.cumulative_ = CumulativeGaussianStatistics(
+                covariance_type=self.covariance_type).fit(X)
+        else:
+            self.cumulative_.extend(X)
+        self.n_samples_ += len(X)
+
+        segments = []
+
+        while self.end_ < self.n_samples_:
+
+            boundary = self.segmenter_.split(
+                None, self.start_, self.end_, cumulative=self.cumulative_)
+
+            if boundary is None:
+                self.end_ += self.segmenter_.min_samples
+                continue
+
+            segments.append(self._segment(self.start_, boundary))
+            self.cumulative_.discard(boundary - self.start_)
+            self.start_ = boundary
+            self.end_ = boundary + 3 * self.segmenter_.min_samples
+
+        return segments
+
+    def finalize(self):
+        """Flush last segment at the end of the stream
+
+        Returns
+        -------
+        segments : list of Segment
+            Last segment (if any). The segmenter is reset afterwards.
+        """
+
+        segments = []
+        if self.n_samples_ > 0:
+            segments.append(self._segment(self.start_, self.n_samples_ - 1))
+        self.reset()
+        return segments
+
+    def apply(self, chunks):
+        """Segment a stream of feature frames
+
+        Parameters
+        ----------
+        chunks : iterable
+            Iterable of (n_samples, dimension) chunks of feature frames.
+
+        Yields
+        ------
+        segment : Segment
+            Segments, as soon as they are confirmed.
+        """
+
+        self.reset()
+
+        for X in chunks:
+            for segment in self.update(X):
+                yield segment
+
+        for segment in self.finalize():
+            yield segment
@@ -37,11 +37,14 @@ from ..utils.viterbi import viterbi_decoding, \
 from pyannote.core import Annotation, Scores
 from pyannote.core.util import pairwise
 from ..utils.sklearn import SKLearnMixin, LabelConverter
+from ..utils.store import FrameStore
 from ..classification.gmm import \
     SKLearnGMMClassification, SKLearnGMMUBMClassification
+from .hmm_base import BaseSKLearnGMMSegmentation, BaseGMMSegmentation
 
 
-class SKLearnGMMSegmentation(SKLearnGMMClassification):
+class SKLearnGMMSegmentation(BaseSKLearnGMMSegmentation,
+                             SKLearnGMMClassification):
     """
 
     Parameters
@@ -52,7 +55,7 @@ class SKLearnGMMSegmentation(SKLearnGMMClassification):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -92,11 +95,11 @@ class SKLearnGMMSegmentation(SKLearnGMMClassification):
 
     equal_priors : boolean, optional
         Defaults to False
-    """
 
-    def _n_classes(self,):
-        K = len(self.classes_)
-        return K
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
+    """
 
     def _fit_structure(self, y_iter):
 
@@ -117,7 +120,21 @@ class SKLearnGMMSegmentation(SKLearnGMMClassification):
 
         return self
 
-    def fit(self, X_iter, y_iter):
+    def fit(self, X_iter, y_iter=None):
+        """
+        Parameters
+        ----------
+        X_iter : iterable of array-like, or FrameStore
+            Training sequences. When a FrameStore is provided (one file per
+            sequence), samples are read from disk only when needed.
+        y_iter : iterable of array-like, optional
+            Training labels. Not needed when X_iter is a FrameStore.
+        """
+
+        if isinstance(X_iter, FrameStore):
+            super(SKLearnGMMSegmentation, self).fit(X_iter)
+            self._fit_structure(y for _, y in X_iter.files())
+            return self
 
         y_iter = list(y_iter)
 
@@ -129,33 +146,6 @@ class SKLearnGMMSegmentation(SKLearnGMMClassification):
 
         return self
 
-    def predict(self, X, consecutive=None, constraint=None):
-        """
-        Parameters
-        ----------
-        X : array-like, shape (N, D)
-        consecutive : array-like, shape (K, )
-        constraint : array-like, shape (N, K)
-
-        N is the number of samples.
-        D is the features dimension.
-        K is the number of classes (including the rejection class as the last
-        class, when appropriate).
-
-        """
-
-        if self.calibration is None:
-            emission = self.predict_log_likelihood(X)
-        else:
-            emission = self.predict_log_proba(X)
-
-        sequence = viterbi_decoding(
-            emission, self.transition_,
-            initial=self.initial_,
-            consecutive=consecutive, constraint=constraint)
-
-        return sequence
-
 
 class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
     """
@@ -167,7 +157,7 @@ class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -196,7 +186,7 @@ class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
         process.  Can contain any combination of 'w' for weights,
         'm' for means, and 'c' for covars.  Defaults to 'wmc'.
 
-    precomputed_ubm : GMM, optional
+    precomputed_ubm : GaussianMixture, optional
         When provided, class GMMs are adapted from this UBM.
 
     adapt_params : string, optional
@@ -207,6 +197,20 @@ class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
     adapt_iter : int, optional
         Number of EM iterations to perform during adaptation.
 
+    relevance_factor : float, optional
+        When provided, class models are obtained by closed-form MAP
+        adaptation (Reynolds et al., 2000) of UBM parameters `adapt_params`
+        with this relevance factor (typically 16.), in one single pass over
+        the training samples (`adapt_iter` is then ignored). Only supported
+        with 'diag' covariances. Defaults to EM adaptation.
+
+    top_components : int, optional
+        When provided, class models are only evaluated on the
+        `top_components` best UBM components of each sample (Gaussian
+        selection), which is much faster with large UBMs. Only supported
+        with 'diag' covariances and adapt_params='m'. Defaults to evaluating
+        all components.
+
     calibration : string, optional
         Controls how raw GMM scores are calibrated into log-likelihood ratios.
         Must be one of 'naive_bayes' (for Gaussian naive Bayes) or 'isotonic'
@@ -215,6 +219,10 @@ class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
     lbg : boolean, optional
         Controls whether to use the LBG algorithm for training.
         Defaults to False.
+
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
     """
 
     def _n_classes(self,):
@@ -244,7 +252,21 @@ class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
 
         return self
 
-    def fit(self, X_iter, y_iter):
+    def fit(self, X_iter, y_iter=None):
+        """
+        Parameters
+        ----------
+        X_iter : iterable of array-like, or FrameStore
+            Training sequences. When a FrameStore is provided (one file per
+            sequence), samples are read from disk only when needed.
+        y_iter : iterable of array-like, optional
+            Training labels. Not needed when X_iter is a FrameStore.
+        """
+
+        if isinstance(X_iter, FrameStore):
+            super(SKLearnGMMUBMSegmentation, self).fit(X_iter)
+            self._fit_structure(y for _, y in X_iter.files())
+            return self
 
         y_iter = list(y_iter)
 
@@ -294,7 +316,7 @@ class SKLearnGMMUBMSegmentation(SKLearnGMMUBMClassification):
         return sequence
 
 
-class GMMSegmentation(SKLearnMixin):
+class GMMSegmentation(BaseGMMSegmentation):
     """
 
     Parameters
@@ -305,7 +327,7 @@ class GMMSegmentation(SKLearnMixin):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -345,12 +367,22 @@ class GMMSegmentation(SKLearnMixin):
 
     equal_priors : boolean, optional
         Defaults to False.
+
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
+
+    store_dir : str, optional
+        Directory where training frames are temporarily stored (and
+        memory-mapped) during training. Defaults to the system temporary
+        directory.
     """
 
     def __init__(self, n_jobs=1, n_components=1, covariance_type='diag',
                  random_state=None, tol=1e-2, min_covar=1e-3,
                  n_iter=10, n_init=1, params='wmc', init_params='wmc',
-                 calibration=None, lbg=False, equal_priors=False):
+                 calibration=None, lbg=False, equal_priors=False,
+                 scoring_dtype='float64', store_dir=None):
 
         self.n_components = n_components
         self.covariance_type = covariance_type
@@ -365,6 +397,8 @@ class GMMSegmentation(SKLearnMixin):
         self.n_jobs = n_jobs
         self.lbg = lbg
         self.equal_priors = equal_priors
+        self.scoring_dtype = scoring_dtype
+        self.store_dir = store_dir
 
     def fit(self, features_iter, annotation_iter):
 
@@ -381,99 +415,21 @@ class GMMSegmentation(SKLearnMixin):
             init_params=self.init_params,
             calibration=self.calibration,
             lbg=self.lbg,
-            equal_priors=self.equal_priors
+            equal_priors=self.equal_priors,
+            scoring_dtype=self.scoring_dtype
         )
 
-        X_iter, y_iter = list(zip(*list(
-            self.Xy_iter(features_iter, annotation_iter, unknown='unique'))))
+        # training frames are stored on disk and memory-mapped
+        with self.Xy_store(features_iter, annotation_iter,
+                           dir=self.store_dir) as store:
 
-        self.label_converter_ = LabelConverter()
-        self.label_converter_.fit(np.hstack(y_iter))
+            self.label_converter_ = LabelConverter().fit(store.labels_)
+            store.relabel(self.label_converter_.transform(store.labels_))
 
-        encoded_y_iter = [self.label_converter_.transform(y) for y in y_iter]
-        self.classifier_.fit(X_iter, encoded_y_iter)
+            self.classifier_.fit(store)
 
         return self
 
-    def _constraint(self, constraint, features):
-
-        N = features.getNumber()
-        K = self.classifier_._n_classes()
-
-        mapping = self.label_converter_.mapping()
-        sliding_window = features.sliding_window
-
-        # defaults to no constraint
-        constraint_ = VITERBI_CONSTRAINT_NONE * np.ones((N, K), dtype=int)
-
-        if isinstance(constraint, Scores):
-
-            for segment, _, label, value in constraint.itervalues():
-                t, dt = sliding_window.segmentToRange(segment)
-                constraint_[t:t + dt, mapping[label]] = value
-
-        if isinstance(constraint, Annotation):
-
-            # forbidden everywhere...
-            for label in constraint.labels():
-                constraint_[:, mapping[label]] = VITERBI_CONSTRAINT_FORBIDDEN
-
-            # ... but in labeled segments
-            for segment, _, label in constraint.itertracks(label=True):
-                t, dt = sliding_window.segmentToRange(segment)
-                constraint_[t:t + dt, mapping[label]] = \
-                    VITERBI_CONSTRAINT_MANDATORY
-
-        return constraint_
-
-    def _consecutive(self, min_duration, features):
-
-        K = self.classifier_._n_classes()
-        consecutive = np.ones((K, ), dtype=int)
-
-        sliding_window = features.sliding_window
-
-        if isinstance(min_duration, float):
-            consecutive[:] = sliding_window.durationToSamples(min_duration)
-
-        if isinstance(min_duration, dict):
-            mapping = self.label_converter_.mapping()
-            for label, duration in six.iteritems(min_duration):
-                consecutive[mapping[label]] = \
-                    sliding_window.durationToSamples(duration)
-
-        return consecutive
-
-    def predict(self, features, min_duration=None, constraint=None):
-        """
-        Parameters
-        ----------
-        min_duration : float or dict, optional
-            Minimum duration for each label, in seconds.
-        constraint : Annotation or Scores, optional
-        """
-
-        constraint_ = self._constraint(constraint, features)
-        consecutive = self._consecutive(min_duration, features)
-
-        X = self.X(features, unknown='keep')
-        sliding_window = features.sliding_window
-        converted_y = self.classifier_.predict(
-            X, consecutive=consecutive, constraint=constraint_)
-
-        annotation = Annotation()
-
-        diff = list(np.where(np.diff(converted_y))[0])
-        diff = [-1] + diff + [len(converted_y)]
-
-        for t, T in pairwise(diff):
-            segment = sliding_window.rangeToSegment(t, T - t)
-            annotation[segment] = converted_y[t + 1]
-
-        translation = self.label_converter_.inverse_mapping()
-
-        return annotation.translate(translation)
-
     @classmethod
     def resegment(cls, features, annotation,
                   equal_priors=True, calibration=None,
@@ -501,7 +457,7 @@ class GMMUBMSegmentation(SKLearnMixin):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag'.
 
     random_state: RandomState or an int seed (None by default)
@@ -530,7 +486,7 @@ class GMMUBMSegmentation(SKLearnMixin):
         process.  Can contain any combination of 'w' for weights,
         'm' for means, and 'c' for covars.  Defaults to 'wmc'.
 
-    precomputed_ubm : GMM, optional
+    precomputed_ubm : GaussianMixture, optional
         When provided, class GMMs are adapted from this UBM.
 
     adapt_params : string, optional
@@ -541,6 +497,20 @@ class GMMUBMSegmentation(SKLearnMixin):
     adapt_iter : int, optional
         Number of EM iterations to perform during adaptation.
 
+    relevance_factor : float, optional
+        When provided, class models are obtained by closed-form MAP
+        adaptation (Reynolds et al., 2000) of UBM parameters `adapt_params`
+        with this relevance factor (typically 16.), in one single pass over
+        the training samples (`adapt_iter` is then ignored). Only supported
+        with 'diag' covariances. Defaults to EM adaptation.
+
+    top_components : int, optional
+        When provided, class models are only evaluated on the
+        `top_components` best UBM components of each sample (Gaussian
+        selection), which is much faster with large UBMs. Only supported
+        with 'diag' covariances and adapt_params='m'. Defaults to evaluating
+        all components.
+
     calibration : string, optional
         Controls how raw GMM scores are calibrated into log-likelihood ratios.
         Must be one of 'naive_bayes' (for Gaussian naive Bayes) or 'isotonic'
@@ -549,13 +519,24 @@ class GMMUBMSegmentation(SKLearnMixin):
     lbg : boolean, optional
         Controls whether to use the LBG algorithm for training.
         Defaults to False.
+
+    scoring_dtype : {'float64', 'float32'}, optional
+        Precision used to compute log-likelihoods at prediction time.
+        'float32' is faster but slightly less accurate. Defaults to 'float64'.
+
+    store_dir : str, optional
+        Directory where training frames are temporarily stored (and
+        memory-mapped) during training. Defaults to the system temporary
+        directory.
     """
 
     def __init__(self, n_jobs=1, n_components=1, covariance_type='diag',
                  random_state=None, tol=1e-2, min_covar=1e-3,
                  n_iter=10, n_init=1, params='wmc', init_params='wmc',
                  precomputed_ubm=None, adapt_iter=10, adapt_params='m',
-                 calibration=None, lbg=False):
+                 calibration=None, lbg=False, scoring_dtype='float64',
+                 top_components=None, relevance_factor=None,
+                 store_dir=None):
 
         self.n_components = n_components
         self.covariance_type = covariance_type
@@ -570,10 +551,14 @@ class GMMUBMSegmentation(SKLearnMixin):
         self.precomputed_ubm = precomputed_ubm
         self.adapt_iter = adapt_iter
         self.adapt_params = adapt_params
+        self.top_components = top_components
+        self.relevance_factor = relevance_factor
 
         self.calibration = calibration
         self.lbg = lbg
         self.n_jobs = n_jobs
+        self.scoring_dtype = scoring_dtype
+        self.store_dir = store_dir
 
     def fit(self, features_iter, annotation_iter):
 
@@ -592,17 +577,20 @@ class GMMUBMSegmentation(SKLearnMixin):
             adapt_iter=self.adapt_iter,
             adapt_params=self.adapt_params,
             calibration=self.calibration,
-            lbg=self.lbg
+            lbg=self.lbg,
+            scoring_dtype=self.scoring_dtype,
+            top_components=self.top_components,
+            relevance_factor=self.relevance_factor
         )
 
-        X_iter, y_iter = list(zip(*list(
-            self.Xy_iter(features_iter, annotation_iter, unknown='unique'))))
+        # training frames are stored on disk and memory-mapped
+        with self.Xy_store(features_iter, annotation_iter,
+                           dir=self.store_dir) as store:
 
-        self.label_converter_ = LabelConverter()
-        self.label_converter_.fit(np.hstack(y_iter))
+            self.label_converter_ = LabelConverter().fit(store.labels_)
+            store.relabel(self.label_converter_.transform(store.labels_))
 
-        encoded_y_iter = [self.label_converter_.transform(y) for y in y_iter]
-        self.classifier_.fit(X_iter, encoded_y_iter)
+            self.classifier_.fit(store)
 
         return self
 
@@ -651,7 +639,7 @@ class GMMUBMSegmentation(SKLearnMixin):
         constraint_ = self._constraint(constraint, features)
         consecutive = self._consecutive(min_duration, features)
 
-        X = self.X(features, unknown='keep')
+        X = self.X(features)
         sliding_window = features.sliding_window
         converted_y = self.classifier_.predict(
             X, consecutive=consecutive, constraint=constraint_)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Prediction with trained GMM-based hidden Markov models
+
+Like `pyannote.algorithms.classification.gmm_base`, this module does not
+depend on scikit-learn, so that models exported with `save` are loaded and
+applied without importing it.
+"""
+
+from __future__ import unicode_literals
+
+import six
+import pickle
+import numpy as np
+from multiprocessing import Pool
+from ..utils.viterbi import viterbi_decoding, \
+    VITERBI_CONSTRAINT_NONE, \
+    VITERBI_CONSTRAINT_MANDATORY, \
+    VITERBI_CONSTRAINT_FORBIDDEN
+from pyannote.core import Annotation, Scores
+from pyannote.core.util import pairwise
+from ..utils.sklearn import SKLearnMixin
+from ..classification.gmm_base import BaseSKLearnGMMClassification, NPZMixin
+
+
+class BaseSKLearnGMMSegmentation(BaseSKLearnGMMClassification):
+    """Prediction part of SKLearnGMMSegmentation"""
+
+    def _n_classes(self,):
+        K = len(self.classes_)
+        return K
+
+    def _to_arrays(self):
+        arrays = super(BaseSKLearnGMMSegmentation, self)._to_arrays()
+        arrays.update(initial=self.initial_, transition=self.transition_)
+        return arrays
+
+    def _from_arrays(self, arrays):
+        super(BaseSKLearnGMMSegmentation, self)._from_arrays(arrays)
+        self.initial_ = arrays['initial']
+        self.transition_ = arrays['transition']
+        return self
+
+    def predict(self, X, consecutive=None, constraint=None):
+        """
+        Parameters
+        ----------
+        X : array-like, shape (N, D)
+        consecutive : array-like, shape (K, )
+        constraint : array-like, shape (N, K)
+
+        N is the number of samples.
+        D is the features dimension.
+        K is the number of classes (including the rejection class as the last
+        class, when appropriate).
+
+        """
+
+        if self.calibration is None:
+            emission = self.predict_log_likelihood(X)
+        else:
+            emission = self.predict_log_proba(X)
+
+        sequence = viterbi_decoding(
+            emission, self.transition_,
+            initial=self.initial_,
+            consecutive=consecutive, constraint=constraint)
+
+        return sequence
+
+
+class BaseGMMSegmentation(NPZMixin, SKLearnMixin):
+    """Prediction part of GMMSegmentation"""
+
+    _npz_model = 'GMMSegmentation'
+    _classifier = BaseSKLearnGMMSegmentation
+
+    def _constraint(self, constraint, features):
+
+        N = features.getNumber()
+        K = self.classifier_._n_classes()
+
+        mapping = self.label_converter_.mapping()
+        sliding_window = features.sliding_window
+
+        # defaults to no constraint
+        constraint_ = VITERBI_CONSTRAINT_NONE * np.ones((N, K), dtype=int)
+
+        if isinstance(constraint, Scores):
+
+            for segment, _, label, value in constraint.itervalues():
+                t, dt = sliding_window.segmentToRange(segment)
+                constraint_[t:t + dt, mapping[label]] = value
+
+        if isinstance(constraint, Annotation):
+
+            # forbidden everywhere...
+            for label in constraint.labels():
+                constraint_[:, mapping[label]] = VITERBI_CONSTRAINT_FORBIDDEN
+
+            # ... but in labeled segments
+            for segment, _, label in constraint.itertracks(label=True):
+                t, dt = sliding_window.segmentToRange(segment)
+                constraint_[t:t + dt, mapping[label]] = \
+                    VITERBI_CONSTRAINT_MANDATORY
+
+        return constraint_
+
+    def _consecutive(self, min_duration, features):
+
+        K = self.classifier_._n_classes()
+        consecutive = np.ones((K, ), dtype=int)
+
+        sliding_window = features.sliding_window
+
+        if isinstance(min_duration, float):
+            consecutive[:] = sliding_window.durationToSamples(min_duration)
+
+        if isinstance(min_duration, dict):
+            mapping = self.label_converter_.mapping()
+            for label, duration in six.iteritems(min_duration):
+                consecutive[mapping[label]] = \
+                    sliding_window.durationToSamples(duration)
+
+        return consecutive
+
+    def predict(self, features, min_duration=None, constraint=None):
+        """
+        Parameters
+        ----------
+        min_duration : float or dict, optional
+            Minimum duration for each label, in seconds.
+        constraint : Annotation or Scores, optional
+        """
+
+        constraint_ = self._constraint(constraint, features)
+        consecutive = self._consecutive(min_duration, features)
+
+        X = self.X(features)
+        sliding_window = features.sliding_window
+        converted_y = self.classifier_.predict(
+            X, consecutive=consecutive, constraint=constraint_)
+
+        annotation = Annotation()
+
+        diff = list(np.where(np.diff(converted_y))[0])
+        diff = [-1] + diff + [len(converted_y)]
+
+        for t, T in pairwise(diff):
+            segment = sliding_window.rangeToSegment(t, T - t)
+            annotation[segment] = converted_y[t + 1]
+
+        translation = self.label_converter_.inverse_mapping()
+
+        return annotation.translate(translation)
+
+
+def predict_batch(model_npz, features_pkl, uris, min_duration=None,
+                  constraint=None, n_jobs=1):
+    """Apply a saved GMMSegmentation model to many resources
+
+    The model is loaded only once per worker process and features are read
+    by the workers themselves. Hypotheses are yielded as soon as they are
+    available, in the same order as `uris`.
+
+    Parameters
+    ----------
+    model_npz : str
+        Path to model saved with `GMMSegmentation.save`.
+    features_pkl : str
+        Path to pickled features, or path template such as
+        "features/{uri}.pkl".
+    uris : iterable
+        Resources to process. Use [None] to process `features_pkl` as is.
+    min_duration : float or dict, optional
+        Minimum duration for each label, in seconds.
+    constraint : callable, optional
+        Called as `constraint(uri=uri)` (in the main process) to get the
+        constraint (Annotation or Scores) of each resource.
+    n_jobs : int, optional
+        Number of worker processes. Defaults to 1 (no multiprocessing).
+
+    Yields
+    ------
+    uri : str
+    hypothesis : Annotation
+
+    Usage
+    -----
+    >>> for uri, hypothesis in predict_batch('model.npz', '{uri}.pkl',
+    ...                                      uris, n_jobs=8):
+    ...     writer.write(hypothesis, f=f, uri=uri)
+    """
+
+    initargs = (model_npz, features_pkl, min_duration)
+
+    if constraint is None:
+        tasks = ((uri, None) for uri in uris)
+    else:
+        tasks = ((uri, constraint(uri=uri)) for uri in uris)
+
+    if n_jobs < 2:
+        _initialize_worker(*initargs)
+        for task in tasks:
+            yield _predict_worker(task)
+        return
+
+    pool = Pool(processes=n_jobs, initializer=_initialize_worker,
+                initargs=initargs)
+
+    # workers are terminated if anything goes wrong (including when the
+    # caller stops iterating before the end)
+    try:
+        for uri, hypothesis in pool.imap(_predict_worker, tasks):
+            yield uri, hypothesis
+        pool.close()
+
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# state of worker process (loaded once, reused for every resource)
+_WORKER = {}
+
+
+def _initialize_worker(model_npz, features_pkl, min_duration):
+    _WORKER['model'] = BaseGMMSegmentation.load(model_npz)
+    _WORKER['features_pkl'] = features_pkl
+    _WORKER['min_duration'] = min_duration
+
+
+def _predict_worker(task):
+    """Worker-side prediction of one resource"""
+
+    uri, constraint = task
+
+    features_pkl = _WORKER['features_pkl']
+    if uri is not None:
+        features_pkl = features_pkl.format(uri=uri)
+
+    with open(features_pkl, 'rb') as f:
+        features = pickle.load(f)
+
+    hypothesis = _WORKER['model'].predict(
+        features, min_duration=_WORKER['min_duration'],
+        constraint=constraint)
+
+    return uri, hypothesis
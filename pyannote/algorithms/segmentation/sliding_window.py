@@ -35,7 +35,9 @@ import scipy.signal
 
 from pyannote.core import Timeline
 from pyannote.core.segment import Segment, SlidingWindow
-from ..stats.gaussian import Gaussian
+from ..stats.gaussian import GaussianStatistics, CumulativeGaussianStatistics
+from ..stats import divergence as _divergence
+from ..utils.crop import crop, frame_ranges
 from pyannote.core.util import pairwise
 
 
@@ -103,7 +105,73 @@ class SlidingWindowsSegmentation(object):
 
             yield middle, self.diff(left, right, feature)
 
-    def apply(self, feature, segmentation=None):
+    def windows(self, focus):
+        """Left and right windows for all positions
+
+        Parameters
+        ----------
+        focus : Segment
+
+        Returns
+        -------
+        left, right : (n_positions, 2) np.ndarray
+            (start, end) times of left and right windows.
+        middle : (n_positions, ) np.ndarray
+            Middle of the gap between left and right windows.
+        """
+
+        # same positions as iterating over SlidingWindow(start=focus.start,
+        # end=focus.end), i.e. those starting before the end of focus
+        n_positions = int(np.ceil((focus.end - focus.start) / self.step)) + 1
+        start = focus.start + np.arange(n_positions) * self.step
+        start = start[start < focus.end]
+
+        left = np.vstack([start, start + self.duration]).T
+        right = np.vstack([left[:, 1] + self.gap,
+                           left[:, 1] + self.gap + self.duration]).T
+        middle = .5 * (left[:, 1] + right[:, 0])
+
+        return left, right, middle
+
+    def batchdiff(self, feature, focus, statistics=None):
+        """Compute differences for all positions at once
+
+        Defaults to iterating over `iterdiff`. Mixins should override this
+        method with a vectorized implementation.
+
+        Parameters
+        ----------
+        feature : SlidingWindowFeature
+            Pre-extracted features
+        focus : Segment
+        statistics : SlidingWindowStatistics, optional
+            Precomputed statistics. Ignored by this default implementation.
+
+        Returns
+        -------
+        middle, difference : (n_positions, ) np.ndarray
+        """
+        x, y = list(zip(*[
+            (m, d) for m, d in self.iterdiff(feature, focus)
+        ]))
+        return np.array(x), np.array(y)
+
+    def apply(self, feature, segmentation=None, statistics=None):
+        """
+        Parameters
+        ----------
+        feature : SlidingWindowFeature
+            Pre-extracted features
+        segmentation : Timeline, optional
+            Defaults to the whole feature extent. Boundaries are looked for
+            independently within each of its segments: local maxima located
+            outside of the current segment (i.e. whose windows go past its
+            end) are discarded.
+        statistics : SlidingWindowStatistics, optional
+            Statistics of `feature`, precomputed once and shared among
+            several segmentation algorithms. Only supported by mixins based
+            on DivergenceMixin.
+        """
 
         if segmentation is None:
             focus = feature.getExtent()
@@ -112,11 +180,10 @@ class SlidingWindowsSegmentation(object):
         result = Timeline()
         for focus in segmentation:
 
-            x, y = list(zip(*[
-                (m, d) for m, d in self.iterdiff(feature, focus)
-            ]))
-            x = np.array(x)
-            y = np.array(y)
+            if statistics is None:
+                x, y = self.batchdiff(feature, focus)
+            else:
+                x, y = self.batchdiff(feature, focus, statistics=statistics)
 
             # find local maxima
             order = 1
@@ -128,7 +195,9 @@ class SlidingWindowsSegmentation(object):
             y = y[maxima]
 
             # only keep high enough local maxima
-            high_maxima = np.where(y > self.threshold)
+            # (and those actually within focus)
+            high_maxima = np.where((y > self.threshold) &
+                                   (x > focus.start) & (x < focus.end))
 
             # create list of segment boundaries
             # do not forget very first and last boundaries
@@ -144,10 +213,96 @@ class SlidingWindowsSegmentation(object):
         return result
 
 
-class GaussianDivergenceMixin:
+class SlidingWindowStatistics(object):
+    """Left and right window statistics
+
+    Cumulative statistics of the features are computed once and can be
+    shared among several sliding windows segmentation algorithms (possibly
+    with different window durations, steps and metrics) so that features
+    are only read once.
+
+    Parameters
+    ----------
+    feature : SlidingWindowFeature
+        Pre-extracted features
+    covariance_type : {'full', 'diag'}, optional
+        Defaults to 'diag', as used by all divergence mixins by default.
+        'full' statistics also serve algorithms using 'diag' but keep
+        (n_frames + 1) x d x d floats in memory, and are only needed when at
+        least one algorithm uses 'full' covariance (a ValueError is raised
+        otherwise).
+
+    Usage
+    -----
+    >>> statistics = SlidingWindowStatistics(feature)
+    >>> kl = SegmentationSymmetricKL().apply(feature, statistics=statistics)
+    >>> glr = SegmentationGLR().apply(feature, statistics=statistics)
+    >>> # full covariance algorithms need full covariance statistics
+    >>> statistics = SlidingWindowStatistics(feature, covariance_type='full')
+    >>> glr = SegmentationGLR(covariance_type='full').apply(
+    ...     feature, statistics=statistics)
+    """
+
+    def __init__(self, feature, covariance_type='diag'):
+        super(SlidingWindowStatistics, self).__init__()
+        self.feature = feature
+        self.covariance_type = covariance_type
+        self.cumulative_ = CumulativeGaussianStatistics(
+            covariance_type=covariance_type).fit(feature.data)
+
+    def __call__(self, segmentation, focus):
+        """Get statistics of all left and right windows
+
+        Parameters
+        ----------
+        segmentation : SlidingWindowsSegmentation
+            Provides window duration, step, gap and covariance type.
+        focus : Segment
+
+        Returns
+        -------
+        middle : (n_positions, ) np.ndarray
+        left, right : GaussianStatistics
+            Statistics of left and right windows (with as many Gaussians as
+            positions). Windows that contain no frame lead to NaNs.
+        """
+
+        covariance_type = getattr(segmentation, 'covariance_type', 'diag')
+        if covariance_type == 'full' and self.covariance_type == 'diag':
+            raise ValueError(
+                'Statistics with diagonal covariance cannot be used for '
+                'full covariance segmentation.')
+
+        left, right, middle = segmentation.windows(focus)
+
+        sliding_window = self.feature.sliding_window
+        n_samples = len(self.cumulative_)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gl = self.cumulative_.window(*frame_ranges(
+                sliding_window, n_samples, left[:, 0], left[:, 1]))
+            gr = self.cumulative_.window(*frame_ranges(
+                sliding_window, n_samples, right[:, 0], right[:, 1]))
+
+        if covariance_type == 'diag':
+            gl, gr = gl.diagonal(), gr.diagonal()
+
+        return middle, gl, gr
+
+
+class DivergenceMixin:
+    """Base mixin for divergences between left and right window statistics
+
+    Subclasses must implement the `divergence` method, which receives
+    GaussianStatistics of all left and right windows at once.
+    """
+
+    covariance_type = 'diag'
+
+    def divergence(self, gl, gr):
+        raise NotImplementedError()
 
     def diff(self, left, right, feature):
-        """Compute diagonal gaussian divergence between left and right windows
+        """Compute divergence between left and right windows
 
         Parameters
         ----------
@@ -158,25 +313,101 @@ class GaussianDivergenceMixin:
         Returns
         -------
         divergence : float
-            Gaussian divergence between left and right windows
+            Divergence between left and right windows (NaN when one of the
+            windows has a singular covariance matrix)
         """
 
-        gl = Gaussian(covariance_type='diag')
-        Xl = feature.crop(left)
-        gl.fit(Xl)
+        gl = GaussianStatistics(covariance_type=self.covariance_type)
+        gl.fit(crop(feature, left))
+
+        gr = GaussianStatistics(covariance_type=self.covariance_type)
+        gr.fit(crop(feature, right))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.divergence(gl, gr).item()
+
+    def batchdiff(self, feature, focus, statistics=None):
+        """Compute divergence for all positions at once
+
+        Statistics of all left and right windows are derived from one pass of
+        cumulative sums over the features. Divergence is NaN for windows
+        containing no frame.
+        """
+
+        if statistics is None:
+            statistics = SlidingWindowStatistics(
+                feature, covariance_type=self.covariance_type)
+
+        middle, gl, gr = statistics(self, focus)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return middle, self.divergence(gl, gr)
+
+
+class GaussianDivergenceMixin(DivergenceMixin):
+    """Diagonal gaussian divergence (see Gaussian.divergence)"""
+
+    def divergence(self, gl, gr):
+        return _divergence.gaussian_divergence(gl.diagonal(), gr.diagonal())
+
+
+class SymmetricKLMixin(DivergenceMixin):
+    """Symmetric Kullback-Leibler divergence"""
+
+    def divergence(self, gl, gr):
+        return _divergence.symmetric_kl(gl, gr)
+
+
+class GLRMixin(DivergenceMixin):
+    """Generalized likelihood ratio"""
 
-        gr = Gaussian(covariance_type='diag')
-        Xr = feature.crop(right)
-        gr.fit(Xr)
+    def divergence(self, gl, gr):
+        return _divergence.generalized_likelihood_ratio(gl, gr)
 
-        try:
-            divergence = gl.divergence(gr)
-        except:
-            divergence = np.NaN
 
-        return divergence
+class DeltaBICMixin(DivergenceMixin):
+    """ΔBIC (see `penalty_coef` attribute, defaults to 1)"""
+
+    penalty_coef = 1.
+
+    def divergence(self, gl, gr):
+        return _divergence.delta_bic(gl, gr, penalty_coef=self.penalty_coef)
+
+
+class HotellingT2Mixin(DivergenceMixin):
+    """Hotelling's T² statistic"""
+
+    def divergence(self, gl, gr):
+        return _divergence.hotelling_t2(gl, gr)
+
+
+class CosineMixin(DivergenceMixin):
+    """Cosine distance between left and right means"""
+
+    def divergence(self, gl, gr):
+        return _divergence.cosine_distance(gl, gr)
 
 
 class SegmentationGaussianDivergence(GaussianDivergenceMixin,
                                      SlidingWindowsSegmentation):
     pass
+
+
+class SegmentationSymmetricKL(SymmetricKLMixin, SlidingWindowsSegmentation):
+    pass
+
+
+class SegmentationGLR(GLRMixin, SlidingWindowsSegmentation):
+    pass
+
+
+class SegmentationDeltaBIC(DeltaBICMixin, SlidingWindowsSegmentation):
+    pass
+
+
+class SegmentationHotellingT2(HotellingT2Mixin, SlidingWindowsSegmentation):
+    pass
+
+
+class SegmentationCosine(CosineMixin, SlidingWindowsSegmentation):
+    pass
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from pyannote.core import Segment, Timeline
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+from .bic import BICSegmentation, OnlineBICSegmentation
+
+
+def get_features(n_turns=10, dimension=5, seed=0, last_turn=None):
+
+    random_state = np.random.RandomState(seed)
+    sliding_window = SlidingWindow(duration=0.02, step=0.01, start=0.)
+    centers = 3 * random_state.randn(3, dimension)
+
+    X = []
+    for i in range(n_turns):
+        n_samples = random_state.randint(150, 400)
+        if i == n_turns - 1 and last_turn is not None:
+            n_samples = last_turn
+        center = centers[i % len(centers)]
+        X.append(center + random_state.randn(n_samples, dimension))
+
+    return SlidingWindowFeature(np.vstack(X), sliding_window)
+
+
+def test_apply_batch():
+
+    segmentation = BICSegmentation(covariance_type='diag', min_duration=1.)
+
+    # several long segments per recording
+    batch = []
+    for seed in range(4):
+        features = get_features(seed=seed)
+        extent = features.getExtent()
+        middle = 0.5 * (extent.start + extent.end)
+        long_segments = Timeline(segments=[
+            Segment(extent.start, middle - 1.),
+            Segment(middle, extent.end)])
+        batch.append((features, long_segments))
+    batch.append((get_features(seed=4), None))
+
+    expected = [list(segmentation.apply(features, segmentation=segments))
+                for features, segments in batch]
+
+    for n_jobs, max_pending in [(1, None), (2, None), (2, 1)]:
+        results = segmentation.apply_batch(
+            iter(batch), n_jobs=n_jobs, max_pending=max_pending)
+        assert [list(result) for result, _ in results] == expected
+
+
+def check_online(features, covariance_type, chunk_size=137):
+
+    offline = BICSegmentation(covariance_type=covariance_type,
+                              min_duration=1., precision=0.1)
+    expected = list(offline.apply(features))
+
+    online = OnlineBICSegmentation(features.sliding_window,
+                                   covariance_type=covariance_type,
+                                   min_duration=1., precision=0.1)
+
+    X = features.data
+    segments = []
+    for i in range(0, len(X), chunk_size):
+        segments.extend(online.update(X[i:i + chunk_size]))
+    segments.extend(online.finalize())
+    assert segments == expected
+
+    # segmenter is reset by finalize and can be reused
+    chunks = (X[i:i + chunk_size] for i in range(0, len(X), chunk_size))
+    assert list(online.apply(chunks)) == expected
+
+
+def test_online():
+    for covariance_type in ['diag', 'full']:
+        check_online(get_features(seed=0), covariance_type)
+
+
+def test_online_short_last_turn():
+    # last speech turn is shorter than min_duration
+    features = get_features(seed=1, last_turn=50)
+    check_online(features, 'full')
+
+
+def test_online_short_stream():
+    # whole stream is shorter than min_duration
+    features = get_features(n_turns=1, seed=2, last_turn=60)
+    check_online(features, 'full')
+    assert len(list(BICSegmentation().apply(features))) == 1
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+from pyannote.core import Annotation, Segment
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+from .hmm import GMMSegmentation
+from .hmm_base import predict_batch
+
+
+def get_data(n_turns=12, n_speakers=3, dimension=5, seed=0):
+
+    # same speakers in all files
+    centers = 4 * np.random.RandomState(0).randn(n_speakers, dimension)
+
+    random_state = np.random.RandomState(seed)
+    sliding_window = SlidingWindow(duration=0.02, step=0.01, start=0.)
+
+    X = []
+    annotation = Annotation(uri='test')
+    t = 0
+    for i in range(n_turns):
+        speaker = random_state.randint(n_speakers)
+        n_samples = random_state.randint(100, 200)
+        X.append(centers[speaker] + random_state.randn(n_samples, dimension))
+        annotation[sliding_window.rangeToSegment(t, n_samples)] = \
+            'speaker{0}'.format(speaker)
+        t += n_samples
+
+    features = SlidingWindowFeature(np.vstack(X), sliding_window)
+    return features, annotation
+
+
+def check_labels(hypothesis, reference):
+    """Check label of the middle of every reference track"""
+    for segment, _, label in reference.itertracks(label=True):
+        middle = segment.middle
+        support = Segment(middle - 0.05, middle + 0.05)
+        assert hypothesis.crop(support).labels() == [label]
+
+
+def test_fit_predict():
+
+    store_dir = tempfile.mkdtemp()
+
+    try:
+        features_iter, annotation_iter = zip(
+            *[get_data(seed=seed) for seed in range(3)])
+
+        segmentation = GMMSegmentation(n_components=2, store_dir=store_dir)
+        segmentation.fit(features_iter, annotation_iter)
+
+        # temporary frame store is removed once trained
+        assert os.listdir(store_dir) == []
+
+        for features, annotation in zip(features_iter, annotation_iter):
+            hypothesis = segmentation.predict(features, min_duration=0.5)
+            check_labels(hypothesis, annotation)
+
+    finally:
+        shutil.rmtree(store_dir)
+
+
+def test_predict_batch():
+
+    tmp_dir = tempfile.mkdtemp()
+
+    try:
+        features_iter, annotation_iter = zip(
+            *[get_data(seed=seed) for seed in range(4)])
+
+        segmentation = GMMSegmentation(n_components=2)
+        segmentation.fit(features_iter[:1], annotation_iter[:1])
+
+        model_npz = os.path.join(tmp_dir, 'model.npz')
+        with open(model_npz, 'wb') as f:
+            segmentation.save(f)
+
+        features_pkl = os.path.join(tmp_dir, '{uri}.pkl')
+        uris = ['uri{0}'.format(i) for i in range(len(features_iter))]
+        for uri, features in zip(uris, features_iter):
+            with open(features_pkl.format(uri=uri), 'wb') as f:
+                pickle.dump(features, f)
+
+        expected = [
+            (uri, list(segmentation.predict(
+                features, min_duration=0.5).itertracks(label=True)))
+            for uri, features in zip(uris, features_iter)]
+
+        for n_jobs in [1, 2]:
+            hypotheses = predict_batch(model_npz, features_pkl, uris,
+                                       min_duration=0.5, n_jobs=n_jobs)
+            assert [(uri, list(hypothesis.itertracks(label=True)))
+                    for uri, hypothesis in hypotheses] == expected
+
+        # errors raised by workers are propagated
+        for n_jobs in [1, 2]:
+            hypotheses = predict_batch(model_npz, features_pkl,
+                                       uris + ['missing'], n_jobs=n_jobs)
+            try:
+                list(hypotheses)
+            except IOError:
+                pass
+            else:
+                raise AssertionError('IOError not raised')
+
+    finally:
+        shutil.rmtree(tmp_dir)
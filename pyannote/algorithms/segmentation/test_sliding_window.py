@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from pyannote.core import Segment, Timeline
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+from .sliding_window import SlidingWindowsSegmentation
+from .sliding_window import SegmentationGaussianDivergence
+from .sliding_window import SegmentationSymmetricKL, SegmentationGLR
+from .sliding_window import SlidingWindowStatistics
+
+
+def get_features(dimension=5, seed=0):
+
+    random_state = np.random.RandomState(seed)
+    sliding_window = SlidingWindow(duration=0.02, step=0.01, start=0.)
+    centers = 3 * random_state.randn(3, dimension)
+    X = np.vstack([centers[i % 3] + random_state.randn(n, dimension)
+                   for i, n in enumerate([300, 250, 400, 200, 350])])
+    return SlidingWindowFeature(X, sliding_window)
+
+
+def test_batchdiff():
+
+    features = get_features()
+    segmentation = SegmentationGaussianDivergence(duration=1., step=0.1)
+
+    # windows close to the end of focus go past the end of features
+    focus = features.getExtent()
+
+    # vectorized implementation...
+    middle, difference = segmentation.batchdiff(features, focus)
+
+    # ... vs. default one, based on iterdiff (i.e. one window at a time)
+    expected_middle, expected_difference = \
+        SlidingWindowsSegmentation.batchdiff(segmentation, features, focus)
+
+    np.testing.assert_allclose(middle, expected_middle)
+    np.testing.assert_allclose(difference, expected_difference,
+                               equal_nan=True)
+
+    # empty windows lead to NaN
+    assert np.any(np.isnan(difference))
+    assert not np.all(np.isnan(difference))
+
+
+def test_apply_within_focus():
+
+    features = get_features()
+    segmentation = SegmentationGaussianDivergence(duration=1., step=0.1)
+
+    # there is a high local maximum at 11.5s, i.e. after the end of focus
+    focus = Segment(3., 11.)
+    middle, difference = segmentation.batchdiff(features, focus)
+    i = np.argmin(np.abs(middle - 11.5))
+    assert difference[i] > max(difference[i - 1], difference[i + 1])
+
+    result = segmentation.apply(features, segmentation=Timeline([focus]))
+
+    # boundaries are only looked for within focus
+    assert result.extent() == focus
+    boundaries = [segment.start for segment in result][1:]
+    assert boundaries
+    assert all(focus.start < t < focus.end for t in boundaries)
+
+
+def test_shared_statistics():
+
+    features = get_features()
+    statistics = SlidingWindowStatistics(features)
+    assert statistics.covariance_type == 'diag'
+
+    for segmentation in [SegmentationGaussianDivergence(),
+                         SegmentationSymmetricKL(),
+                         SegmentationGLR()]:
+        shared = segmentation.apply(features, statistics=statistics)
+        assert list(shared) == list(segmentation.apply(features))
+
+    # full covariance algorithms need full covariance statistics
+    segmentation = SegmentationGLR(covariance_type='full')
+    try:
+        segmentation.apply(features, statistics=statistics)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+
+    statistics = SlidingWindowStatistics(features, covariance_type='full')
+    shared = segmentation.apply(features, statistics=statistics)
+    assert list(shared) == list(segmentation.apply(features))
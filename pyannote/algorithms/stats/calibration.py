@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Lightweight (scikit-learn free) log-likelihood ratio calibrations
+
+Calibrations trained with `pyannote.algorithms.stats.llr` are converted into
+a handful of coefficients (or a table) so that they can be stored in plain
+numpy arrays and applied without importing scikit-learn.
+"""
+
+from __future__ import unicode_literals
+
+import numpy as np
+
+
+class QuadraticLLR(object):
+    """Log-likelihood ratio as a polynomial of degree 2 of raw scores
+
+    Gaussian naive Bayes calibration (one Gaussian per class) boils down to
+    such a polynomial, and passthrough calibration is x -> x.
+
+    Parameters
+    ----------
+    coef : array-like, shape (3, )
+        Polynomial coefficients, highest degree first.
+    """
+
+    def __init__(self, coef=(0., 1., 0.)):
+        super(QuadraticLLR, self).__init__()
+        self.coef = np.asarray(coef, dtype=float)
+
+    def transform(self, X):
+        return np.polyval(self.coef, X)
+
+
+class TabulatedLLR(object):
+    """Log-likelihood ratio from a piecewise linear posterior
+
+    Isotonic regression calibration is a piecewise linear function of raw
+    scores (clipped outside of the table) returning posterior probabilities.
+
+    Parameters
+    ----------
+    x : array-like, shape (n, )
+        Increasing raw scores.
+    y : array-like, shape (n, )
+        Corresponding posterior probabilities (in ]0, 1[).
+    """
+
+    def __init__(self, x, y):
+        super(TabulatedLLR, self).__init__()
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+
+    def transform(self, X):
+        p = np.interp(X, self.x, self.y)
+        return np.log(p) - np.log(1. - p)
+
+
+def tabulate(calibration):
+    """Convert trained calibration into its lightweight counterpart
+
+    Parameters
+    ----------
+    calibration : LLRPassthrough, LLRNaiveBayes or LLRIsotonicRegression
+        Trained calibration (QuadraticLLR and TabulatedLLR instances are
+        returned as is).
+
+    Returns
+    -------
+    calibration : QuadraticLLR or TabulatedLLR
+    """
+
+    # scikit-learn is only needed when converting calibrations
+    from .llr import LLRPassthrough, LLRNaiveBayes, LLRIsotonicRegression
+
+    if isinstance(calibration, (QuadraticLLR, TabulatedLLR)):
+        return calibration
+
+    if isinstance(calibration, LLRPassthrough):
+        return QuadraticLLR()
+
+    if isinstance(calibration, LLRIsotonicRegression):
+        regression = calibration.regression_
+        return TabulatedLLR(regression.X_thresholds_,
+                            regression.y_thresholds_)
+
+    if isinstance(calibration, LLRNaiveBayes):
+
+        if len(calibration.classes_) != 2:
+            raise ValueError('Naive Bayes calibration must have 2 classes.')
+
+        # log p(x|1) p(1) - log p(x|0) p(0) with Gaussian p(x|c)
+        theta = calibration.theta_.reshape((-1, ))
+        var = getattr(calibration, 'var_', None)
+        if var is None:
+            var = calibration.sigma_
+        var = var.reshape((-1, ))
+        log_prior = np.log(calibration.class_prior_)
+
+        a = -0.5 / var
+        b = theta / var
+        c = log_prior - 0.5 * np.log(2. * np.pi * var) \
+            - 0.5 * theta ** 2 / var
+        return QuadraticLLR([a[1] - a[0], b[1] - b[0], c[1] - c[0]])
+
+    TEMPLATE = 'Unsupported calibration: {calibration}.'
+    raise TypeError(TEMPLATE.format(calibration=type(calibration).__name__))
+
+
+def logsumexp(a, b=None, axis=0):
+    """{Over|under}flow-robust computation of log(sum(b*exp(a)))
+
+    Parameters
+    ----------
+    a : numpy array
+    b :
+    """
+    a = np.rollaxis(a, axis)
+    vmax = np.nanmax(a, axis=0)
+    if b is None:
+        out = np.log(np.sum(np.exp(a - vmax), axis=0))
+    else:
+        b = np.atleast_2d(b).T
+        out = np.log(np.sum(b * np.exp(a - vmax), axis=0))
+    out += vmax
+    return out
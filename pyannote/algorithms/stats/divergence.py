@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Distances between (stacks of) Gaussians
+
+All functions take two GaussianStatistics instances (broadcast against each
+other) and return one value per pair of Gaussians. The larger the value, the
+more different the two Gaussians are.
+"""
+
+from __future__ import unicode_literals
+
+import numpy as np
+from .gaussian import _inv, bayesianInformationCriterion
+
+
+def _quadratic(dmean, precision, covariance_type):
+    """dmeanᵀ x precision x dmean"""
+    if covariance_type == 'diag':
+        return np.sum(dmean ** 2 * precision, axis=1)
+    return np.sum(dmean[:, :, np.newaxis] * precision *
+                  dmean[:, np.newaxis, :], axis=(1, 2))
+
+
+def gaussian_divergence(g1, g2):
+    """Gaussian divergence (see Gaussian.divergence)"""
+    return g1.divergence(g2)
+
+
+def symmetric_kl(g1, g2):
+    """Symmetric Kullback-Leibler divergence KL(g1||g2) + KL(g2||g1)"""
+
+    dmean = g1.mean - g2.mean
+    covar1, covar2 = g1.covar, g2.covar
+    inv_covar1, inv_covar2 = g1.inv_covar, g2.inv_covar
+    d = dmean.shape[1]
+
+    if g1.covariance_type == 'diag':
+        trace = np.sum(inv_covar2 * covar1 + inv_covar1 * covar2, axis=1)
+    else:
+        # covariance matrices are symmetric: tr(AB) = sum(A * B)
+        trace = np.sum(inv_covar2 * covar1 + inv_covar1 * covar2,
+                       axis=(1, 2))
+
+    return .5 * (trace + _quadratic(dmean, inv_covar1 + inv_covar2,
+                                    g1.covariance_type)) - d
+
+
+def generalized_likelihood_ratio(g1, g2):
+    """Generalized likelihood ratio
+
+    Log-likelihood ratio between modeling g1 and g2 samples with two
+    Gaussians and with only one Gaussian.
+    """
+    ratio, _ = bayesianInformationCriterion(g1, g2, returns_terms=True)
+    return .5 * ratio
+
+
+def delta_bic(g1, g2, penalty_coef=1.):
+    """ΔBIC (see bayesianInformationCriterion)"""
+    return bayesianInformationCriterion(g1, g2, penalty_coef=penalty_coef)
+
+
+def hotelling_t2(g1, g2):
+    """Hotelling's two-sample T² statistic (with pooled covariance)"""
+
+    n1, n2 = g1.n_samples, g2.n_samples
+    dmean = g1.mean - g2.mean
+
+    if g1.covariance_type == 'diag':
+        n1, n2 = n1[:, np.newaxis], n2[:, np.newaxis]
+        pooled = (n1 * g1.covar + n2 * g2.covar) / (n1 + n2 - 2)
+        precision = 1. / pooled
+    else:
+        n1, n2 = n1[:, np.newaxis, np.newaxis], n2[:, np.newaxis, np.newaxis]
+        pooled = (n1 * g1.covar + n2 * g2.covar) / (n1 + n2 - 2)
+        precision = _inv(pooled)
+
+    n1, n2 = g1.n_samples, g2.n_samples
+    return n1 * n2 / (n1 + n2) * _quadratic(dmean, precision,
+                                            g1.covariance_type)
+
+
+def cosine_distance(g1, g2):
+    """Cosine distance between means"""
+    mean1, mean2 = g1.mean, g2.mean
+    return 1. - np.sum(mean1 * mean2, axis=1) / (
+        np.linalg.norm(mean1, axis=1) * np.linalg.norm(mean2, axis=1))
@@ -0,0 +1,557 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Expectation-maximization for Gaussian mixture models
+
+Sufficient statistics are accumulated chunk by chunk, so that mixtures can be
+trained on sets of samples that do not fit in memory (e.g. memory-mapped
+arrays or frames streamed from many files).
+"""
+
+from __future__ import unicode_literals
+
+import six.moves
+import numpy as np
+
+EPS = np.finfo(float).eps
+
+
+def _logsumexp(a, axis=1):
+    """log(sum(exp(a))) along given axis (defaults to row-wise)"""
+    a_max = np.max(a, axis=axis, keepdims=True)
+    with np.errstate(invalid='ignore'):
+        out = np.log(np.sum(np.exp(a - a_max), axis=axis, keepdims=True))
+    return np.squeeze(out + a_max, axis=axis)
+
+
+def _diag_log_prob(X, weights, means, covars):
+    """(n_samples, n_components) log [weight x component likelihood]"""
+    n_features = means.shape[1]
+    precisions = 1. / covars
+    return np.log(weights) - .5 * (
+        n_features * np.log(2 * np.pi) +
+        np.sum(np.log(covars), axis=1) +
+        np.sum(means ** 2 * precisions, axis=1) -
+        2 * np.dot(X, (means * precisions).T) +
+        np.dot(X ** 2, precisions.T))
+
+
+def iter_chunks(X, chunk_size=10000):
+    """Iterate over chunks of samples
+
+    Parameters
+    ----------
+    X : array-like or iterable of array-like
+        (n_samples, n_features) array (possibly memory-mapped), or iterable
+        of such arrays (e.g. one per file).
+    chunk_size : int, optional
+        Maximum number of samples per chunk. Defaults to 10000.
+
+    Yields
+    ------
+    chunk : (n_chunk_samples, n_features) np.ndarray
+    """
+
+    if hasattr(X, 'shape'):
+        X = [X]
+
+    for x in X:
+        for i in six.moves.range(0, len(x), chunk_size):
+            yield np.asarray(x[i:i + chunk_size], dtype=np.float64)
+
+
+class MixtureStatistics(object):
+    """Sufficient statistics of a Gaussian mixture
+
+    Parameters
+    ----------
+    n_components : int
+    n_features : int
+    covariance_type : {'diag', 'full'}, optional
+        Defaults to 'diag'.
+
+    Attributes
+    ----------
+    n_samples : float
+        Number of samples.
+    log_likelihood : float
+        Total log-likelihood of samples.
+    zeroth : (n_components, ) np.ndarray
+        Sum of responsibilities (soft counts).
+    first : (n_components, n_features) np.ndarray
+        Responsibility-weighted sum of samples.
+    second : np.ndarray
+        Responsibility-weighted sum of squared samples, with shape
+        (n_components, n_features) for 'diag' covariance and
+        (n_components, n_features, n_features) for 'full' covariance.
+    """
+
+    def __init__(self, n_components, n_features, covariance_type='diag'):
+        super(MixtureStatistics, self).__init__()
+        self.covariance_type = covariance_type
+        self.n_samples = 0.
+        self.log_likelihood = 0.
+        self.zeroth = np.zeros((n_components, ))
+        self.first = np.zeros((n_components, n_features))
+        if covariance_type == 'full':
+            self.second = np.zeros((n_components, n_features, n_features))
+        else:
+            self.second = np.zeros((n_components, n_features))
+
+    def _combine(self, other, a, b):
+        combined = MixtureStatistics(
+            len(self.zeroth), self.first.shape[1],
+            covariance_type=self.covariance_type)
+        for attribute in ['n_samples', 'log_likelihood',
+                          'zeroth', 'first', 'second']:
+            setattr(combined, attribute, (a * getattr(self, attribute) +
+                                          b * getattr(other, attribute)))
+        return combined
+
+    def __add__(self, other):
+        return self._combine(other, 1., 1.)
+
+    def interpolate(self, other, step):
+        """(1 - step) x self + step x other (used by stepwise EM)"""
+        return self._combine(other, 1. - step, step)
+
+    def normalize(self):
+        """Per-sample statistics"""
+        return self._combine(self, 1. / max(self.n_samples, EPS), 0.)
+
+
+class GaussianMixture(object):
+    """Gaussian mixture model trained with (chunked) expectation-maximization
+
+    Parameters and attributes mimic (now removed) sklearn.mixture.GMM so that
+    both can be used interchangeably.
+
+    Parameters
+    ----------
+    n_components : int, optional
+        Number of mixture components. Defaults to 1.
+    covariance_type : {'diag', 'full'}, optional
+        Defaults to 'diag'.
+    random_state: RandomState or an int seed (None by default)
+        A random number generator instance
+    tol : float, optional
+        Convergence threshold on average log-likelihood gain.
+        Defaults to 1e-2.
+    min_covar : float, optional
+        Floor on the diagonal of the covariance matrix to prevent
+        overfitting.  Defaults to 1e-3.
+    n_iter : int, optional
+        Number of EM iterations to perform. Defaults to 10.
+    n_init : int, optional
+        Number of initializations to perform. the best results is kept
+    params : string, optional
+        Controls which parameters are updated in the training
+        process.  Can contain any combination of 'w' for weights,
+        'm' for means, and 'c' for covars.  Defaults to 'wmc'.
+    init_params : string, optional
+        Controls which parameters are updated in the initialization
+        process.  Can contain any combination of 'w' for weights,
+        'm' for means, and 'c' for covars.  Defaults to 'wmc'.
+    chunk_size : int, optional
+        Number of samples processed at once. Defaults to 10000.
+    step_decay : float, optional
+        Stepwise EM (see `partial_fit`) uses step size (t + 2) ^ -step_decay
+        for t-th chunk. Must be in (0.5, 1]. Defaults to 0.6.
+
+    Attributes
+    ----------
+    weights_ : (n_components, ) np.ndarray
+    means_ : (n_components, n_features) np.ndarray
+    covars_ : np.ndarray
+        (n_components, n_features) for 'diag' covariance and
+        (n_components, n_features, n_features) for 'full' covariance.
+    converged_ : bool
+        True when convergence was reached in fit(), False otherwise.
+
+    Usage
+    -----
+    >>> gmm = GaussianMixture(n_components=16)
+    >>> # X can be a (memory-mapped) array or a (re-iterable) list of arrays
+    >>> gmm.fit(X)
+    >>> # stepwise EM, one chunk at a time
+    >>> for x in stream:
+    ...     gmm.partial_fit(x)
+    """
+
+    def __init__(self, n_components=1, covariance_type='diag',
+                 random_state=None, tol=1e-2, min_covar=1e-3,
+                 n_iter=10, n_init=1, params='wmc', init_params='wmc',
+                 chunk_size=10000, step_decay=0.6):
+
+        if covariance_type not in ['diag', 'full']:
+            raise NotImplementedError(
+                'Only diagonal and full covariances are supported.')
+
+        super(GaussianMixture, self).__init__()
+
+        self.n_components = n_components
+        self.covariance_type = covariance_type
+        self.random_state = random_state
+        self.tol = tol
+        self.min_covar = min_covar
+        self.n_iter = n_iter
+        self.n_init = n_init
+        self.params = params
+        self.init_params = init_params
+        self.chunk_size = chunk_size
+        self.step_decay = step_decay
+
+        self.weights_ = np.ones((n_components, )) / n_components
+        self.converged_ = False
+
+    def _random_state(self):
+        """Random number generator (to be resolved once per call to fit)
+
+        With an int seed, a new generator is seeded at each call, so that
+        `fit` is reproducible while restarts of a given `fit` still differ.
+        """
+        if isinstance(self.random_state, np.random.RandomState):
+            return self.random_state
+        return np.random.RandomState(self.random_state)
+
+    # -- INITIALIZATION -------------------------------------------------------
+
+    def _sample(self, X, n_samples, random_state):
+        """Uniform sample of at most n_samples samples (one pass)"""
+
+        # reservoir sampling
+        sample = None
+        seen = 0
+        for x in iter_chunks(X, chunk_size=self.chunk_size):
+
+            if sample is None:
+                sample = np.empty((n_samples, x.shape[1]))
+
+            n = len(x)
+            n_fill = min(max(n_samples - seen, 0), n)
+            sample[seen:seen + n_fill] = x[:n_fill]
+
+            # replace samples of the reservoir with decreasing probability
+            if n_fill < n:
+                positions = seen + np.arange(n_fill, n)
+                j = (random_state.random_sample(len(positions)) *
+                     (positions + 1)).astype(int)
+                for k in np.where(j < n_samples)[0]:
+                    sample[j[k]] = x[n_fill + k]
+
+            seen += n
+
+        if sample is None:
+            raise ValueError('Cannot fit a mixture without samples.')
+
+        return sample[:min(seen, n_samples)]
+
+    def _kmeans(self, X, random_state, n_iter=10):
+        """Lloyd's algorithm, initialized with random samples"""
+
+        n_components = min(self.n_components, len(X))
+        indices = random_state.choice(len(X), n_components, replace=False)
+        centers = X[np.sort(indices)]
+
+        for _ in six.moves.range(n_iter):
+            distances = (np.sum(X ** 2, axis=1)[:, np.newaxis] -
+                         2 * np.dot(X, centers.T) +
+                         np.sum(centers ** 2, axis=1))
+            assignment = np.argmin(distances, axis=1)
+            for k in six.moves.range(n_components):
+                members = X[assignment == k]
+                if len(members):
+                    centers[k] = np.mean(members, axis=0)
+
+        # not enough samples: duplicate centers
+        if n_components < self.n_components:
+            centers = centers[np.arange(self.n_components) % n_components]
+
+        return centers
+
+    def _initialize(self, X, random_state, force=False):
+        """Initialize parameters from a sample of X
+
+        Parameters in `init_params` are initialized when `force` is True.
+        Missing parameters are always initialized.
+
+        Parameters
+        ----------
+        X : array-like or iterable of array-like
+        random_state : np.random.RandomState
+            Shared by successive calls (e.g. `n_init` restarts) so that they
+            draw different samples and k-means starting points.
+        force : bool, optional
+        """
+
+        init_params = self.init_params if force else ''
+        missing = [attribute for attribute in ['weights_', 'means_', 'covars_']
+                   if not hasattr(self, attribute)]
+        if not init_params and not missing:
+            return
+
+        sample = self._sample(X, 100 * self.n_components, random_state)
+
+        if 'm' in init_params or not hasattr(self, 'means_'):
+            self.means_ = self._kmeans(sample, random_state)
+
+        if 'w' in init_params or not hasattr(self, 'weights_'):
+            self.weights_ = np.ones((self.n_components, )) / self.n_components
+
+        if 'c' in init_params or not hasattr(self, 'covars_'):
+            n_features = sample.shape[1]
+            if self.covariance_type == 'full':
+                covar = np.atleast_2d(np.cov(sample, rowvar=False))
+                covar = covar + self.min_covar * np.eye(n_features)
+                self.covars_ = np.tile(covar, (self.n_components, 1, 1))
+            else:
+                covar = np.var(sample, axis=0) + self.min_covar
+                self.covars_ = np.tile(covar, (self.n_components, 1))
+
+    # -- EXPECTATION ----------------------------------------------------------
+
+    def _log_prob(self, X):
+        """(n_samples, n_components) log [weight x component likelihood]"""
+
+        if self.covariance_type == 'diag':
+            return _diag_log_prob(X, self.weights_, self.means_, self.covars_)
+
+        n_features = self.means_.shape[1]
+        log_prob = np.empty((len(X), self.n_components))
+        for k, (mean, covar) in enumerate(zip(self.means_, self.covars_)):
+            L = np.linalg.cholesky(covar)
+            solved = np.linalg.solve(L, (X - mean).T)
+            log_prob[:, k] = -.5 * (
+                n_features * np.log(2 * np.pi) +
+                2 * np.sum(np.log(np.diag(L))) +
+                np.sum(solved ** 2, axis=0))
+
+        return log_prob + np.log(self.weights_)
+
+    def score_samples(self, X):
+        """Log-likelihood and responsibilities
+
+        Parameters
+        ----------
+        X : (n_samples, n_features) array-like
+
+        Returns
+        -------
+        logprob : (n_samples, ) np.ndarray
+            Log-likelihood of each sample.
+        responsibilities : (n_samples, n_components) np.ndarray
+            Posterior probability of each component for each sample.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        log_prob = self._log_prob(X)
+        logprob = _logsumexp(log_prob)
+        responsibilities = np.exp(log_prob - logprob[:, np.newaxis])
+        return logprob, responsibilities
+
+    def score(self, X):
+        """Log-likelihood of each sample
+
+        Parameters
+        ----------
+        X : (n_samples, n_features) array-like
+
+        Returns
+        -------
+        logprob : (n_samples, ) np.ndarray
+        """
+        return np.hstack([
+            _logsumexp(self._log_prob(x))
+            for x in iter_chunks(X, chunk_size=self.chunk_size)])
+
+    def accumulate(self, X, statistics=None):
+        """Accumulate sufficient statistics (E-step)
+
+        Parameters
+        ----------
+        X : array-like or iterable of array-like
+            See `iter_chunks`.
+        statistics : MixtureStatistics, optional
+            Add to these statistics (in place).
+
+        Returns
+        -------
+        statistics : MixtureStatistics
+        """
+
+        # second order statistics are only needed to update covariances
+        second_order = 'c' in self.params
+
+        for x in iter_chunks(X, chunk_size=self.chunk_size):
+
+            if statistics is None:
+                statistics = MixtureStatistics(
+                    self.n_components, x.shape[1],
+                    covariance_type=self.covariance_type)
+
+            logprob, responsibilities = self.score_samples(x)
+
+            statistics.n_samples += len(x)
+            statistics.log_likelihood += np.sum(logprob)
+            statistics.zeroth += np.sum(responsibilities, axis=0)
+            statistics.first += np.dot(responsibilities.T, x)
+            if not second_order:
+                continue
+            if self.covariance_type == 'full':
+                statistics.second += np.einsum(
+                    'nk,ni,nj->kij', responsibilities, x, x, optimize=True)
+            else:
+                statistics.second += np.dot(responsibilities.T, x ** 2)
+
+        if statistics is None:
+            raise ValueError(
+                'No samples. Note that iterables of chunks must be '
+                're-iterable (use partial_fit for single-pass streams).')
+
+        return statistics
+
+    # -- MAXIMIZATION ---------------------------------------------------------
+
+    def maximize(self, statistics):
+        """Update parameters in `params` from sufficient statistics (M-step)
+
+        Parameters
+        ----------
+        statistics : MixtureStatistics
+        """
+
+        zeroth = statistics.zeroth + 10 * EPS
+
+        if 'w' in self.params:
+            self.weights_ = zeroth / np.sum(zeroth)
+
+        avg_first = statistics.first / zeroth[:, np.newaxis]
+
+        if 'm' in self.params:
+            self.means_ = avg_first
+
+        if 'c' in self.params:
+
+            means = self.means_
+
+            if self.covariance_type == 'full':
+                avg_second = statistics.second / zeroth[:, np.newaxis,
+                                                        np.newaxis]
+                cross = np.einsum('ki,kj->kij', avg_first, means)
+                covars = (avg_second - cross - cross.transpose(0, 2, 1) +
+                          np.einsum('ki,kj->kij', means, means))
+                n_features = means.shape[1]
+                self.covars_ = covars + self.min_covar * np.eye(n_features)
+
+            else:
+                avg_second = statistics.second / zeroth[:, np.newaxis]
+                covars = avg_second - 2 * avg_first * means + means ** 2
+                self.covars_ = np.maximum(covars, 0.) + self.min_covar
+
+        return self
+
+    # -- TRAINING -------------------------------------------------------------
+
+    def fit(self, X, y=None):
+        """Estimate model parameters with the EM algorithm
+
+        Parameters
+        ----------
+        X : array-like or iterable of array-like
+            (n_samples, n_features) array (possibly memory-mapped), or
+            iterable of such arrays (e.g. one per file). Samples are processed
+            by chunks of `chunk_size` samples, one pass per iteration: an
+            iterable must therefore be re-iterable (not a generator).
+        """
+
+        best_log_likelihood = -np.inf
+        best_params = None
+
+        random_state = self._random_state()
+
+        for _ in six.moves.range(self.n_init):
+
+            self._initialize(X, random_state, force=True)
+
+            self.converged_ = False
+            previous = None
+            log_likelihood = -np.inf
+
+            for _ in six.moves.range(self.n_iter):
+
+                statistics = self.accumulate(X)
+                log_likelihood = (statistics.log_likelihood /
+                                  statistics.n_samples)
+
+                if previous is not None and \
+                   abs(log_likelihood - previous) < self.tol:
+                    self.converged_ = True
+                    break
+                previous = log_likelihood
+
+                self.maximize(statistics)
+
+            if self.n_init == 1:
+                return self
+
+            if log_likelihood > best_log_likelihood or best_params is None:
+                best_log_likelihood = log_likelihood
+                best_params = (self.weights_, self.means_, self.covars_,
+                               self.converged_)
+
+        self.weights_, self.means_, self.covars_, self.converged_ = \
+            best_params
+
+        return self
+
+    def partial_fit(self, X, y=None):
+        """Stepwise (online) EM update with one chunk of samples
+
+        Per-sample sufficient statistics are interpolated with those of
+        previous chunks using a decreasing step size, and parameters are
+        updated right away. Missing parameters are initialized from the
+        first chunk.
+
+        Parameters
+        ----------
+        X : (n_samples, n_features) array-like
+        """
+
+        if not hasattr(self, 'means_') or not hasattr(self, 'covars_'):
+            self._initialize(X, self._random_state())
+
+        statistics = self.accumulate(X).normalize()
+
+        n_steps = getattr(self, 'n_steps_', 0)
+        if n_steps == 0:
+            self.statistics_ = statistics
+        else:
+            step = (n_steps + 2) ** -self.step_decay
+            self.statistics_ = self.statistics_.interpolate(statistics, step)
+        self.n_steps_ = n_steps + 1
+
+        return self.maximize(self.statistics_)
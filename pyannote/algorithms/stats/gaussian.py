@@ -32,6 +32,15 @@ import numpy as np
 
 
 class Gaussian(object):
+    """Gaussian
+
+    Parameters
+    ----------
+    covariance_type : {'full', 'diag'}, optional
+        Defaults to 'full'. Diagonal covariance matrices are internally
+        stored as variance vectors so that fitting, merging, inverting and
+        computing their log-determinant only costs O(d).
+    """
 
     def __init__(self, covariance_type='full'):
 
@@ -66,22 +75,42 @@ class Gaussian(object):
 
     def __set_covar(self, covar):
         """Set covariance and reset its inverse & log-determinant"""
+        # diagonal covariance matrices are stored as variance vectors
+        if self.covariance_type == 'diag' and np.ndim(covar) == 2:
+            covar = np.diag(covar)
         self._covar = covar
         self._inv_covar = None
         self._log_det_covar = None
 
     def __get_covar(self):
         """Get covariance"""
+        if self.covariance_type == 'diag' and self._covar is not None:
+            return np.diag(self._covar)
         return self._covar
 
     covar = property(fset=__set_covar, fget=__get_covar)
     """Covariance matrix"""
 
+    def __get_var(self):
+        """Get variance"""
+        if self.covariance_type == 'diag':
+            return self._covar
+        return np.diag(self._covar)
+
+    var = property(fget=__get_var)
+    """Variance (i.e. diagonal of covariance matrix)"""
+
     def __get_inv_covar(self):
         """Pre-compute and/or return pre-computed inverse of covariance"""
 
         if self._inv_covar is None:
-            self._inv_covar = np.linalg.inv(self.covar)
+            if self.covariance_type == 'diag':
+                self._inv_covar = 1. / self._covar
+            else:
+                self._inv_covar = np.linalg.inv(self._covar)
+
+        if self.covariance_type == 'diag':
+            return np.diag(self._inv_covar)
         return self._inv_covar
 
     inv_covar = property(fget=__get_inv_covar)
@@ -91,7 +120,10 @@ class Gaussian(object):
         """Pre-compute and/or return pre-computed log |covar|"""
 
         if self._log_det_covar is None:
-            _, self._log_det_covar = np.linalg.slogdet(self.covar)
+            if self.covariance_type == 'diag':
+                self._log_det_covar = np.sum(np.log(self._covar))
+            else:
+                _, self._log_det_covar = np.linalg.slogdet(self._covar)
 
         return self._log_det_covar
 
@@ -107,7 +139,7 @@ class Gaussian(object):
         if self.covariance_type == 'full':
             self.covar = np.cov(X.T, ddof=0)
         elif self.covariance_type == 'diag':
-            self.covar = np.diag(np.diag(np.cov(X.T, ddof=0), k=0))
+            self.covar = np.var(X, axis=0)
 
         # keep track of number of samples
         self.n_samples = len(X)
@@ -127,11 +159,11 @@ class Gaussian(object):
 
         if n1 == 0:
             g.mean = other.mean
-            g.covar = other.covar
+            g.covar = other._covar
 
         elif n2 == 0:
             g.mean = self.mean
-            g.covar = self.covar
+            g.covar = self._covar
 
         else:
 
@@ -140,15 +172,19 @@ class Gaussian(object):
             g.mean = m.reshape((1, -1))
 
             # covariance
-            k1 = self.covar
-            k2 = other.covar
-            k = 1. / n * (n1 * (k1 + self.mean_square) +
-                          n2 * (k2 + other.mean_square)) \
-                - np.dot(m.T, m)
-
-            # make it diagonal if needed
             if self.covariance_type == 'diag':
-                k = np.diag(np.diag(k, k=0))
+                m1 = self.mean.ravel()
+                m2 = other.mean.ravel()
+                k = 1. / n * (n1 * (self._covar + m1 ** 2) +
+                              n2 * (other._covar + m2 ** 2)) \
+                    - m.ravel() ** 2
+
+            else:
+                k1 = self.covar
+                k2 = other.covar
+                k = 1. / n * (n1 * (k1 + self.mean_square) +
+                              n2 * (k2 + other.mean_square)) \
+                    - np.dot(m.T, m)
 
             g.covar = k
 
@@ -173,12 +209,21 @@ class Gaussian(object):
         Gaussian divergence
         """
         dmean = self.mean - g.mean
-        return np.float(
-            dmean.dot(np.sqrt(self.inv_covar * g.inv_covar)).dot(dmean.T)
-        )
+
+        if self.covariance_type == 'diag' and g.covariance_type == 'diag':
+            # O(d): variances are used directly (no d x d matrices)
+            return float(np.sum(
+                dmean.ravel() ** 2 / np.sqrt(self._covar * g._covar)))
+
+        return dmean.dot(
+            np.sqrt(self.inv_covar * g.inv_covar)).dot(dmean.T).item()
 
 
 class RollingGaussian(Gaussian):
+    """Gaussian incrementally updated as a window slides over samples
+
+    See CumulativeGaussianStatistics for statistics of many windows at once.
+    """
 
     def __init__(self, covariance_type='full'):
         super(RollingGaussian, self).__init__(covariance_type=covariance_type)
@@ -201,11 +246,9 @@ class RollingGaussian(Gaussian):
             self.end = end
             return super(RollingGaussian, self).fit(X[start:end])
 
-        i_index = list(range(start, self.start)) + list(range(self.end, end))
-        o_index = list(range(self.start, start)) + list(range(end, self.end))
-
-        i_x = np.take(X, i_index, axis=0)
-        o_x = np.take(X, o_index, axis=0)
+        # entering and leaving samples (empty slices when not applicable)
+        i_x = np.concatenate([X[start:self.start], X[self.end:end]])
+        o_x = np.concatenate([X[self.start:start], X[end:self.end]])
 
         n_old = self.n_samples
         n_in = len(i_x)
@@ -226,23 +269,35 @@ class RollingGaussian(Gaussian):
 
         # estimate new covariance
 
-        cov_old = self.covar
+        cov_old = self._covar
 
-        cov_in = (np.cov(i_x.T, ddof=0)
-                  if n_in else np.zeros((d, d)))
-        cov_out = (np.cov(o_x.T, ddof=0)
-                   if n_out else np.zeros((d, d)))
+        if self.covariance_type == 'diag':
 
-        cov_new = (
-            (
-                n_old * (cov_old + np.dot(mu_old.T, mu_old))
-                + n_in * (cov_in + np.dot(mu_in.T, mu_in))
-                - n_out * (cov_out + np.dot(mu_out.T, mu_out))
-            ) / (n_old + n_in - n_out) - np.dot(mu_new.T, mu_new)
-        )
+            cov_in = np.var(i_x, axis=0) if n_in else np.zeros((d, ))
+            cov_out = np.var(o_x, axis=0) if n_out else np.zeros((d, ))
 
-        if self.covariance_type == 'diag':
-            cov_new = np.diag(np.diag(cov_new, k=0))
+            cov_new = (
+                (
+                    n_old * (cov_old + mu_old.ravel() ** 2)
+                    + n_in * (cov_in + mu_in.ravel() ** 2)
+                    - n_out * (cov_out + mu_out.ravel() ** 2)
+                ) / (n_old + n_in - n_out) - mu_new.ravel() ** 2
+            )
+
+        else:
+
+            cov_in = (np.cov(i_x.T, ddof=0)
+                      if n_in else np.zeros((d, d)))
+            cov_out = (np.cov(o_x.T, ddof=0)
+                       if n_out else np.zeros((d, d)))
+
+            cov_new = (
+                (
+                    n_old * (cov_old + np.dot(mu_old.T, mu_old))
+                    + n_in * (cov_in + np.dot(mu_in.T, mu_in))
+                    - n_out * (cov_out + np.dot(mu_out.T, mu_out))
+                ) / (n_old + n_in - n_out) - np.dot(mu_new.T, mu_new)
+            )
 
         # remember everything
 
@@ -256,16 +311,403 @@ class RollingGaussian(Gaussian):
         return self
 
 
+class GaussianStatistics(object):
+    """Sufficient statistics of one or more Gaussians
+
+    Gaussians are stored as their number of samples n, sum of samples Σx and
+    sum of outer products Σxxᵀ (only its diagonal for 'diag' covariance), so
+    that merging two Gaussians is a simple sum and log-determinants of many
+    covariance matrices can be obtained with one stacked LAPACK call.
+
+    Parameters
+    ----------
+    covariance_type : {'full', 'diag'}, optional
+        Defaults to 'full'.
+
+    Attributes
+    ----------
+    n_samples : (n_gaussians, ) np.ndarray
+    sum_x : (n_gaussians, dimension) np.ndarray
+    sum_xx : (n_gaussians, dimension, dimension) np.ndarray
+        (n_gaussians, dimension) for 'diag' covariance.
+    """
+
+    def __init__(self, covariance_type='full'):
+
+        if covariance_type not in ['full', 'diag']:
+            raise ValueError("Invalid value for covariance_type: %s"
+                             % covariance_type)
+
+        super(GaussianStatistics, self).__init__()
+        self.covariance_type = covariance_type
+
+    def _set(self, n_samples, sum_x, sum_xx):
+        """Set statistics and reset cached values"""
+        self.n_samples = n_samples
+        self.sum_x = sum_x
+        self.sum_xx = sum_xx
+        self._cholesky = None
+        self._log_det_covar = None
+        return self
+
+    def fit(self, X):
+        """Compute statistics of one Gaussian"""
+
+        X = np.asarray(X, dtype=float)
+
+        if self.covariance_type == 'diag':
+            sum_xx = np.sum(X ** 2, axis=0)
+        else:
+            sum_xx = np.dot(X.T, X)
+
+        return self._set(np.array([len(X)], dtype=float),
+                         np.sum(X, axis=0)[np.newaxis],
+                         sum_xx[np.newaxis])
+
+    @classmethod
+    def stack(cls, statistics):
+        """Stack statistics into one GaussianStatistics instance"""
+
+        statistics = list(statistics)
+        stacked = cls(covariance_type=statistics[0].covariance_type)
+        stacked._set(np.concatenate([g.n_samples for g in statistics]),
+                     np.concatenate([g.sum_x for g in statistics]),
+                     np.concatenate([g.sum_xx for g in statistics]))
+
+        # keep track of already computed log-determinants
+        if all(g._log_det_covar is not None for g in statistics):
+            stacked._log_det_covar = np.concatenate(
+                [g._log_det_covar for g in statistics])
+
+        return stacked
+
+    def __len__(self):
+        return len(self.n_samples)
+
+    def __getitem__(self, index):
+        """Get a subset of the stack (as a GaussianStatistics instance)"""
+
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 if index != -1 else None)
+
+        g = GaussianStatistics(covariance_type=self.covariance_type)
+        g._set(self.n_samples[index], self.sum_x[index], self.sum_xx[index])
+        if self._cholesky is not None:
+            g._cholesky = self._cholesky[index]
+        if self._log_det_covar is not None:
+            g._log_det_covar = self._log_det_covar[index]
+        return g
+
+    @property
+    def mean(self):
+        """(n_gaussians, dimension) mean"""
+        return self.sum_x / self.n_samples[:, np.newaxis]
+
+    @property
+    def covar(self):
+        """Covariance (diagonal only for 'diag' covariance)"""
+        mean = self.mean
+        if self.covariance_type == 'diag':
+            return self.sum_xx / self.n_samples[:, np.newaxis] - mean ** 2
+        return self.sum_xx / self.n_samples[:, np.newaxis, np.newaxis] \
+            - mean[:, :, np.newaxis] * mean[:, np.newaxis, :]
+
+    @property
+    def inv_covar(self):
+        """Inverse of covariance (NaN for singular covariance matrices)"""
+        if self.covariance_type == 'diag':
+            return 1. / self.covar
+        return _inv(self.covar)
+
+    def diagonal(self):
+        """Get diagonal covariance version of these statistics"""
+        if self.covariance_type == 'diag':
+            return self
+        g = GaussianStatistics(covariance_type='diag')
+        return g._set(self.n_samples, self.sum_x,
+                      np.diagonal(self.sum_xx, axis1=1, axis2=2))
+
+    @property
+    def cholesky(self):
+        """Cholesky factor of covariance matrices ('full' only)"""
+        if self._cholesky is None:
+            self._cholesky = np.linalg.cholesky(self.covar)
+        return self._cholesky
+
+    @property
+    def log_det_covar(self):
+        """(n_gaussians, ) logarithm of covariance determinant"""
+
+        if self._log_det_covar is None:
+
+            if self.covariance_type == 'diag':
+                self._log_det_covar = np.sum(np.log(self.covar), axis=1)
+
+            else:
+                try:
+                    diagonal = np.diagonal(self.cholesky, axis1=1, axis2=2)
+                    self._log_det_covar = 2. * np.sum(np.log(diagonal), axis=1)
+                # at least one covariance matrix is not positive definite
+                except np.linalg.LinAlgError as e:
+                    _, self._log_det_covar = np.linalg.slogdet(self.covar)
+
+        return self._log_det_covar
+
+    def precompute(self):
+        """Compute (and cache) log-determinants of covariance matrices
+
+        Cached log-determinants are kept by `stack` and `__getitem__`.
+        """
+        self._log_det_covar = self.log_det_covar
+        return self
+
+    def merge(self, other):
+        """Merge Gaussians (with broadcasting)"""
+        g = GaussianStatistics(covariance_type=self.covariance_type)
+        return g._set(self.n_samples + other.n_samples,
+                      self.sum_x + other.sum_x,
+                      self.sum_xx + other.sum_xx)
+
+    def sum(self):
+        """Merge all Gaussians of the stack into one"""
+        g = GaussianStatistics(covariance_type=self.covariance_type)
+        return g._set(np.sum(self.n_samples, keepdims=True),
+                      np.sum(self.sum_x, axis=0, keepdims=True),
+                      np.sum(self.sum_xx, axis=0, keepdims=True))
+
+    def bic(self, other, penalty_coef=3.5, merged=None):
+
+        if merged is None:
+            # merge self and other
+            g = self.merge(other)
+        else:
+            g = merged
+
+        delta_bic = bayesianInformationCriterion(
+            self, other, g=g, penalty_coef=penalty_coef)
+
+        # return delta bic & merged gaussian
+        return delta_bic, g
+
+    def divergence(self, other):
+        """Gaussian divergence (with broadcasting)
+
+        Vectorized version of Gaussian.divergence.
+        """
+
+        dmean = self.mean - other.mean
+
+        if self.covariance_type == 'diag':
+            return np.sum(
+                dmean ** 2 / np.sqrt(self.covar * other.covar), axis=1)
+
+        inv_covar = np.sqrt(self.inv_covar * other.inv_covar)
+        return np.sum(dmean[:, :, np.newaxis] * inv_covar *
+                      dmean[:, np.newaxis, :], axis=(1, 2))
+
+
+class CumulativeGaussianStatistics(object):
+    """Cumulative sufficient statistics of a sequence of samples
+
+    Prefix sums of samples Σx and of their outer products Σxxᵀ (only its
+    diagonal for 'diag' covariance) are computed once, so that statistics of
+    any window X[start:end] are obtained in O(d²) (O(d) for 'diag') without
+    touching the samples again -- and for many windows at once.
+
+    In exchange, (n_samples + 1) x d x d floats are kept in memory for 'full'
+    covariance ((n_samples + 1) x d for 'diag'), d times more than the
+    samples themselves.
+
+    Parameters
+    ----------
+    covariance_type : {'full', 'diag'}, optional
+        Defaults to 'full'.
+
+    Usage
+    -----
+    >>> cumulative = CumulativeGaussianStatistics().fit(X)
+    >>> g = cumulative.window(10, 110)
+    >>> # left and right windows of all candidate boundaries at once
+    >>> left = cumulative.window(0, boundaries)
+    >>> right = cumulative.window(boundaries, len(X))
+    """
+
+    def __init__(self, covariance_type='full'):
+
+        if covariance_type not in ['full', 'diag']:
+            raise ValueError("Invalid value for covariance_type: %s"
+                             % covariance_type)
+
+        super(CumulativeGaussianStatistics, self).__init__()
+        self.covariance_type = covariance_type
+
+    def fit(self, X):
+        """Compute prefix sums of X statistics"""
+
+        X = np.asarray(X, dtype=float)
+        n_samples, dimension = X.shape
+
+        # samples are centered before being summed to avoid catastrophic
+        # cancellation when subtracting two (potentially large) prefix sums
+        self.shift_ = np.mean(X, axis=0) if n_samples else np.zeros(dimension)
+
+        # prefix sums are stored in buffers whose capacity grows
+        # geometrically, so that extending them costs amortized O(1) per
+        # sample; only their first n_samples + 1 rows are meaningful
+        self._n_samples = 0
+        self._cum_x = np.zeros((1, dimension))
+        if self.covariance_type == 'diag':
+            self._cum_xx = np.zeros((1, dimension))
+        else:
+            self._cum_xx = np.zeros((1, dimension, dimension))
+
+        return self.extend(X)
+
+    @property
+    def cum_x_(self):
+        """(n_samples + 1, dimension) prefix sums of (centered) samples"""
+        return self._cum_x[:self._n_samples + 1]
+
+    @property
+    def cum_xx_(self):
+        """Prefix sums of (centered) outer products"""
+        return self._cum_xx[:self._n_samples + 1]
+
+    def _reserve(self, capacity):
+        """Make sure buffers can hold `capacity` prefix sums"""
+
+        if capacity <= len(self._cum_x):
+            return
+
+        capacity = max(capacity, 2 * len(self._cum_x))
+        n = self._n_samples + 1
+        for name in ['_cum_x', '_cum_xx']:
+            old = getattr(self, name)
+            new = np.empty((capacity, ) + old.shape[1:])
+            new[:n] = old[:n]
+            setattr(self, name, new)
+
+    def extend(self, X):
+        """Append samples X to the sequence, reusing existing prefix sums"""
+
+        X = np.asarray(X, dtype=float) - self.shift_
+        n_samples = len(X)
+
+        first = self._n_samples + 1
+        last = first + n_samples
+        self._reserve(last)
+
+        cum_x = self._cum_x[first:last]
+        np.cumsum(X, axis=0, out=cum_x)
+        cum_x += self._cum_x[first - 1]
+
+        cum_xx = self._cum_xx[first:last]
+        if self.covariance_type == 'diag':
+            np.cumsum(X ** 2, axis=0, out=cum_xx)
+        else:
+            np.cumsum(X[:, :, np.newaxis] * X[:, np.newaxis, :], axis=0,
+                      out=cum_xx)
+        cum_xx += self._cum_xx[first - 1]
+
+        self._n_samples += n_samples
+
+        return self
+
+    def discard(self, n_samples):
+        """Forget the first `n_samples` samples of the sequence
+
+        Subsequent windows are indexed relative to the new first sample.
+        """
+
+        n_samples = min(n_samples, self._n_samples)
+        n = self._n_samples + 1
+
+        self._cum_x[:n - n_samples] = \
+            self._cum_x[n_samples:n] - self._cum_x[n_samples]
+        self._cum_xx[:n - n_samples] = \
+            self._cum_xx[n_samples:n] - self._cum_xx[n_samples]
+        self._n_samples -= n_samples
+
+        return self
+
+    def __len__(self):
+        return self._n_samples
+
+    def window(self, start, end):
+        """Get statistics of X[start:end]
+
+        Parameters
+        ----------
+        start, end : int or (n_windows, ) array-like of int
+            Window boundaries (broadcast against each other).
+
+        Returns
+        -------
+        g : GaussianStatistics
+            Statistics of the n_windows windows.
+        """
+
+        start, end = np.broadcast_arrays(np.atleast_1d(start),
+                                         np.atleast_1d(end))
+
+        n = (end - start).astype(float)
+        sum_x = self.cum_x_[end] - self.cum_x_[start]
+        sum_xx = self.cum_xx_[end] - self.cum_xx_[start]
+
+        # undo centering
+        shift = self.shift_
+        if self.covariance_type == 'diag':
+            sum_xx = sum_xx + 2. * sum_x * shift \
+                + n[:, np.newaxis] * shift ** 2
+        else:
+            cross = sum_x[:, :, np.newaxis] * shift[np.newaxis, np.newaxis, :]
+            sum_xx = sum_xx + cross + np.swapaxes(cross, 1, 2) \
+                + n[:, np.newaxis, np.newaxis] * np.outer(shift, shift)
+        sum_x = sum_x + n[:, np.newaxis] * shift
+
+        g = GaussianStatistics(covariance_type=self.covariance_type)
+        return g._set(n, sum_x, sum_xx)
+
+
+def _inv(matrices):
+    """Invert a stack of matrices (NaN for singular ones)"""
+
+    try:
+        return np.linalg.inv(matrices)
+
+    # at least one matrix is singular
+    except np.linalg.LinAlgError as e:
+        inverse = np.full(matrices.shape, np.nan)
+        for i, matrix in enumerate(matrices):
+            try:
+                inverse[i] = np.linalg.inv(matrix)
+            except np.linalg.LinAlgError as e:
+                pass
+        return inverse
+
+
+def _log_det_covar(g, n):
+    """Log-determinant of covariance (or 0 when there is no sample)"""
+
+    if np.ndim(n) == 0:
+        return g.log_det_covar if n > 0 else 0.
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 0, g.log_det_covar, 0.)
+
+
 def bayesianInformationCriterion(g1, g2, g=None, penalty_coef=1.,
                                  returns_terms=False):
     """Returns Bayesian Information Criterion from 2 Gaussians
 
     Parameters
     ----------
-    g1, g2 : Gaussian
+    g1, g2 : Gaussian or GaussianStatistics
+        When GaussianStatistics are provided, Bayesian Information Criterion
+        is computed for all pairs at once (with broadcasting).
     penalty_coef: float, optional
         Defaults to 1.
-    g : Gaussian, optional
+    g : Gaussian or GaussianStatistics, optional
         Precomputed merge of g1 and g2
     returns_terms : boolean, optional
         Returns (ratio, penalty) tuple instead of ratio - 𝝀 x penalty
@@ -281,9 +723,9 @@ def bayesianInformationCriterion(g1, g2, g=None, penalty_coef=1.,
     n = n1 + n2
 
     # first term of Bayesian information criterion
-    ldc = g.log_det_covar if n > 0 else 0.
-    ldc1 = g1.log_det_covar if n1 > 0 else 0.
-    ldc2 = g2.log_det_covar if n2 > 0 else 0.
+    ldc = _log_det_covar(g, n)
+    ldc1 = _log_det_covar(g1, n1)
+    ldc2 = _log_det_covar(g2, n2)
     ratio = n * ldc - n1 * ldc1 - n2 * ldc2
 
     # second term of Bayesian information criterion
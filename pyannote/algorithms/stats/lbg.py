@@ -33,7 +33,7 @@ from __future__ import unicode_literals
 
 import six.moves
 import numpy as np
-from sklearn.mixture import GMM
+from .em import GaussianMixture
 import logging
 
 
@@ -47,7 +47,7 @@ class LBG(object):
 
     covariance_type : string, optional
         String describing the type of covariance parameters to
-        use.  Must be one of 'spherical', 'tied', 'diag', 'full'.
+        use.  Must be one of 'diag', 'full'.
         Defaults to 'diag' (the only one supported for now...)
 
     random_state: RandomState or an int seed (0 by default)
@@ -128,24 +128,25 @@ class LBG(object):
                 yield X
                 continue
 
-            # start by shuffling X
-            X = np.random.permutation(X)
+            # start by shuffling indices (rather than X itself, so that only
+            # sampled frames are read when X is memory-mapped)
+            indices = np.random.permutation(N)
             for i in six.moves.range(0, N - n, n):
-                yield X[i:i + n, :]
+                yield X[np.sort(indices[i:i + n]), :]
 
     def _split(self, gmm, n_components):
         """Split gaussians and return new mixture.
 
         Parameters
         ----------
-        gmm : sklearn.mixture.GMM
+        gmm : GaussianMixture
         n_components : int
             Number of components in new mixture with the following constraint:
             gmm.n_components < n_components <= 2 x gmm.n_components
 
         Returns
         -------
-        new_gmm : sklearn.mixture.GMM
+        new_gmm : GaussianMixture
             New mixture with n_components components.
 
         """
@@ -153,14 +154,14 @@ class LBG(object):
         # TODO: sort gmm components in importance order so that the most
         # important ones are the one actually split...
 
-        new_gmm = GMM(n_components=n_components,
-                      covariance_type=self.covariance_type,
-                      random_state=self.random_state,
-                      min_covar=self.min_covar,
-                      n_iter=1,
-                      params='wmc',
-                      n_init=1,
-                      init_params='')
+        new_gmm = GaussianMixture(n_components=n_components,
+                                  covariance_type=self.covariance_type,
+                                  random_state=self.random_state,
+                                  min_covar=self.min_covar,
+                                  n_iter=1,
+                                  params='wmc',
+                                  n_init=1,
+                                  init_params='')
 
         # number of new components to be added
         k = n_components - gmm.n_components
@@ -200,11 +201,12 @@ class LBG(object):
 
         # initialize GMM with only one gaussian if None is provided
         if gmm is None:
-            gmm = GMM(n_components=1, covariance_type=self.covariance_type,
-                      random_state=self.random_state,
-                      min_covar=self.min_covar, n_iter=1,
-                      n_init=1, params='wmc',
-                      init_params='')
+            gmm = GaussianMixture(n_components=1,
+                                  covariance_type=self.covariance_type,
+                                  random_state=self.random_state,
+                                  min_covar=self.min_covar, n_iter=1,
+                                  n_init=1, params='wmc',
+                                  init_params='')
 
         previous_ll = -np.inf
 
@@ -30,6 +30,7 @@ from sklearn.isotonic import IsotonicRegression
 from sklearn.naive_bayes import GaussianNB
 from sklearn.base import BaseEstimator, TransformerMixin
 from ..utils.Xy import keepZeroOrOne
+from .calibration import logsumexp  # noqa
 
 
 class LLRPassthrough(BaseEstimator, TransformerMixin):
@@ -186,21 +187,3 @@ def posterior(llr, prior=None):
 
     return 1 / (1 + priorRatio * np.exp(-llr))
 
-
-def logsumexp(a, b=None, axis=0):
-    """{Over|under}flow-robust computation of log(sum(b*exp(a)))
-
-    Parameters
-    ----------
-    a : numpy array
-    b :
-    """
-    a = np.rollaxis(a, axis)
-    vmax = np.nanmax(a, axis=0)
-    if b is None:
-        out = np.log(np.sum(np.exp(a - vmax), axis=0))
-    else:
-        b = np.atleast_2d(b).T
-        out = np.log(np.sum(b * np.exp(a - vmax), axis=0))
-    out += vmax
-    return out
@@ -0,0 +1,583 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Joint scoring and adaptation of many Gaussian mixture models"""
+
+from __future__ import unicode_literals
+
+import six.moves
+import numpy as np
+from joblib import Parallel, delayed
+from .em import GaussianMixture, EPS, _logsumexp, _diag_log_prob
+
+
+class StackedMixtures(object):
+    """Score samples with many Gaussian mixtures at once
+
+    Parameters of all mixtures are stacked so that the log-likelihood of every
+    sample under every mixture is obtained with one matrix product per chunk
+    of samples (followed by a log-sum-exp over components) instead of one
+    pass over the samples per mixture.
+
+    Parameters
+    ----------
+    mixtures : iterable
+        Trained Gaussian mixtures (GaussianMixture or any object with
+        `covariance_type`, `weights_`, `means_` and `covars_` attributes).
+        Mixtures may have different numbers of components.
+    dtype : {'float64', 'float32'}, optional
+        Precision of the computation. 'float32' is faster and uses half the
+        memory, at the expense of slightly less accurate log-likelihoods.
+        Defaults to 'float64'.
+    chunk_size : int, optional
+        Number of samples processed at once. Defaults to as many as needed to
+        fill a (chunk_size, n_mixtures x n_components) buffer of about one
+        million values.
+
+    Usage
+    -----
+    >>> stacked = StackedMixtures([gmm1, gmm2, gmm3])
+    >>> log_likelihood = stacked.score(X)  # (n_samples, 3) array
+    """
+
+    def __init__(self, mixtures, dtype='float64', chunk_size=None):
+        super(StackedMixtures, self).__init__()
+
+        self.mixtures = list(mixtures)
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+
+        self.diagonal_ = all(mixture.covariance_type == 'diag'
+                             for mixture in self.mixtures)
+        if self.diagonal_:
+            self._stack()
+
+    def __len__(self):
+        return len(self.mixtures)
+
+    def _stack(self):
+
+        n_mixtures = len(self.mixtures)
+        n_components = max(len(m.weights_) for m in self.mixtures)
+        n_features = self.mixtures[0].means_.shape[1]
+
+        # missing components (of mixtures with fewer components) are given
+        # a zero weight and unit variance
+        weights = np.zeros((n_mixtures, n_components))
+        means = np.zeros((n_mixtures, n_components, n_features))
+        covars = np.ones((n_mixtures, n_components, n_features))
+        for i, mixture in enumerate(self.mixtures):
+            k = len(mixture.weights_)
+            weights[i, :k] = mixture.weights_
+            means[i, :k] = mixture.means_
+            covars[i, :k] = mixture.covars_
+
+        # features are centered before scoring, for float32 precision
+        self.shift_ = np.sum(weights[:, :, np.newaxis] * means,
+                             axis=(0, 1)) / np.sum(weights)
+        means = means - self.shift_
+
+        # log N(x|μ, σ²) = c - ½ Σ x² / σ² + Σ x μ / σ²
+        precisions = 1. / covars
+        with np.errstate(divide='ignore'):
+            constant = np.log(weights) - .5 * (
+                n_features * np.log(2 * np.pi) +
+                np.sum(np.log(covars), axis=2) +
+                np.sum(means ** 2 * precisions, axis=2))
+
+        n_gaussians = n_mixtures * n_components
+        self.n_components_ = n_components
+        self.constant_ = constant.reshape((n_gaussians, )).astype(self.dtype)
+        self.linear_ = np.concatenate([
+            -.5 * precisions, means * precisions], axis=2).reshape(
+                (n_gaussians, 2 * n_features)).T.astype(self.dtype)
+
+    def _chunk_size(self):
+        if self.chunk_size is not None:
+            return self.chunk_size
+        n_gaussians = len(self.mixtures) * getattr(self, 'n_components_', 1)
+        return max(1, 2 ** 20 // n_gaussians)
+
+    def score_components(self, X):
+        """Weighted log-likelihood of every component of every mixture
+
+        Parameters
+        ----------
+        X : (n_samples, n_features) array-like
+
+        Returns
+        -------
+        log_prob : (n_samples, n_mixtures, n_components) np.ndarray
+            log [weight x component likelihood] (-inf for padded components)
+        """
+
+        x = np.asarray(X, dtype=self.dtype) - self.shift_.astype(self.dtype)
+        log_prob = np.dot(np.hstack([x * x, x]), self.linear_)
+        log_prob += self.constant_
+        return log_prob.reshape((len(x), len(self), self.n_components_))
+
+    def score(self, X):
+        """Log-likelihood of every sample under every mixture
+
+        Parameters
+        ----------
+        X : (n_samples, n_features) array-like
+
+        Returns
+        -------
+        log_likelihood : (n_samples, n_mixtures) np.ndarray
+        """
+
+        if not self.diagonal_:
+            return np.array([
+                mixture.score(X) for mixture in self.mixtures]).T
+
+        n_samples = len(X)
+        log_likelihood = np.empty((n_samples, len(self)))
+
+        chunk_size = self._chunk_size()
+        for i in six.moves.range(0, n_samples, chunk_size):
+            log_prob = self.score_components(X[i:i + chunk_size])
+            log_likelihood[i:i + chunk_size] = _logsumexp(log_prob, axis=2)
+
+        return log_likelihood
+
+
+class ShortlistedMixtures(object):
+    """Score UBM-adapted mixtures on the top components of the UBM
+
+    For each sample, the `n_best` components of the UBM with the highest
+    likelihood are selected (Gaussian selection) and adapted mixtures are only
+    evaluated on those components. Adapted mixtures must share weights and
+    covariances with the UBM (i.e. only means were adapted), and are
+    therefore scored in a cost that does not depend on their number of
+    components.
+
+    Parameters
+    ----------
+    ubm : GaussianMixture
+        Universal background model, with diagonal covariances.
+    mixtures : iterable
+        Mixtures adapted from `ubm` (only means differ).
+    n_best : int, optional
+        Number of selected UBM components per sample. Defaults to 5.
+    dtype : {'float64', 'float32'}, optional
+        Precision of the computation. Defaults to 'float64'.
+    chunk_size : int, optional
+        Number of samples processed at once. Defaults to as many as needed to
+        fill buffers of about one million values.
+
+    Usage
+    -----
+    >>> shortlisted = ShortlistedMixtures(ubm, [gmm1, gmm2], n_best=5)
+    >>> log_likelihood = shortlisted.score(X)  # (n_samples, 3) array
+    >>> # log_likelihood[:, 2] is the (exact) UBM log-likelihood
+    """
+
+    def __init__(self, ubm, mixtures, n_best=5, dtype='float64',
+                 chunk_size=None):
+        super(ShortlistedMixtures, self).__init__()
+
+        self.ubm = ubm
+        self.mixtures = list(mixtures)
+        self.n_best = n_best
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+
+        if ubm.covariance_type != 'diag':
+            raise ValueError(
+                'Gaussian selection requires diagonal covariances.')
+
+        self.stacked_ubm_ = StackedMixtures([ubm], dtype=dtype)
+
+        means = np.array([mixture.means_ for mixture in self.mixtures])
+        if means.shape[1:] != ubm.means_.shape:
+            raise ValueError(
+                'Mixtures must have the same components as the UBM.')
+
+        # log N(x|μ) - log N(x|μ_ubm) = x (μ - μ_ubm) / σ²
+        #                                - ½ Σ (μ² - μ_ubm²) / σ²
+        # (with x and means centered as in stacked_ubm_)
+        precisions = 1. / ubm.covars_
+        shift = self.stacked_ubm_.shift_
+        ubm_means = ubm.means_ - shift
+        means = means - shift
+        self.delta_ = ((means - ubm_means) * precisions).astype(self.dtype)
+        self.offset_ = (-.5 * np.sum((means ** 2 - ubm_means ** 2) *
+                                     precisions, axis=2)).astype(self.dtype)
+
+    def __len__(self):
+        return len(self.mixtures) + 1
+
+    def _chunk_size(self):
+        if self.chunk_size is not None:
+            return self.chunk_size
+        n_mixtures, n_components, n_features = self.delta_.shape
+        n_best = min(self.n_best, n_components)
+        return max(1, 2 ** 20 // max(n_components,
+                                     n_mixtures * n_best * n_features))
+
+    def score(self, X):
+        """Log-likelihood of every sample under every mixture (and UBM)
+
+        Parameters
+        ----------
+        X : (n_samples, n_features) array-like
+
+        Returns
+        -------
+        log_likelihood : (n_samples, n_mixtures + 1) np.ndarray
+            Approximate log-likelihood under each adapted mixture, followed
+            by the log-likelihood under the UBM.
+        """
+
+        n_samples = len(X)
+        n_components = self.delta_.shape[1]
+        n_best = min(self.n_best, n_components)
+
+        log_likelihood = np.empty((n_samples, len(self)))
+
+        chunk_size = self._chunk_size()
+        for i in six.moves.range(0, n_samples, chunk_size):
+
+            x = X[i:i + chunk_size]
+            n = len(x)
+
+            # UBM weighted log-likelihood of all components
+            log_prob = self.stacked_ubm_.score_components(x)[:, 0, :]
+            log_likelihood[i:i + n, -1] = _logsumexp(log_prob, axis=1)
+
+            # n_best components per sample
+            if n_best < n_components:
+                best = np.argpartition(-log_prob, n_best - 1,
+                                       axis=1)[:, :n_best]
+            else:
+                best = np.tile(np.arange(n_components), (n, 1))
+            rows = np.arange(n)[:, np.newaxis]
+
+            # adapted mixtures, only evaluated on selected components
+            x = (np.asarray(x, dtype=self.dtype) -
+                 self.stacked_ubm_.shift_.astype(self.dtype))
+            adapted = (np.einsum('nd,sncd->snc', x, self.delta_[:, best]) +
+                       self.offset_[:, best] + log_prob[rows, best])
+            log_likelihood[i:i + n, :-1] = _logsumexp(adapted, axis=2).T
+
+        return log_likelihood
+
+
+def _adapted_statistics(ubm, weights, means, covars, x, y, n_mixtures,
+                        shared=False, second_order=True):
+    """Sufficient statistics of every adapted mixture (one chunk)
+
+    Parameters
+    ----------
+    ubm : GaussianMixture
+    weights, means, covars : np.ndarray
+        Current parameters of all mixtures, with shape (n_mixtures,
+        n_components) and (n_mixtures, n_components, n_features).
+    x : (n_samples, n_features) np.ndarray
+    y : (n_samples, ) np.ndarray
+        Index of the mixture each sample belongs to.
+    shared : bool, optional
+        Whether all mixtures are still identical to the UBM, in which case
+        responsibilities of all samples are computed at once with the UBM.
+    second_order : bool, optional
+        Whether to compute second order statistics.
+
+    Returns
+    -------
+    statistics : tuple
+        (counts, log_likelihood, zeroth, first, second) with shape
+        (n_mixtures, ), (n_mixtures, ), (n_mixtures, n_components) and
+        (n_mixtures, n_components, n_features) (second is None when
+        `second_order` is False).
+    """
+
+    n_components, n_features = ubm.means_.shape
+
+    counts = np.zeros((n_mixtures, ))
+    log_likelihood = np.zeros((n_mixtures, ))
+    zeroth = np.zeros((n_mixtures, n_components))
+    first = np.zeros((n_mixtures, n_components, n_features))
+    second = np.zeros((n_mixtures, n_components, n_features)) \
+        if second_order else None
+
+    if shared:
+        log_prob = ubm._log_prob(x)
+
+    # segment-sum: samples are grouped by mixture
+    order = np.argsort(y, kind='mergesort')
+    labels, starts = np.unique(y[order], return_index=True)
+    ends = list(starts[1:]) + [len(y)]
+
+    for k, start, end in zip(labels, starts, ends):
+
+        indices = order[start:end]
+        x_k = x[indices]
+
+        if shared:
+            log_prob_k = log_prob[indices]
+        else:
+            log_prob_k = _diag_log_prob(x_k, weights[k], means[k], covars[k])
+
+        logprob = _logsumexp(log_prob_k, axis=1)
+        responsibilities = np.exp(log_prob_k - logprob[:, np.newaxis])
+
+        counts[k] = len(indices)
+        log_likelihood[k] = np.sum(logprob)
+        zeroth[k] = np.sum(responsibilities, axis=0)
+        first[k] = np.dot(responsibilities.T, x_k)
+        if second_order:
+            second[k] = np.dot(responsibilities.T, x_k ** 2)
+
+    return counts, log_likelihood, zeroth, first, second
+
+
+def _sum_statistics(ubm, weights, means, covars, X, y, n_mixtures,
+                    active=None, shared=False, second_order=True,
+                    chunk_size=10000, n_jobs=1):
+    """Sufficient statistics of every adapted mixture (all chunks)
+
+    See _adapted_statistics. Only samples of `active` mixtures are used.
+    Chunks are processed by `n_jobs` threads (sharing X and parameters).
+    """
+
+    def accumulate(i):
+        x = np.asarray(X[i:i + chunk_size], dtype=np.float64)
+        y_ = y[i:i + chunk_size]
+        keep = (y_ >= 0) & (y_ < n_mixtures)
+        if active is not None:
+            keep[keep] = active[y_[keep]]
+        return _adapted_statistics(ubm, weights, means, covars,
+                                   x[keep], y_[keep], n_mixtures,
+                                   shared=shared, second_order=second_order)
+
+    starts = six.moves.range(0, len(X), chunk_size)
+    if n_jobs == 1:
+        chunks = [accumulate(i) for i in starts]
+    else:
+        chunks = Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(accumulate)(i) for i in starts)
+
+    return [None if chunks[0][s] is None else sum(c[s] for c in chunks)
+            for s in range(5)]
+
+
+def _as_mixtures(ubm, weights, means, covars, converged, **kwargs):
+    """Build one GaussianMixture per (stacked) set of parameters"""
+
+    mixtures = []
+    for k in six.moves.range(len(weights)):
+        gmm = GaussianMixture(
+            n_components=len(ubm.weights_), covariance_type='diag',
+            random_state=ubm.random_state, tol=ubm.tol,
+            min_covar=ubm.min_covar, n_init=1, init_params='', **kwargs)
+        gmm.weights_ = weights[k]
+        gmm.means_ = means[k]
+        gmm.covars_ = covars[k]
+        gmm.converged_ = bool(converged[k])
+        mixtures.append(gmm)
+
+    return mixtures
+
+
+def adapt_mixtures(ubm, X, y, n_mixtures, params='m', n_iter=10,
+                   chunk_size=None, n_jobs=1):
+    """Adapt one mixture per label from the UBM, all at once
+
+    Equivalent to running EM (initialized with the UBM, and updating
+    `params` only) independently on the samples of each label, but each
+    iteration makes one single pass over the whole set of samples. At first
+    iteration, responsibilities are those of the UBM. Sufficient statistics
+    are then summed by label, and each mixture stops being updated once it
+    has converged.
+
+    Parameters
+    ----------
+    ubm : GaussianMixture
+        Universal background model, with diagonal covariances.
+    X : (n_samples, n_features) array-like
+        Samples (possibly memory-mapped).
+    y : (n_samples, ) array-like
+        Labels in [0, n_mixtures). Samples with other labels (e.g. -1 for
+        unknown) are ignored.
+    n_mixtures : int
+        Number of labels (i.e. adapted mixtures).
+    params : str, optional
+        Adapted parameters ('w' for weights, 'm' for means, 'c' for
+        covariances). Defaults to 'm'.
+    n_iter : int, optional
+        Maximum number of EM iterations. Defaults to 10.
+    chunk_size : int, optional
+        Number of samples processed at once. Defaults to 10000.
+    n_jobs : int, optional
+        Number of threads processing chunks in parallel (sharing samples and
+        parameters in memory). Defaults to 1.
+
+    Returns
+    -------
+    mixtures : list of GaussianMixture
+        Adapted mixtures, in label order.
+    """
+
+    if ubm.covariance_type != 'diag':
+        raise ValueError(
+            'Vectorized adaptation requires diagonal covariances.')
+
+    y = np.asarray(y)
+
+    if chunk_size is None:
+        chunk_size = 10000
+
+    weights = np.tile(ubm.weights_, (n_mixtures, 1))
+    means = np.tile(ubm.means_, (n_mixtures, 1, 1))
+    covars = np.tile(ubm.covars_, (n_mixtures, 1, 1))
+    zeroth_floor = 10 * EPS
+
+    active = np.ones((n_mixtures, ), dtype=bool)
+    converged = np.zeros((n_mixtures, ), dtype=bool)
+    previous = None
+
+    for iteration in six.moves.range(n_iter):
+
+        # only samples of mixtures that are still being adapted
+        counts, log_likelihood, zeroth, first, second = _sum_statistics(
+            ubm, weights, means, covars, X, y, n_mixtures, active=active,
+            shared=iteration == 0, second_order='c' in params,
+            chunk_size=chunk_size, n_jobs=n_jobs)
+
+        # per mixture convergence
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_likelihood = log_likelihood / counts
+        if previous is not None:
+            converged |= active & (np.abs(log_likelihood - previous) <
+                                   ubm.tol)
+            active &= ~converged
+        previous = log_likelihood
+        if not np.any(active):
+            break
+
+        # M-step (only for mixtures still being adapted)
+        zeroth = zeroth[active] + zeroth_floor
+        avg_first = first[active] / zeroth[:, :, np.newaxis]
+
+        if 'w' in params:
+            weights[active] = zeroth / np.sum(zeroth, axis=1, keepdims=True)
+
+        if 'm' in params:
+            means[active] = avg_first
+
+        if 'c' in params:
+            m = means[active]
+            avg_second = second[active] / zeroth[:, :, np.newaxis]
+            c = avg_second - 2 * avg_first * m + m ** 2
+            covars[active] = np.maximum(c, 0.) + ubm.min_covar
+
+    return _as_mixtures(ubm, weights, means, covars, converged,
+                        n_iter=n_iter, params=params)
+
+
+def map_adapt_mixtures(ubm, X, y, n_mixtures, relevance_factor=16.,
+                       params='m', chunk_size=None, n_jobs=1):
+    """Closed-form MAP adaptation of one mixture per label
+
+    Reynolds et al. (2000) "Speaker Verification Using Adapted Gaussian
+    Mixture Models". Sufficient statistics of each label are computed from
+    UBM responsibilities (one single pass over the samples), and each
+    component parameter is interpolated between its UBM value and its
+    maximum likelihood estimate, using a data-dependent coefficient
+    α = n / (n + relevance_factor), where n is the soft count of samples
+    of the component.
+
+    Parameters
+    ----------
+    ubm : GaussianMixture
+        Universal background model, with diagonal covariances.
+    X : (n_samples, n_features) array-like
+        Samples (possibly memory-mapped).
+    y : (n_samples, ) array-like
+        Labels in [0, n_mixtures). Samples with other labels (e.g. -1 for
+        unknown) are ignored.
+    n_mixtures : int
+        Number of labels (i.e. adapted mixtures).
+    relevance_factor : float, optional
+        Defaults to 16.
+    params : str, optional
+        Adapted parameters ('w' for weights, 'm' for means, 'c' for
+        covariances). Defaults to 'm'. As with EM, `ubm.min_covar` is
+        added to adapted covariances.
+    chunk_size : int, optional
+        Number of samples processed at once. Defaults to 10000.
+    n_jobs : int, optional
+        Number of threads processing chunks in parallel (sharing samples and
+        parameters in memory). Defaults to 1.
+
+    Returns
+    -------
+    mixtures : list of GaussianMixture
+        Adapted mixtures, in label order.
+    """
+
+    if ubm.covariance_type != 'diag':
+        raise ValueError('MAP adaptation requires diagonal covariances.')
+
+    y = np.asarray(y)
+
+    if chunk_size is None:
+        chunk_size = 10000
+
+    counts, _, zeroth, first, second = _sum_statistics(
+        ubm, ubm.weights_[np.newaxis], ubm.means_[np.newaxis],
+        ubm.covars_[np.newaxis], X, y, n_mixtures, shared=True,
+        second_order='c' in params, chunk_size=chunk_size, n_jobs=n_jobs)
+
+    alpha = zeroth / (zeroth + relevance_factor)
+    denominator = zeroth[:, :, np.newaxis] + 10 * EPS
+    a = alpha[:, :, np.newaxis]
+
+    weights = np.tile(ubm.weights_, (n_mixtures, 1))
+    means = np.tile(ubm.means_, (n_mixtures, 1, 1))
+    covars = np.tile(ubm.covars_, (n_mixtures, 1, 1))
+
+    if 'w' in params:
+        n_samples = np.maximum(counts, 1.)[:, np.newaxis]
+        weights = alpha * zeroth / n_samples + (1. - alpha) * weights
+        weights /= np.sum(weights, axis=1, keepdims=True)
+
+    if 'm' in params:
+        means = a * first / denominator + (1. - a) * ubm.means_
+
+    if 'c' in params:
+        covars = (a * second / denominator +
+                  (1. - a) * (ubm.covars_ + ubm.means_ ** 2) - means ** 2)
+        # same floor as EM re-estimation
+        covars = np.maximum(covars, 0.) + ubm.min_covar
+
+    converged = np.ones((n_mixtures, ), dtype=bool)
+    return _as_mixtures(ubm, weights, means, covars, converged,
+                        n_iter=1, params=params)
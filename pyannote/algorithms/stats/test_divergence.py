@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from .gaussian import GaussianStatistics
+from .divergence import symmetric_kl, generalized_likelihood_ratio
+from .divergence import hotelling_t2, cosine_distance
+
+
+def get_data():
+    random_state = np.random.RandomState(0)
+    X1 = random_state.randn(200, 3)
+    X2 = 0.5 + 1.5 * random_state.randn(150, 3)
+    return X1, X2
+
+
+def kl(m1, S1, m2, S2):
+    inv_S2 = np.linalg.inv(S2)
+    return .5 * (np.trace(np.dot(inv_S2, S1)) +
+                 np.dot(np.dot(m2 - m1, inv_S2), m2 - m1) - len(m1) +
+                 np.log(np.linalg.det(S2) / np.linalg.det(S1)))
+
+
+def log_likelihood(X):
+    m = np.mean(X, axis=0)
+    S = np.cov(X.T, ddof=0)
+    _, log_det = np.linalg.slogdet(S)
+    return -.5 * len(X) * (log_det + X.shape[1] * (1. + np.log(2 * np.pi)))
+
+
+def test_divergences():
+
+    X1, X2 = get_data()
+    g1 = GaussianStatistics().fit(X1)
+    g2 = GaussianStatistics().fit(X2)
+
+    m1, m2 = np.mean(X1, axis=0), np.mean(X2, axis=0)
+    S1, S2 = np.cov(X1.T, ddof=0), np.cov(X2.T, ddof=0)
+
+    expected = kl(m1, S1, m2, S2) + kl(m2, S2, m1, S1)
+    assert np.allclose(symmetric_kl(g1, g2), expected)
+
+    expected = kl(m1, np.diag(np.diag(S1)), m2, np.diag(np.diag(S2))) + \
+        kl(m2, np.diag(np.diag(S2)), m1, np.diag(np.diag(S1)))
+    assert np.allclose(symmetric_kl(g1.diagonal(), g2.diagonal()), expected)
+
+    expected = log_likelihood(X1) + log_likelihood(X2) - \
+        log_likelihood(np.vstack([X1, X2]))
+    assert np.allclose(generalized_likelihood_ratio(g1, g2), expected)
+
+    n1, n2 = len(X1), len(X2)
+    pooled = ((n1 - 1) * np.cov(X1.T) + (n2 - 1) * np.cov(X2.T)) / \
+        (n1 + n2 - 2)
+    expected = float(n1 * n2) / (n1 + n2) * \
+        np.dot(np.dot(m1 - m2, np.linalg.inv(pooled)), m1 - m2)
+    assert np.allclose(hotelling_t2(g1, g2), expected)
+
+    expected = 1. - np.dot(m1, m2) / (np.linalg.norm(m1) *
+                                      np.linalg.norm(m2))
+    assert np.allclose(cosine_distance(g1, g2), expected)
+
+
+def test_singular():
+
+    X1, _ = get_data()
+    g1 = GaussianStatistics().fit(X1)
+    g0 = GaussianStatistics().fit(np.ones((10, 3)))
+    assert np.all(np.isnan(symmetric_kl(g0, g1)))
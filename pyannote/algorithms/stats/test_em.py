@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from .em import GaussianMixture
+
+
+def get_data():
+    random_state = np.random.RandomState(0)
+    X1 = random_state.randn(600, 2) + [4., 0.]
+    X2 = 0.5 * random_state.randn(200, 2) - [4., 0.]
+    return np.vstack([X1, X2])
+
+
+def test_chunks():
+
+    # accumulating statistics by chunks (or files) does not change EM
+    X = get_data()
+    kwargs = dict(n_components=2, random_state=0, n_iter=5)
+
+    for covariance_type in ['diag', 'full']:
+        gmm = GaussianMixture(covariance_type=covariance_type,
+                              chunk_size=len(X), **kwargs).fit(X)
+        chunked = GaussianMixture(covariance_type=covariance_type,
+                                  chunk_size=7, **kwargs).fit(X)
+        files = GaussianMixture(covariance_type=covariance_type,
+                                **kwargs).fit([X[:300], X[300:]])
+        for other in [chunked, files]:
+            assert np.allclose(gmm.weights_, other.weights_)
+            assert np.allclose(gmm.means_, other.means_)
+            assert np.allclose(gmm.covars_, other.covars_)
+
+
+def test_fit():
+
+    X = get_data()
+    gmm = GaussianMixture(n_components=2, random_state=0, n_iter=50, tol=1e-6)
+    gmm.fit(X)
+
+    order = np.argsort(gmm.means_[:, 0])
+    assert np.allclose(gmm.weights_[order], [0.25, 0.75], atol=1e-2)
+    assert np.allclose(gmm.means_[order], [[-4., 0.], [4., 0.]], atol=0.15)
+    assert np.allclose(gmm.covars_[order], [[.25, .25], [1., 1.]], atol=0.2)
+
+
+def test_partial_fit():
+
+    X = get_data()
+    X = X[np.random.RandomState(1).permutation(len(X))]
+
+    batch = GaussianMixture(n_components=2, random_state=0, n_iter=50)
+    batch.fit(X)
+
+    online = GaussianMixture(n_components=2, random_state=0)
+    for i in range(0, len(X), 50):
+        online.partial_fit(X[i:i + 50])
+
+    assert abs(np.mean(online.score(X)) - np.mean(batch.score(X))) < 0.05
+
+
+def test_n_init():
+
+    X = np.random.RandomState(0).randn(2000, 4)
+    kwargs = dict(n_components=8, random_state=0, n_iter=2)
+
+    # restarts draw different samples and k-means starting points
+    class RecordingMixture(GaussianMixture):
+        def _initialize(self, X, random_state, force=False):
+            super(RecordingMixture, self)._initialize(
+                X, random_state, force=force)
+            self.initial_means_.append(self.means_)
+
+    gmm = RecordingMixture(n_init=3, **kwargs)
+    gmm.initial_means_ = []
+    gmm.fit(X)
+    assert len(gmm.initial_means_) == 3
+    for i, j in [(0, 1), (0, 2), (1, 2)]:
+        assert not np.allclose(gmm.initial_means_[i], gmm.initial_means_[j])
+
+    # the first restart is the one of n_init=1, and the best one is kept
+    single = GaussianMixture(n_init=1, **kwargs).fit(X)
+    multiple = GaussianMixture(n_init=3, **kwargs).fit(X)
+    assert np.mean(multiple.score(X)) >= np.mean(single.score(X)) - 1e-6
+
+    # fit is reproducible with an int seed
+    again = GaussianMixture(n_init=3, **kwargs).fit(X)
+    assert np.allclose(multiple.means_, again.means_)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from .gaussian import Gaussian, GaussianStatistics
+from .gaussian import CumulativeGaussianStatistics
+from .gaussian import bayesianInformationCriterion
+
+
+def get_data(n_samples=100, dimension=4, seed=0):
+    random_state = np.random.RandomState(seed)
+    return random_state.randn(n_samples, dimension)
+
+
+def check_statistics(covariance_type):
+
+    X1 = get_data(seed=1)
+    X2 = 2. + get_data(seed=2)
+
+    g1 = Gaussian(covariance_type=covariance_type).fit(X1)
+    g2 = Gaussian(covariance_type=covariance_type).fit(X2)
+    expected, g = g1.bic(g2, penalty_coef=1.)
+
+    s1 = GaussianStatistics(covariance_type=covariance_type).fit(X1)
+    s2 = GaussianStatistics(covariance_type=covariance_type).fit(X2)
+    delta_bic, s = s1.bic(s2, penalty_coef=1.)
+
+    assert np.allclose(s.mean, g.mean)
+    assert np.allclose(s.log_det_covar, g.log_det_covar)
+    assert np.allclose(delta_bic, expected)
+    assert np.allclose(s1.divergence(s2), g1.divergence(g2), equal_nan=True)
+
+    # stacked statistics
+    stacked = GaussianStatistics.stack([s1, s2, s1])
+    delta_bic = bayesianInformationCriterion(
+        stacked[1], stacked, penalty_coef=1.)
+    assert np.allclose(delta_bic[[0, 2]], expected)
+
+
+def test_statistics_diag():
+    check_statistics('diag')
+
+
+def test_statistics_full():
+    check_statistics('full')
+
+
+def test_diag_matches_full():
+
+    X1 = get_data(seed=1)
+    X2 = 2. + get_data(seed=2)
+
+    d1 = Gaussian(covariance_type='diag').fit(X1)
+    d2 = Gaussian(covariance_type='diag').fit(X2)
+
+    # same Gaussian, with off-diagonal terms explicitly zeroed
+    f1 = Gaussian(covariance_type='full').fit(X1)
+    f1.covar = np.diag(np.diag(f1.covar))
+    f2 = Gaussian(covariance_type='full').fit(X2)
+    f2.covar = np.diag(np.diag(f2.covar))
+
+    assert np.allclose(d1.covar, f1.covar)
+    assert np.allclose(d1.inv_covar, f1.inv_covar)
+    assert np.allclose(d1.log_det_covar, f1.log_det_covar)
+    assert np.allclose(d1.divergence(d2), f1.divergence(f2))
+
+    merged = d1.merge(d2)
+    expected = Gaussian(covariance_type='diag').fit(np.vstack([X1, X2]))
+    assert np.allclose(merged.mean, expected.mean)
+    assert np.allclose(merged.covar, expected.covar)
+
+
+def check_cumulative(covariance_type):
+
+    X = 10. + get_data(n_samples=200)
+    cumulative = CumulativeGaussianStatistics(
+        covariance_type=covariance_type).fit(X)
+
+    starts = np.array([0, 20, 50, 120])
+    ends = np.array([100, 60, 200, 121])
+    g = cumulative.window(starts, ends)
+
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        expected = GaussianStatistics(
+            covariance_type=covariance_type).fit(X[start:end])
+        assert np.allclose(g.n_samples[i], expected.n_samples)
+        assert np.allclose(g.mean[i], expected.mean)
+        assert np.allclose(g.covar[i], expected.covar)
+
+    # growing cumulative statistics gives the same windows
+    extended = CumulativeGaussianStatistics(
+        covariance_type=covariance_type).fit(X[:80]).extend(X[80:])
+    assert len(extended) == len(X)
+    assert np.allclose(extended.window(starts, ends).covar, g.covar)
+
+    # forgetting first samples shifts windows accordingly
+    extended.discard(20)
+    assert len(extended) == len(X) - 20
+    assert np.allclose(extended.window(starts[1:] - 20, ends[1:] - 20).covar,
+                       g[1:].covar)
+
+
+def test_cumulative_diag():
+    check_cumulative('diag')
+
+
+def test_cumulative_full():
+    check_cumulative('full')
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2012-2017 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from .em import GaussianMixture
+from .mixtures import StackedMixtures, ShortlistedMixtures
+from .mixtures import adapt_mixtures, map_adapt_mixtures
+
+
+def get_mixtures(n_features=3):
+    random_state = np.random.RandomState(0)
+    mixtures = []
+    for n_components in [1, 4, 2]:
+        gmm = GaussianMixture(n_components=n_components)
+        gmm.weights_ = random_state.dirichlet(np.ones(n_components))
+        gmm.means_ = 10. + random_state.randn(n_components, n_features)
+        gmm.covars_ = 0.5 + random_state.rand(n_components, n_features)
+        mixtures.append(gmm)
+    return mixtures
+
+
+def test_score():
+
+    mixtures = get_mixtures()
+    X = 10. + np.random.RandomState(1).randn(100, 3)
+    expected = np.array([gmm.score(X) for gmm in mixtures]).T
+
+    # mixtures with different number of components, scored by chunks
+    stacked = StackedMixtures(mixtures, chunk_size=7)
+    assert np.allclose(stacked.score(X), expected)
+
+    stacked = StackedMixtures(mixtures, dtype='float32')
+    assert np.allclose(stacked.score(X), expected, atol=1e-3)
+
+
+def test_shortlist():
+
+    ubm = get_mixtures()[1]
+    random_state = np.random.RandomState(2)
+    mixtures = []
+    for _ in range(3):
+        gmm = GaussianMixture(n_components=4)
+        gmm.weights_, gmm.covars_ = ubm.weights_, ubm.covars_
+        gmm.means_ = ubm.means_ + 0.1 * random_state.randn(4, 3)
+        mixtures.append(gmm)
+
+    X = 10. + np.random.RandomState(1).randn(100, 3)
+    expected = StackedMixtures(mixtures + [ubm]).score(X)
+
+    # selecting all components is exact
+    shortlisted = ShortlistedMixtures(ubm, mixtures, n_best=4, chunk_size=7)
+    assert np.allclose(shortlisted.score(X), expected)
+
+    # selecting fewer components underestimates log-likelihood...
+    log_likelihood = ShortlistedMixtures(ubm, mixtures, n_best=2).score(X)
+    assert np.all(log_likelihood[:, :-1] <= expected[:, :-1] + 1e-10)
+    # ... but UBM log-likelihood is exact
+    assert np.allclose(log_likelihood[:, -1], expected[:, -1])
+
+
+def test_adapt():
+
+    random_state = np.random.RandomState(3)
+    X = 10. + random_state.randn(300, 3)
+    y = random_state.randint(-1, 3, size=(300, ))  # -1 is ignored
+    X[y == 1] += 1.
+    ubm = GaussianMixture(n_components=4, random_state=0).fit(X)
+
+    for params in ['m', 'wmc']:
+
+        adapted = adapt_mixtures(ubm, X, y, 3, params=params, n_iter=5,
+                                 chunk_size=17, n_jobs=2)
+
+        # same as adapting each mixture separately
+        for k, gmm in enumerate(adapted):
+            expected = GaussianMixture(
+                n_components=4, tol=ubm.tol, min_covar=ubm.min_covar,
+                n_iter=5, params=params, init_params='')
+            expected.weights_ = ubm.weights_
+            expected.means_ = ubm.means_
+            expected.covars_ = ubm.covars_
+            expected.fit(X[y == k])
+            assert np.allclose(gmm.weights_, expected.weights_)
+            assert np.allclose(gmm.means_, expected.means_)
+            assert np.allclose(gmm.covars_, expected.covars_)
+
+
+def test_map_adapt():
+
+    random_state = np.random.RandomState(4)
+    X = 10. + random_state.randn(300, 3)
+    y = random_state.randint(0, 2, size=(300, ))
+    X[y == 1] += 1.
+    ubm = GaussianMixture(n_components=4, random_state=0).fit(X)
+
+    # no prior: one EM iteration starting from the UBM
+    adapted = map_adapt_mixtures(ubm, X, y, 2, relevance_factor=1e-10,
+                                 params='wmc')
+    expected = adapt_mixtures(ubm, X, y, 2, params='wmc', n_iter=1)
+    for gmm, other in zip(adapted, expected):
+        assert np.allclose(gmm.weights_, other.weights_)
+        assert np.allclose(gmm.means_, other.means_)
+        assert np.allclose(gmm.covars_, other.covars_)
+
+    # strong prior: UBM (with covariances floored as in EM)
+    adapted = map_adapt_mixtures(ubm, X, y, 2, relevance_factor=1e10,
+                                 params='wmc')
+    for gmm in adapted:
+        assert np.allclose(gmm.weights_, ubm.weights_)
+        assert np.allclose(gmm.means_, ubm.means_)
+        assert np.allclose(gmm.covars_, ubm.covars_ + ubm.min_covar)
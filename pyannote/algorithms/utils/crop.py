@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Zero-copy feature cropping
+
+SlidingWindowFeature.crop returns a new array every time it is called. The
+functions below map segments to frame index ranges (using the same 'loose'
+rule as SlidingWindowFeature.crop, hence selecting the very same frames) and
+return views of the feature data -- or index arrays for batched gathers --
+instead of copies.
+"""
+
+from __future__ import unicode_literals
+
+import numpy as np
+from pyannote.core import Segment
+
+
+def frame_ranges(sliding_window, n_samples, start, end):
+    """Vectorized (loose) frame ranges
+
+    Parameters
+    ----------
+    sliding_window : SlidingWindow
+        Feature sliding window.
+    n_samples : int
+        Number of feature frames.
+    start, end : float or np.ndarray
+        Start and end times of segments.
+
+    Returns
+    -------
+    i, j : np.ndarray
+        Frames of each segment are data[i:j] (i == j when out of bounds).
+    """
+
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+
+    i = np.ceil((start - sliding_window.duration - sliding_window.start) /
+                sliding_window.step).astype(int)
+    j = np.floor((end - sliding_window.start) /
+                 sliding_window.step).astype(int) + 1
+
+    i = np.clip(i, 0, n_samples)
+    j = np.clip(j, i, n_samples)
+    return i, j
+
+
+def crop_ranges(features, focus):
+    """Get frame ranges of a segment or timeline
+
+    Parameters
+    ----------
+    features : SlidingWindowFeature
+    focus : Segment or Timeline
+        Overlapping (or contiguous) ranges of timeline segments are merged.
+
+    Returns
+    -------
+    ranges : list of (i, j) tuples
+        Sorted list of disjoint, non-empty frame ranges.
+    """
+
+    if isinstance(focus, Segment):
+        segments = [focus]
+    else:
+        segments = list(focus.support())
+
+    i, j = frame_ranges(features.sliding_window, len(features.data),
+                        [s.start for s in segments],
+                        [s.end for s in segments])
+
+    ranges = []
+    for i_, j_ in zip(i.tolist(), j.tolist()):
+        if i_ == j_:
+            continue
+        if ranges and i_ <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], j_))
+        else:
+            ranges.append((i_, j_))
+
+    return ranges
+
+
+def crop_views(features, focus):
+    """Get list of views of the frames of a segment or timeline
+
+    Parameters
+    ----------
+    features : SlidingWindowFeature
+    focus : Segment or Timeline
+
+    Returns
+    -------
+    views : list of np.ndarray
+        One view of features.data per (merged) frame range.
+    """
+    data = features.data
+    return [data[i:j] for i, j in crop_ranges(features, focus)]
+
+
+def crop(features, focus):
+    """Same as features.crop(focus) but avoids copies whenever possible
+
+    Parameters
+    ----------
+    features : SlidingWindowFeature
+    focus : Segment or Timeline
+
+    Returns
+    -------
+    data : np.ndarray
+        View of features.data when focus maps to a single frame range, copy
+        otherwise. Must be considered read-only.
+    """
+
+    views = crop_views(features, focus)
+
+    if len(views) == 1:
+        return views[0]
+
+    if not views:
+        return features.data[:0]
+
+    return np.concatenate(views)
+
+
+def crop_indices(features, segments):
+    """Get frame indices of a sequence of segments
+
+    Useful for gathering the frames of many segments with one single fancy
+    indexing operation (e.g. data[indices]).
+
+    Parameters
+    ----------
+    features : SlidingWindowFeature
+    segments : iterable of Segment
+        Segments are not merged: frames of overlapping segments are
+        repeated.
+
+    Returns
+    -------
+    indices : np.ndarray
+        Concatenated frame indices of all segments.
+    n_frames : np.ndarray
+        Number of frames of each segment.
+    """
+
+    segments = list(segments)
+    i, j = frame_ranges(features.sliding_window, len(features.data),
+                        [s.start for s in segments],
+                        [s.end for s in segments])
+
+    n_frames = j - i
+    offsets = np.cumsum(n_frames) - n_frames
+    indices = np.arange(np.sum(n_frames)) + np.repeat(i - offsets, n_frames)
+    return indices, n_frames
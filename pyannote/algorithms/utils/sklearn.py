@@ -31,6 +31,8 @@ from __future__ import unicode_literals
 import six.moves
 import numpy as np
 import itertools
+from .crop import crop_indices
+from .store import FrameStore
 
 
 class LabelConverter(object):
@@ -80,12 +82,15 @@ class LabelConverter(object):
         return mapping
 
     def transform(self, y):
-        """Transform labels into indices"""
+        """Transform labels into indices
 
-        converted_y = np.searchsorted(self.labels_, y)
-        if self.open_set_:
-            converted_y = converted_y - 1
-        return converted_y
+        None (unknown) label is transformed into -1. Raises KeyError for
+        labels that were not seen by `fit` or `extend` (or were removed).
+        """
+
+        mapping = self.mapping()
+        mapping[None] = -1
+        return np.array([mapping[label] for label in y], dtype=int)
 
     def inverse_transform(self, converted_y):
         """Transform indices into labels"""
@@ -98,6 +103,36 @@ class LabelConverter(object):
     def fit_transform(self, y):
         return self.fit(y).transform(y)
 
+    def extend(self, y):
+        """Add new labels (indexed after existing ones)
+
+        Returns
+        -------
+        new_labels : list
+            Labels that were not known yet, in order of their new index.
+        """
+
+        known = set(self.labels_)
+        new_labels = [label for label in np.unique(
+            [label for label in y if label is not None])
+            if label not in known]
+
+        if new_labels:
+            labels = list(self.labels_) + new_labels
+            self.labels_ = np.array(
+                labels, dtype=object if self.open_set_ else None)
+
+        return new_labels
+
+    def remove(self, labels):
+        """Remove labels (indices of remaining labels are shifted)"""
+
+        removed = set(labels)
+        self.labels_ = np.array(
+            [label for label in self.labels_ if label not in removed],
+            dtype=object if self.open_set_ else None)
+        return self
+
 
 class SKLearnMixin:
     """
@@ -109,13 +144,10 @@ class SKLearnMixin:
         if annotation is None:
             return features.data
 
-        X = []
-        for segment, _, label in annotation.itertracks(label=True):
-
-            _X = features.crop(segment)
-            X.append(_X)
-
-        return np.vstack(X)
+        # gather frames of all tracks at once
+        segments = [segment for segment, _ in annotation.itertracks()]
+        indices, _ = crop_indices(features, segments)
+        return features.data[indices]
 
     def X_iter(self, features_iter, annotation_iter=None):
 
@@ -135,15 +167,19 @@ class SKLearnMixin:
 
     def Xy(self, features, annotation):
 
-        X, y = [], []
+        segments, labels = [], []
         for segment, _, label in annotation.itertracks(label=True):
-            _X = features.crop(segment)
-            _y = [label] * _X.shape[0]
+            segments.append(segment)
+            labels.append(label)
 
-            X.append(_X)
-            y.extend(_y)
+        # gather frames of all tracks at once
+        indices, n_frames = crop_indices(features, segments)
 
-        return np.vstack(X), y
+        y = []
+        for label, n in six.moves.zip(labels, n_frames):
+            y.extend([label] * n)
+
+        return features.data[indices], y
 
     def Xy_iter(self, features_iter, annotation_iter):
 
@@ -157,3 +193,28 @@ class SKLearnMixin:
             y.extend(_y)
 
         return np.vstack(X), y
+
+    def Xy_store(self, features_iter, annotation_iter, dir=None):
+        """Same as Xy_stack but frames are stored on disk (and memory-mapped)
+
+        Files are processed one at a time, so that only one of them is loaded
+        in memory at any time.
+
+        Parameters
+        ----------
+        features_iter, annotation_iter : iterable
+        dir : str, optional
+            Directory where frames are stored. Defaults to the system
+            temporary directory.
+
+        Returns
+        -------
+        store : FrameStore
+            Frames are labeled with indices into store.labels_. Close the
+            store (or use it as a context manager) to delete frames from disk.
+        """
+
+        store = FrameStore(dir=dir)
+        for X, y in self.Xy_iter(features_iter, annotation_iter):
+            store.append(X, y)
+        return store
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""On-disk, memory-mapped store of labeled feature frames"""
+
+from __future__ import unicode_literals
+
+import os
+import tempfile
+import numpy as np
+
+
+class FrameStore(object):
+    """On-disk, memory-mapped store of (labeled) feature frames
+
+    Frames of many files are appended, one file at a time, to a binary file
+    which is then memory-mapped, so that training sets larger than the
+    available memory can be used without stacking them in RAM. Only labels
+    (and per-label index arrays) are kept in memory.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path to the binary file. Defaults to a temporary file, which is
+        deleted when the store is closed.
+    dir : str, optional
+        Directory where the temporary file is created. Defaults to the system
+        temporary directory.
+
+    Usage
+    -----
+    >>> with FrameStore() as store:
+    ...     for X, y in Xy_iter:
+    ...         store.append(X, y)
+    ...     # memory-mapped (n_frames, dimension) array
+    ...     store.X
+    ...     # frames labeled with store.labels_[k]
+    ...     store.subset(k)
+
+    Attributes
+    ----------
+    labels_ : list
+        Labels, in order of appearance. Frame labels (`y`) are indices into
+        this list.
+    offsets_ : list
+        File i frames are X[offsets_[i]:offsets_[i + 1]]
+    """
+
+    def __init__(self, path=None, dir=None):
+        super(FrameStore, self).__init__()
+
+        self.delete_ = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix='.frames', dir=dir)
+            os.close(fd)
+        self.path = path
+
+        self._file = open(self.path, 'wb')
+        self._dtype = None
+        self._dimension = None
+        self._X = None
+
+        self._y = []
+        self._codes = {}
+        self._indices = None
+
+        self.labels_ = []
+        self.offsets_ = [0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.offsets_[-1]
+
+    def append(self, X, y=None):
+        """Append frames of one file
+
+        Parameters
+        ----------
+        X : (n_frames, dimension) array-like
+        y : (n_frames, ) array-like, optional
+            Frame labels (any hashable). Defaults to None for every frame.
+        """
+
+        if self._file is None:
+            raise ValueError('Cannot append frames to a finalized store.')
+
+        X = np.asarray(X)
+        if self._dtype is None:
+            self._dtype = X.dtype
+            self._dimension = X.shape[1]
+
+        if y is None:
+            y = [None] * len(X)
+
+        if len(y) != len(X):
+            raise ValueError('X and y must have the same number of frames.')
+
+        # encode labels as integers, in order of appearance
+        codes = np.empty((len(X), ), dtype=np.int32)
+        for i, label in enumerate(y):
+            code = self._codes.get(label)
+            if code is None:
+                code = len(self.labels_)
+                self._codes[label] = code
+                self.labels_.append(label)
+            codes[i] = code
+
+        np.ascontiguousarray(X, dtype=self._dtype).tofile(self._file)
+        self._y.append(codes)
+        self.offsets_.append(self.offsets_[-1] + len(X))
+
+        return self
+
+    def _finalize(self):
+        """Stop appending and memory-map frames"""
+
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._file = None
+
+        n_frames = len(self)
+        if n_frames == 0:
+            dtype = np.float64 if self._dtype is None else self._dtype
+            self._X = np.empty((0, self._dimension or 0), dtype=dtype)
+        else:
+            self._X = np.memmap(self.path, dtype=self._dtype, mode='r',
+                                shape=(n_frames, self._dimension))
+
+        self._y = np.concatenate(self._y) if self._y else \
+            np.empty((0, ), dtype=np.int32)
+
+    @property
+    def X(self):
+        """(n_frames, dimension) memory-mapped frames"""
+        self._finalize()
+        return self._X
+
+    @property
+    def y(self):
+        """(n_frames, ) frame labels (indices into `labels_`)"""
+        self._finalize()
+        return self._y
+
+    def relabel(self, mapping):
+        """Change frame labels
+
+        Parameters
+        ----------
+        mapping : (n_labels, ) array-like of int
+            Frames labeled k are relabeled mapping[k]. Note that `labels_`
+            is left untouched.
+        """
+        self._finalize()
+        self._y = np.asarray(mapping)[self._y]
+        self._indices = None
+        return self
+
+    def indices(self, label):
+        """Get indices of frames with a given label
+
+        Parameters
+        ----------
+        label : int
+            Frame label (see `y`).
+
+        Returns
+        -------
+        indices : np.ndarray
+            Sorted indices of frames such that y == label.
+        """
+
+        # per-label index arrays are all computed at once
+        if self._indices is None:
+            y = self.y
+            order = np.argsort(y, kind='mergesort')
+            labels, starts = np.unique(y[order], return_index=True)
+            ends = list(starts[1:]) + [len(y)]
+            self._indices = {
+                label: order[start:end]
+                for label, start, end in zip(labels, starts, ends)}
+
+        return self._indices.get(
+            label, np.empty((0, ), dtype=np.int64))
+
+    def subset(self, label):
+        """Read (from disk) frames with a given label
+
+        Parameters
+        ----------
+        label : int
+            Frame label (see `y`).
+
+        Returns
+        -------
+        X : np.ndarray
+            In-memory copy of frames such that y == label.
+        """
+        return np.asarray(self.X[self.indices(label)])
+
+    def chunks(self, label=None, chunk_size=10000):
+        """Lazily read frames by chunks
+
+        Parameters
+        ----------
+        label : int, optional
+            Only read frames with this label (see `y`). Defaults to all frames.
+        chunk_size : int, optional
+            Number of frames per chunk. Defaults to 10000.
+
+        Returns
+        -------
+        chunks : FrameChunks
+            Re-iterable sequence of in-memory chunks of frames.
+        """
+        indices = None if label is None else self.indices(label)
+        return FrameChunks(self.X, indices=indices, chunk_size=chunk_size)
+
+    def files(self):
+        """Iterate over files
+
+        Yields
+        ------
+        X : np.ndarray
+            (Memory-mapped) frames of current file.
+        y : np.ndarray
+            Labels of current file.
+        """
+        X, y = self.X, self.y
+        for start, end in zip(self.offsets_[:-1], self.offsets_[1:]):
+            yield X[start:end], y[start:end]
+
+    def close(self):
+        """Close store (and delete temporary file)"""
+
+        self._finalize()
+        self._X = None
+
+        if self.delete_ and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class FrameChunks(object):
+    """Re-iterable chunks of (memory-mapped) frames
+
+    Parameters
+    ----------
+    X : (n_frames, dimension) array-like
+    indices : array-like, optional
+        Only read these frames. Defaults to all frames.
+    chunk_size : int, optional
+        Number of frames per chunk. Defaults to 10000.
+    """
+
+    def __init__(self, X, indices=None, chunk_size=10000):
+        super(FrameChunks, self).__init__()
+        self.X = X
+        self.indices = indices
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.X) if self.indices is None else len(self.indices)
+
+    def __iter__(self):
+        for i in range(0, len(self), self.chunk_size):
+            if self.indices is None:
+                yield np.asarray(self.X[i:i + self.chunk_size])
+            else:
+                yield self.X[self.indices[i:i + self.chunk_size]]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import numpy as np
+from pyannote.core import Segment, Timeline
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+from .crop import crop, crop_indices
+
+
+def get_features():
+    random_state = np.random.RandomState(0)
+    sliding_window = SlidingWindow(duration=0.025, step=0.01, start=0.)
+    return SlidingWindowFeature(random_state.randn(500, 3), sliding_window)
+
+
+def get_segments():
+    return [Segment(0.1234, 0.9), Segment(0.8, 1.55),
+            Segment(2.3456, 3.0), Segment(4.9, 5.2)]
+
+
+def test_crop_segment():
+    features = get_features()
+    for segment in get_segments():
+        data = crop(features, segment)
+        assert np.array_equal(data, features.crop(segment))
+        # view, not copy
+        assert np.shares_memory(data, features.data)
+
+
+def test_crop_timeline():
+    features = get_features()
+    timeline = Timeline(segments=get_segments())
+    assert np.array_equal(crop(features, timeline), features.crop(timeline))
+
+
+def test_crop_indices():
+    features = get_features()
+    segments = get_segments()
+    indices, n_frames = crop_indices(features, segments)
+    expected = [features.crop(segment) for segment in segments]
+    assert np.array_equal(features.data[indices], np.vstack(expected))
+    assert list(n_frames) == [len(data) for data in expected]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2014-2018 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+import os
+import numpy as np
+from .store import FrameStore
+
+
+def test_store():
+
+    random_state = np.random.RandomState(0)
+    X1, y1 = random_state.randn(100, 3), ['A'] * 60 + ['B'] * 40
+    X2, y2 = random_state.randn(50, 3), ['C'] * 20 + ['A'] * 30
+
+    with FrameStore() as store:
+
+        store.append(X1, y1).append(X2, y2)
+        path = store.path
+
+        assert np.array_equal(store.X, np.vstack([X1, X2]))
+        assert store.labels_ == ['A', 'B', 'C']
+        assert store.offsets_ == [0, 100, 150]
+
+        X, y = np.vstack([X1, X2]), np.array(y1 + y2)
+        for k, label in enumerate(store.labels_):
+            assert np.array_equal(store.subset(k), X[y == label])
+
+        files = list(store.files())
+        assert np.array_equal(files[1][0], X2)
+        assert list(files[1][1]) == [2] * 20 + [0] * 30
+
+        # e.g. from order of appearance to sorted label indices
+        store.relabel([1, 0, 2])
+        assert np.array_equal(store.subset(0), X1[60:])
+
+    assert not os.path.exists(path)
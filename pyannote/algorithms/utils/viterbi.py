@@ -83,19 +83,19 @@ def _update_initial(initial, consecutive):
 # create new emission prob. matrix accounting for duplicated states.
 def _update_emission(emission, consecutive):
 
-    return np.vstack(
+    return np.vstack([
         np.tile(e, (c, 1))  # duplicate emission probabilities c times
         for e, c in six.moves.zip(emission.T, consecutive)
-    ).T
+    ]).T
 
 
 # create new constraint matrix accounting for duplicated states
 def _update_constraint(constraint, consecutive):
 
-    return np.vstack(
+    return np.vstack([
         np.tile(e, (c, 1))  # duplicate constraint probabilities c times
         for e, c in six.moves.zip(constraint.T, consecutive)
-    ).T
+    ]).T
 
 
 # convert sequence of duplicated states back to sequence of original states.
@@ -30,36 +30,49 @@
 Hidden Markov Model with (constrained) Viterbi decoding
 
 Usage:
-  hmm train [-g <gaussian>] [-c <covariance>] [-d <duration>] <uris.lst> <references.mdtm> <features.pkl> <model.pkl>
-  hmm apply [-d <duration>] [-f <constraint.mdtm>] <model.pkl> <features.pkl> <hypothesis.mdtm>
+  hmm train [-g <gaussian>] [-c <covariance>] [-b <calibration>] <uris.lst> <references.mdtm> <features.pkl> <model.npz>
+  hmm apply [-d <duration>] [-f <constraint.mdtm>] [-u <uris.lst> [-j <jobs>]] <model.npz> <features.pkl> <hypothesis.mdtm>
   hmm -h | --help
   hmm --version
 
 Options:
   -g <gaussian>            Number of gaussian components [default: 16].
   -c <covariance>          Covariance type (diag or full) [default: diag].
+  -b <calibration>         Calibrate scores (naive_bayes or isotonic).
   -d <duration>            Minimum duration in seconds [default: 0.250].
   -f <constraint.mdtm>     Constrain Viterbi decoding to follow this path.
+  -u <uris.lst>            Batch mode: apply model to every resource listed
+                           in <uris.lst> (or read from standard input when
+                           <uris.lst> is "-"). <features.pkl> is then a path
+                           template such as "features/{uri}.pkl".
+  -j <jobs>                Number of worker processes in batch mode (model
+                           is loaded only once per worker) [default: 1].
   -h --help                Show this screen.
   --version                Show version.
 """
 
-from pyannote.algorithms.segmentation.hmm import ViterbiHMM
-from pyannote.parser.util import CoParser
+from __future__ import unicode_literals
+
+import os
+import sys
+from pyannote.algorithms.segmentation.hmm_base import predict_batch
 from pyannote.parser import MDTMParser
 from docopt import docopt
-import pickle
 
 
 def do_train(
-    uris_lst, references_mdtm, features_pkl, model_pkl,
-    n_components=16, covariance_type='diag', min_duration=0.250,
+    uris_lst, references_mdtm, features_pkl, model_npz,
+    n_components=16, covariance_type='diag', calibration=None,
 ):
 
-    hmm = ViterbiHMM(
+    # training relies on scikit-learn, applying does not
+    from pyannote.algorithms.segmentation.hmm import GMMSegmentation
+    from pyannote.parser.util import CoParser
+
+    hmm = GMMSegmentation(
         n_components=n_components, covariance_type=covariance_type,
-        random_state=None, thresh=1e-2, min_covar=1e-3, n_iter=10,
-        disturb=0.05, sampling=1000, min_duration=min_duration)
+        calibration=calibration, random_state=None, tol=1e-2,
+        min_covar=1e-3, n_iter=10, lbg=True)
 
     # iterate over all uris in a synchronous manner
     coParser = CoParser(uris=uris_lst,
@@ -67,31 +80,60 @@ def do_train(
                         features=features_pkl)
     references, features = coParser.generators('reference', 'features')
 
-    hmm.fit(references, features)
+    hmm.fit(features, references)
 
-    with open(model_pkl, 'wb') as f:
-        pickle.dump(hmm, f)
+    # pass a file object so that no .npz extension is appended
+    with open(model_npz, 'wb') as f:
+        hmm.save(f)
 
 
-def do_apply(model_pkl, features_pkl, hypothesis_mdtm,
-             min_duration=0.250, constraint_mdtm=None):
+def _iter_uris(uris_lst):
 
-    with open(model_pkl, 'rb') as f:
-        hmm = pickle.load(f)
+    f = sys.stdin if uris_lst == '-' else open(uris_lst, 'r')
 
-    hmm.min_duration = min_duration
+    try:
+        for line in f:
+            uri = line.strip()
+            if uri:
+                yield uri
+    finally:
+        if f is not sys.stdin:
+            f.close()
 
-    with open(features_pkl, 'rb') as f:
-        features = pickle.load(f)
+
+def do_apply(model_npz, features_pkl, hypothesis_mdtm,
+             min_duration=0.250, constraint_mdtm=None,
+             uris_lst=None, n_jobs=1):
 
     constraint = None
     if constraint_mdtm:
-        constraint = MDTMParser().read(constraint_mdtm)()
+        constraint = MDTMParser().read(constraint_mdtm)
+
+    # apply to one file, or to every listed resource (batch mode)
+    uris = [None] if uris_lst is None else _iter_uris(uris_lst)
 
-    hypothesis = hmm.apply(features, constraint=constraint)
+    hypotheses = predict_batch(model_npz, features_pkl, uris,
+                               min_duration=min_duration,
+                               constraint=constraint, n_jobs=n_jobs)
 
-    with open(hypothesis_mdtm, 'w') as f:
-        MDTMParser().write(hypothesis, f=f)
+    # hypotheses are written as soon as they are available
+    # (in the order of the list of resources)
+    writer = MDTMParser()
+    try:
+        with open(hypothesis_mdtm, 'w') as f:
+            for uri, hypothesis in hypotheses:
+                writer.write(hypothesis, f=f, uri=uri)
+                f.flush()
+
+    # do not leave a partial hypothesis behind
+    except BaseException:
+        if os.path.exists(hypothesis_mdtm):
+            os.remove(hypothesis_mdtm)
+        raise
+
+    # terminate worker processes (if any) as soon as possible
+    finally:
+        hypotheses.close()
 
 
 if __name__ == '__main__':
@@ -103,24 +145,27 @@ if __name__ == '__main__':
         uris_lst = arguments['<uris.lst>']
         references_mdtm = arguments['<references.mdtm>']
         features_pkl = arguments['<features.pkl>']
-        model_pkl = arguments['<model.pkl>']
+        model_npz = arguments['<model.npz>']
 
         n_components = int(arguments['-g'])
         covariance_type = arguments['-c']
-        min_duration = float(arguments['-d'])
+        calibration = arguments['-b']
 
         do_train(
-            uris_lst, references_mdtm, features_pkl, model_pkl,
+            uris_lst, references_mdtm, features_pkl, model_npz,
             n_components=n_components, covariance_type=covariance_type,
-            min_duration=min_duration)
+            calibration=calibration)
 
     elif arguments['apply']:
 
-        model_pkl = arguments['<model.pkl>']
+        model_npz = arguments['<model.npz>']
         features_pkl = arguments['<features.pkl>']
         hypothesis_mdtm = arguments['<hypothesis.mdtm>']
         min_duration = float(arguments['-d'])
         constraint_mdtm = arguments['-f']
+        uris_lst = arguments['-u']
+        n_jobs = int(arguments['-j'])
 
-        do_apply(model_pkl, features_pkl, hypothesis_mdtm,
-                 min_duration=min_duration, constraint_mdtm=constraint_mdtm)
+        do_apply(model_npz, features_pkl, hypothesis_mdtm,
+                 min_duration=min_duration, constraint_mdtm=constraint_mdtm,
+                 uris_lst=uris_lst, n_jobs=n_jobs)